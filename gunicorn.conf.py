@@ -2,48 +2,272 @@
 Gunicorn配置文件 - 生产环境优化
 """
 import os
+import re
+import sys
 import multiprocessing
 
+# 启动时一次性快照环境变量，避免重复的getenv和字符串解析
+_env = os.environ.copy()
+
+
+def _int(key, default):
+    """读取整数型环境变量，未设置时直接返回默认值"""
+    value = _env.get(key)
+    return int(value) if value else default
+
+
+def _bool(key, default=False):
+    """读取布尔型环境变量"""
+    value = _env.get(key)
+    return value.lower() == 'true' if value else default
+
+
+def _select_worker_class(limit_concurrency):
+    """
+    显式使用uvloop+httptools，仅在缺少httptools时退回纯Python的h11
+
+    UvicornWorker不读取gunicorn的worker_connections，这里映射为uvicorn的limit_concurrency，
+    超出上限的新请求直接返回503。
+    """
+    from uvicorn.workers import UvicornWorker, UvicornH11Worker
+
+    try:
+        import httptools  # noqa: F401
+    except ImportError:
+        class LimitedH11Worker(UvicornH11Worker):
+            CONFIG_KWARGS = {**UvicornH11Worker.CONFIG_KWARGS, "limit_concurrency": limit_concurrency}
+
+        return LimitedH11Worker
+
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+
+    class FastUvicornWorker(UvicornWorker):
+        CONFIG_KWARGS = {
+            **UvicornWorker.CONFIG_KWARGS,
+            "loop": loop,
+            "http": "httptools",
+            "limit_concurrency": limit_concurrency,
+        }
+
+    return FastUvicornWorker
+
+
 # 基本配置
-bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
-workers = int(os.getenv('WORKERS', multiprocessing.cpu_count() * 2 + 1))
-worker_class = "uvicorn.workers.UvicornWorker"
-worker_connections = int(os.getenv('WORKER_CONNECTIONS', '1000'))
+bind = f"0.0.0.0:{_env.get('PORT', '8000')}"
+# UvicornWorker基于事件循环处理I/O并发，每核一个进程即可；CPU密集场景可通过WORKERS覆盖
+workers = _int('WORKERS', multiprocessing.cpu_count())
+# 每个worker的并发连接上限，通过limit_concurrency传给uvicorn
+worker_connections = _int('WORKER_CONNECTIONS', 2000)
+worker_class = _select_worker_class(worker_connections)
 
 # 性能配置
-max_requests = int(os.getenv('MAX_REQUESTS', '1000'))
-max_requests_jitter = int(os.getenv('MAX_REQUESTS_JITTER', '100'))
-preload_app = os.getenv('PRELOAD_APP', 'true').lower() == 'true'
-keepalive = int(os.getenv('KEEPALIVE', '2'))
+max_requests = _int('MAX_REQUESTS', 1000)
+# 加宽抖动窗口，避免多个worker同时回收造成延迟尖峰；确认无内存泄漏后可设置MAX_REQUESTS=0关闭回收
+max_requests_jitter = _int('MAX_REQUESTS_JITTER', max(max_requests // 5, 200) if max_requests else 0)
+preload_app = _bool('PRELOAD_APP', True)
+# 部署在反向代理之后，keepalive需大于上游空闲超时（nginx默认60秒），避免代理复用已关闭的连接导致502
+keepalive = _int('KEEPALIVE', 75)
+
+# 心跳临时文件放到tmpfs，避免容器overlayfs上的磁盘I/O
+worker_tmp_dir = _env.get('WORKER_TMP_DIR', '/dev/shm')
+if not os.path.isdir(worker_tmp_dir):
+    worker_tmp_dir = None
 
 # 超时配置
-timeout = int(os.getenv('TIMEOUT', '30'))
-graceful_timeout = int(os.getenv('GRACEFUL_TIMEOUT', '30'))
+timeout = _int('TIMEOUT', 30)
+# 异步worker请求很短，缩短优雅退出等待以加快滚动发布
+graceful_timeout = _int('GRACEFUL_TIMEOUT', 10)
 
 # 日志配置
-loglevel = os.getenv('LOG_LEVEL', 'info').lower()
-accesslog = os.getenv('ACCESS_LOG', '-')  # - 表示stdout
-errorlog = os.getenv('ERROR_LOG', '-')    # - 表示stderr
+loglevel = _env.get('LOG_LEVEL', 'info').lower()
+# - 表示stdout；日志级别高于info时默认关闭访问日志，跳过逐请求的格式化和写出
+accesslog = _env.get('ACCESS_LOG', '-' if loglevel in ('debug', 'info') else None)
+
+# 指标通过StatsD的UDP发送；UvicornWorker下只有进程级指标，不含逐请求指标，访问日志照常输出
+statsd_host = _env.get('STATSD_HOST')
+statsd_prefix = _env.get('STATSD_PREFIX', 'veritext')
+errorlog = _env.get('ERROR_LOG', '-')    # - 表示stderr
 access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" %(D)s'
 
 # 进程配置
-pidfile = os.getenv('PID_FILE', '/tmp/gunicorn.pid')
-user = os.getenv('USER', None)
-group = os.getenv('GROUP', None)
+pidfile = _env.get('PID_FILE', '/tmp/gunicorn.pid')
+user = _env.get('USER', None)
+group = _env.get('GROUP', None)
 
 # SSL配置（可选）
-keyfile = os.getenv('SSL_KEYFILE', None)
-certfile = os.getenv('SSL_CERTFILE', None)
+keyfile = _env.get('SSL_KEYFILE', None)
+certfile = _env.get('SSL_CERTFILE', None)
+
+
+# 访问日志格式中的atom占位符，如 %(h)s、%({x-forwarded-for}i)s
+_ACCESS_ATOM_RE = re.compile(r'%\(([^)]+)\)s')
+
+
+def _compile_access_log_format(fmt):
+    """把访问日志格式预先拆分为字面量和atom键，每个请求只需一次join"""
+    parts = _ACCESS_ATOM_RE.split(fmt)
+    if any('%' in part.replace('%%', '') for part in parts[0::2]):
+        # 含有非 %(...)s 的格式说明符，交给gunicorn原有的%格式化
+        return None
+    literals = [part.replace('%%', '%') for part in parts[0::2]]
+    pairs = list(zip(parts[1::2], literals[1:]))
+    head = literals[0]
+
+    def render(atoms):
+        out = [head]
+        for key, literal in pairs:
+            out.append(str(atoms[key]))
+            out.append(literal)
+        return ''.join(out)
+
+    return render
+
+
+def _install_compiled_access_log(log, fmt):
+    """用预编译的格式化函数替换Logger.access中的逐请求%解析（仅当前worker实例）"""
+    import traceback
+
+    render = _compile_access_log_format(fmt)
+    if render is None:
+        return
+
+    def access(resp, req, environ, request_time):
+        if not log.access_log_enabled:
+            return
+        safe_atoms = log.atoms_wrapper_class(log.atoms(resp, req, environ, request_time))
+        try:
+            log.access_log.info(render(safe_atoms))
+        except Exception:
+            log.error(traceback.format_exc())
+
+    log.access = access
+
+
+def _rss_kb():
+    """当前进程的常驻内存（KB）"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+# 服务器钩子
+def pre_fork(server, worker):
+    """preload_app时检查master中残留的TCP套接字和后台线程，它们会被每个worker继承"""
+    import socket
+    import threading
+
+    if not preload_app or getattr(server, 'inherited_resources_audited', False):
+        return
+    server.inherited_resources_audited = True
+
+    listener_fds = {listener.fileno() for listener in server.LISTENERS}
+    try:
+        fds = [int(fd) for fd in os.listdir('/proc/self/fd')]
+    except OSError:
+        fds = []
+
+    for fd in fds:
+        if fd <= 2 or fd in listener_fds:
+            continue
+        try:
+            if not os.readlink(f'/proc/self/fd/{fd}').startswith('socket:'):
+                continue
+            sock = socket.socket(fileno=fd)
+        except OSError:
+            continue
+        try:
+            if sock.family in (socket.AF_INET, socket.AF_INET6):
+                server.log.warning("preload_app: fork前存在TCP套接字 fd=%s %s，所有worker将共享该套接字", fd, sock)
+        finally:
+            sock.detach()
+
+    for thread in threading.enumerate():
+        if thread is not threading.main_thread():
+            server.log.warning("preload_app: fork前存在后台线程 %s，该线程不会出现在worker中", thread.name)
+
+
+def when_ready(server):
+    """preload_app时把预加载的对象移入永久代，避免GC写对象头破坏fork后的写时复制共享"""
+    import gc
+
+    if preload_app:
+        gc.disable()
+        gc.collect()
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    """把访问日志的写出移到后台线程，请求处理只需入队"""
+    import gc
+    import queue
+
+    gc.enable()
+
+    worker.boot_rss_kb = _rss_kb()
+    from logging.handlers import QueueHandler, QueueListener
+
+    # gunicorn原生worker通过Logger.access写访问日志；UvicornWorker由uvicorn.access自行格式化
+    _install_compiled_access_log(worker.log, worker.cfg.access_log_format)
+
+    access_log = worker.log.access_log
+    handlers = list(access_log.handlers)
+    if not handlers:
+        return
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    # 原地替换：UvicornWorker的uvicorn.access与gunicorn.access共享同一个handlers列表
+    access_log.handlers[:] = [QueueHandler(log_queue)]
+    listener.start()
+    worker.access_log_listener = listener
+
+
+def worker_exit(server, worker):
+    """记录worker生命周期内的RSS增长，并停止访问日志线程"""
+    boot_rss_kb = getattr(worker, 'boot_rss_kb', None)
+    if boot_rss_kb is not None:
+        rss_kb = _rss_kb()
+        worker.log.info(
+            "Worker %s 退出: RSS %d KB (启动后 %+d KB)",
+            worker.pid, rss_kb, rss_kb - boot_rss_kb
+        )
+
+    listener = getattr(worker, 'access_log_listener', None)
+    if listener is not None:
+        listener.stop()
+
+
+def worker_abort(worker):
+    """worker超时被中止时输出所有线程的调用栈，便于排查卡住的请求"""
+    import faulthandler
+
+    faulthandler.dump_traceback(all_threads=True)
+
 
 # 开发模式配置
-if os.getenv('DEBUG', 'false').lower() == 'true':
+_debug = _bool('DEBUG')
+if _debug:
     reload = True
     workers = 1
     loglevel = 'debug'
+    accesslog = _env.get('ACCESS_LOG', '-')
+    # master中预加载的代码无法被reload重新加载，调试模式强制关闭preload_app
+    preload_app = False
 
-print(f"Gunicorn配置:")
-print(f"  绑定地址: {bind}")
-print(f"  工作进程: {workers}")
-print(f"  工作类: {worker_class}")
-print(f"  日志级别: {loglevel}")
-print(f"  预加载应用: {preload_app}")
+# 容器中stdout由日志系统采集，仅在交互终端或调试模式下输出启动信息
+if _debug or sys.stdout.isatty():
+    sys.stdout.write("\n".join([
+        "Gunicorn配置:",
+        f"  绑定地址: {bind}",
+        f"  工作进程: {workers}",
+        f"  工作类: {worker_class.__name__} {worker_class.CONFIG_KWARGS}",
+        f"  日志级别: {loglevel}",
+        f"  预加载应用: {preload_app}" + (" (DEBUG模式已关闭)" if _debug else ""),
+    ]) + "\n")
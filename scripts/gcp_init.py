@@ -5,80 +5,169 @@ GCP Cloud Run 配置初始化脚本
 """
 
 import os
+import re
+import io
+import csv
 import sys
 import json
+import shutil
 import subprocess
-import tempfile
+import threading
 import base64
+import time
+import random
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
-# 第三方库
+# 可选依赖：用于通过REST API加密GitHub Secret，缺失时回退到gh命令
 try:
-    import click
-    from inquirer import List as InquirerList, prompt, Text, Confirm
-    from rich.console import Console
-    from rich.panel import Panel
-    from rich.progress import Progress, SpinnerColumn, TextColumn
-    from rich.table import Table
-    from rich.syntax import Syntax
-    from rich import print as rprint
-    import requests
-    import yaml
-except ImportError as e:
-    print(f"❌ 缺少依赖库: {e}")
-    print("请安装依赖: pip install -r scripts/requirements-gcp.txt")
-    sys.exit(1)
-
-console = Console()
+    from nacl import public as nacl_public
+except ImportError:
+    nacl_public = None
+
+# 可选依赖：orjson解析更快且可直接解析bytes，缺失时使用标准库json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 第三方库（rich、inquirer、requests、yaml）在使用处按需导入，缩短脚本冷启动时间
+_DEPENDENCY_HINT = "请安装依赖: pip install -r scripts/requirements-gcp.txt"
+
+_console = None
+
+
+def get_console():
+    """获取全局rich控制台（首次使用时创建）"""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+
+def _yaml_loader_dumper():
+    """优先使用libyaml的C实现，缺失时回退到纯Python实现"""
+    try:
+        from yaml import CSafeLoader as loader, CSafeDumper as dumper
+    except ImportError:
+        from yaml import SafeLoader as loader, SafeDumper as dumper
+    return loader, dumper
+
+
+# 子进程公共参数；Windows下不创建控制台窗口
+_SUBPROCESS_KWARGS = {"capture_output": True, "text": True, "encoding": "utf-8"}
+if sys.platform == "win32":
+    _SUBPROCESS_KWARGS["creationflags"] = subprocess.CREATE_NO_WINDOW
+
+# 并发调用上限，避免触发GCP IAM修改配额和GitHub二级限流
+_GCP_SEMAPHORE = threading.BoundedSemaphore(4)
+_GH_SEMAPHORE = threading.BoundedSemaphore(6)
+
+_RATE_LIMIT_STATUS = frozenset({429, 503})
+
+
+def _is_rate_limited(result):
+    """判断gcloud/gh子进程结果或HTTP响应是否为限流"""
+    status_code = getattr(result, "status_code", None)
+    if status_code is not None:
+        return status_code in _RATE_LIMIT_STATUS
+    stderr = getattr(result, "stderr", None) or ""
+    return "429" in stderr or "rateLimitExceeded" in stderr
+
+
+def retry_with_backoff(max_tries=4, base=0.5, jitter=0.25):
+    """遇到限流时按指数退避加随机抖动重试"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(max_tries):
+                result = func(*args, **kwargs)
+                if attempt == max_tries - 1 or not _is_rate_limited(result):
+                    return result
+                time.sleep(base * 2 ** attempt + random.uniform(0, jitter))
+        return wrapper
+    return decorator
+
+
+# GitHub CLI路径，模块加载时查找一次；未安装时为None
+_GH_PATH = shutil.which("gh")
+
+# 常见的Google Cloud SDK安装路径（Windows）
+_GCLOUD_INSTALL_PATHS = (
+    r"C:\Program Files (x86)\Google\Cloud SDK\google-cloud-sdk\bin\gcloud.cmd",
+    r"C:\Program Files\Google\Cloud SDK\google-cloud-sdk\bin\gcloud.cmd",
+    r"C:\Users\{}\AppData\Local\Google\Cloud SDK\google-cloud-sdk\bin\gcloud.cmd".format(os.getenv('USERNAME', '')),
+)
+
+# Cloud Run可选区域（常量表，模块加载时生成一次选项文本）
+_REGIONS = (
+    ("us-central1", "美国中部 (推荐)"),
+    ("us-east1", "美国东部"),
+    ("us-west1", "美国西部"),
+    ("asia-east2", "亚洲东部2 (香港，推荐中国用户)"),
+    ("asia-northeast1", "亚洲东北部 (东京，推荐中国用户)"),
+    ("asia-southeast1", "亚洲东南部 (新加坡)"),
+    ("europe-west1", "欧洲西部 (比利时)"),
+    ("europe-west2", "欧洲西部 (伦敦)")
+)
+_REGION_CHOICES = tuple(f"{region} - {label}" for region, label in _REGIONS)
+
+# GCP项目ID规则：6-30位，小写字母开头，只含小写字母、数字和连字符
+_PROJECT_ID_RE = re.compile(r"[a-z][a-z0-9-]{5,29}")
+
+# 需要转换为整数的配置项
+_INT_KEYS = frozenset({"max_instances", "min_instances", "concurrency", "gunicorn_workers"})
+
+# 非交互模式下的配置来源：(配置项, 环境变量, 默认值)，环境变量名与GitHub Variables一致
+_CONFIG_ENV_VARS = (
+    ("region", "GCP_REGION", "asia-east2"),
+    ("service_name", "CLOUD_RUN_SERVICE_NAME", "veri-text"),
+    ("memory", "CLOUD_RUN_MEMORY", "1Gi"),
+    ("cpu", "CLOUD_RUN_CPU", "1"),
+    ("max_instances", "CLOUD_RUN_MAX_INSTANCES", "10"),
+    ("min_instances", "CLOUD_RUN_MIN_INSTANCES", "0"),
+    ("concurrency", "CLOUD_RUN_CONCURRENCY", "80"),
+    ("gunicorn_workers", "GUNICORN_WORKERS", "2")
+)
 
 class GCPProjectManager:
     """GCP项目管理器"""
     
-    def __init__(self):
+    def __init__(self, non_interactive=False):
+        self.non_interactive = non_interactive
         self.project_id = None
         self.region = None
         self.service_name = None
         self.service_account_name = "github-actions-cloud-run"
         self.gcloud_path = None
+        self._cfg = None
         
     def _find_gcloud_path(self):
-        """查找gcloud的绝对路径"""
-        # 常见的Google Cloud SDK安装路径
-        possible_paths = [
-            r"C:\Program Files (x86)\Google\Cloud SDK\google-cloud-sdk\bin\gcloud.cmd",
-            r"C:\Program Files\Google\Cloud SDK\google-cloud-sdk\bin\gcloud.cmd",
-            r"C:\Users\{}\AppData\Local\Google\Cloud SDK\google-cloud-sdk\bin\gcloud.cmd".format(os.getenv('USERNAME', '')),
-            "gcloud"  # 系统PATH中的gcloud
-        ]
+        """查找gcloud的绝对路径（结果在进程内缓存）"""
+        if self.gcloud_path:
+            return True
         
-        for path in possible_paths:
-            if path == "gcloud":
-                # 检查系统PATH中是否有gcloud
-                try:
-                    result = subprocess.run(
-                        ["where", "gcloud"],
-                        capture_output=True,
-                        text=True,
-                        shell=True,
-                        encoding='utf-8'
-                    )
-                    if result.returncode == 0 and result.stdout.strip():
-                        self.gcloud_path = result.stdout.strip().split('\n')[0]
-                        console.print(f"📍 找到gcloud路径: {self.gcloud_path}", style="blue")
-                        return True
-                except:
-                    continue
-            else:
-                # 检查绝对路径是否存在
-                if os.path.exists(path):
-                    self.gcloud_path = path
-                    console.print(f"📍 找到gcloud路径: {self.gcloud_path}", style="blue")
-                    return True
+        # 优先在系统PATH中查找gcloud，无需启动shell子进程
+        candidate = shutil.which("gcloud") or shutil.which("gcloud.cmd")
+        if candidate:
+            self.gcloud_path = candidate
+            get_console().print(f"📍 找到gcloud路径: {self.gcloud_path}", style="blue")
+            return True
+        
+        # 常见的Google Cloud SDK安装路径
+        for path in _GCLOUD_INSTALL_PATHS:
+            if os.path.isfile(path):
+                self.gcloud_path = path
+                get_console().print(f"📍 找到gcloud路径: {self.gcloud_path}", style="blue")
+                return True
         
-        console.print("❌ 未找到Google Cloud SDK安装路径", style="red")
-        console.print("💡 请确保Google Cloud SDK已正确安装", style="yellow")
-        console.print("💡 下载地址: https://cloud.google.com/sdk/docs/install", style="yellow")
+        get_console().print("❌ 未找到Google Cloud SDK安装路径", style="red")
+        get_console().print("💡 请确保Google Cloud SDK已正确安装", style="yellow")
+        get_console().print("💡 下载地址: https://cloud.google.com/sdk/docs/install", style="yellow")
         return False
         
     def _run_gcloud_command(self, args):
@@ -88,71 +177,116 @@ class GCPProjectManager:
                 raise FileNotFoundError("未找到gcloud命令")
         
         cmd = [self.gcloud_path] + args
-        return subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8')
+        return subprocess.run(cmd, **_SUBPROCESS_KWARGS)
         
+    def _get_gcloud_config(self):
+        """一次gcloud调用读取当前账户与项目（结果在进程内缓存）"""
+        if self._cfg is None:
+            result = self._run_gcloud_command(["config", "config-helper", "--format=json"])
+            try:
+                self._cfg = _json_loads(result.stdout) if result.returncode == 0 else {}
+            except ValueError:
+                self._cfg = {}
+        return self._cfg
+    
+    def _get_core_property(self, name):
+        """读取gcloud core配置项"""
+        return (self._get_gcloud_config()
+                .get("configuration", {})
+                .get("properties", {})
+                .get("core", {})
+                .get(name))
+    
     def check_gcloud_auth(self):
         """检查gcloud认证状态"""
         try:
             # 首先查找gcloud路径
             if not self._find_gcloud_path():
                 return False
-                
-            result = self._run_gcloud_command([
-                "auth", "list", "--filter=status:ACTIVE", "--format=value(account)"
-            ])
             
-            if result.returncode == 0 and result.stdout.strip():
-                account = result.stdout.strip()
-                console.print(f"✅ 已登录GCP账户: {account}", style="green")
+            account = self._get_core_property("account")
+            if account:
+                get_console().print(f"✅ 已登录GCP账户: {account}", style="green")
                 return True
             else:
-                console.print("❌ 未登录GCP账户", style="red")
+                get_console().print("❌ 未登录GCP账户", style="red")
                 return False
         except FileNotFoundError:
-            console.print("❌ 未找到gcloud命令，请安装Google Cloud SDK", style="red")
+            get_console().print("❌ 未找到gcloud命令，请安装Google Cloud SDK", style="red")
             return False
     
     def login_gcloud(self):
         """登录gcloud"""
-        console.print("🔐 开始GCP登录流程...")
+        get_console().print("🔐 开始GCP登录流程...")
         try:
             result = self._run_gcloud_command(["auth", "login"])
+            # 登录后账户信息已变化，丢弃缓存的配置
+            self._cfg = None
             if result.returncode == 0:
-                console.print("✅ GCP登录成功", style="green")
+                get_console().print("✅ GCP登录成功", style="green")
                 return True
             else:
-                console.print("❌ GCP登录失败", style="red")
+                get_console().print("❌ GCP登录失败", style="red")
                 return False
         except Exception as e:
-            console.print(f"❌ GCP登录失败: {e}", style="red")
+            get_console().print(f"❌ GCP登录失败: {e}", style="red")
             return False
     
     def list_projects(self):
         """列出可用项目"""
         try:
+            # csv格式对包含特殊字符的项目名称有明确的转义规则
             result = self._run_gcloud_command([
-                "projects", "list", "--format=value(projectId,name)"
+                "projects", "list", "--format=csv[no-heading](projectId,name)"
             ])
             
-            projects = []
-            if result.returncode == 0:
-                for line in result.stdout.strip().split('\n'):
-                    if line:
-                        parts = line.split('\t', 1)
-                        if len(parts) == 2:
-                            project_id, name = parts
-                            projects.append({'id': project_id, 'name': name})
-            
-            return projects
+            if result.returncode != 0:
+                return []
+            
+            return [
+                {'id': row[0], 'name': row[1]}
+                for row in csv.reader(io.StringIO(result.stdout))
+                if len(row) == 2
+            ]
         except:
             return []
     
     def select_project(self):
         """选择GCP项目"""
+        # 已通过参数或GCP_PROJECT_ID指定项目时无需列出和询问
+        self.project_id = self.project_id or os.getenv("GCP_PROJECT_ID")
+        if self.project_id:
+            get_console().print(f"✅ 已选择项目: {self.project_id}", style="green")
+            return True
+        
+        if self.non_interactive:
+            current_project = self._get_core_property("project")
+            if current_project:
+                self.project_id = current_project
+                get_console().print(f"✅ 已选择项目: {self.project_id}", style="green")
+                return True
+            get_console().print("❌ 非交互模式下需要通过--project-id或GCP_PROJECT_ID指定项目", style="red")
+            return False
+        
+        from inquirer import List as InquirerList, prompt, Confirm
+        
+        # 优先沿用gcloud当前项目，避免调用较慢的projects list
+        current_project = self._get_core_property("project")
+        if current_project:
+            answers = prompt([
+                Confirm('use_current',
+                       message=f"使用当前项目 {current_project}?",
+                       default=True)
+            ])
+            if answers['use_current']:
+                self.project_id = current_project
+                get_console().print(f"✅ 已选择项目: {self.project_id}", style="green")
+                return True
+        
         projects = self.list_projects()
         
         if not projects:
-            console.print("❌ 未找到可用项目", style="red")
+            get_console().print("❌ 未找到可用项目", style="red")
             # 提供创建新项目的选项
             questions = [
                 Confirm('create_new',
@@ -184,15 +318,17 @@ class GCPProjectManager:
             return self._create_new_project()
         else:
             self.project_id = answers['project'].split(' - ')[0]
-            console.print(f"✅ 已选择项目: {self.project_id}", style="green")
+            get_console().print(f"✅ 已选择项目: {self.project_id}", style="green")
             return True
     
     def _create_new_project(self):
         """创建新项目"""
+        from inquirer import prompt, Text
+        
         questions = [
             Text('project_id',
-                 message="输入项目ID (只能包含小写字母、数字和连字符):",
-                 validate=lambda _, x: len(x) >= 6 and x.replace('-', '').isalnum()),
+                 message="输入项目ID (6-30位，小写字母开头，只能包含小写字母、数字和连字符):",
+                 validate=lambda _, x: bool(_PROJECT_ID_RE.fullmatch(x))),
             Text('project_name',
                  message="输入项目名称:",
                  default="VeriText Project")
@@ -201,7 +337,7 @@ class GCPProjectManager:
         answers = prompt(questions)
         
         try:
-            console.print(f"🏗️ 创建项目: {answers['project_id']}")
+            get_console().print(f"🏗️ 创建项目: {answers['project_id']}")
             result = self._run_gcloud_command([
                 "projects", "create", answers['project_id'],
                 "--name", answers['project_name']
@@ -209,27 +345,32 @@ class GCPProjectManager:
             
             if result.returncode == 0:
                 self.project_id = answers['project_id']
-                console.print(f"✅ 项目创建成功: {self.project_id}", style="green")
+                get_console().print(f"✅ 项目创建成功: {self.project_id}", style="green")
                 return True
             else:
-                console.print(f"❌ 项目创建失败: {result.stderr}", style="red")
+                get_console().print(f"❌ 项目创建失败: {result.stderr}", style="red")
                 return False
         except Exception as e:
-            console.print(f"❌ 项目创建失败: {e}", style="red")
+            get_console().print(f"❌ 项目创建失败: {e}", style="red")
             return False
     
     def set_project(self):
         """设置当前项目"""
+        if self.project_id == self._get_core_property("project"):
+            get_console().print(f"✅ 已设置当前项目: {self.project_id}", style="green")
+            return True
+        
         try:
             result = self._run_gcloud_command(["config", "set", "project", self.project_id])
             if result.returncode == 0:
-                console.print(f"✅ 已设置当前项目: {self.project_id}", style="green")
+                self._cfg = None
+                get_console().print(f"✅ 已设置当前项目: {self.project_id}", style="green")
                 return True
             else:
-                console.print(f"❌ 设置项目失败: {result.stderr}", style="red")
+                get_console().print(f"❌ 设置项目失败: {result.stderr}", style="red")
                 return False
         except Exception as e:
-            console.print(f"❌ 设置项目失败: {e}", style="red")
+            get_console().print(f"❌ 设置项目失败: {e}", style="red")
             return False
 
 class GCPServiceManager:
@@ -248,32 +389,38 @@ class GCPServiceManager:
             "iam.googleapis.com"
         ]
         
-        console.print("🔧 启用必要的API服务...")
+        get_console().print("🔧 启用必要的API服务...")
         
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
-            
-            for api in apis:
-                task = progress.add_task(f"启用 {api}...", total=None)
-                
-                try:
-                    result = self.project_manager._run_gcloud_command([
-                        "services", "enable", api
-                    ])
-                    
-                    progress.remove_task(task)
-                    if result.returncode == 0:
-                        console.print(f"  ✅ {api}", style="green")
-                    else:
-                        console.print(f"  ❌ {api}: {result.stderr}", style="red")
-                except Exception as e:
-                    progress.remove_task(task)
-                    console.print(f"  ❌ {api}: {e}", style="red")
+        # 一次gcloud调用批量启用所有API，期间只显示一个状态指示
+        with get_console().status(f"启用 {len(apis)} 个API服务..."):
+            try:
+                result = self.project_manager._run_gcloud_command([
+                    "services", "enable", *apis
+                ])
+                error = None if result.returncode == 0 else result.stderr
+            except Exception as e:
+                error = e
         
-        console.print("✅ API启用完成", style="green")
+        # 查询一次已启用的服务，逐个报告状态
+        enabled = set()
+        try:
+            result = self.project_manager._run_gcloud_command([
+                "services", "list", "--enabled",
+                f"--filter=config.name:({' '.join(apis)})",
+                "--format=value(config.name)"
+            ])
+            if result.returncode == 0:
+                enabled = set(result.stdout.split())
+        except Exception:
+            pass
+        
+        for api in apis:
+            if api in enabled:
+                get_console().print(f"  ✅ {api}", style="green")
+            else:
+                get_console().print(f"  ❌ {api}: {error or '未启用'}", style="red")
+        
+        get_console().print("✅ API启用完成", style="green")
 
 class ServiceAccountManager:
     """服务账户管理器"""
@@ -286,19 +433,10 @@ class ServiceAccountManager:
     
     def create_service_account(self):
         """创建服务账户"""
-        console.print(f"👤 创建服务账户: {self.service_account_name}")
+        get_console().print(f"👤 创建服务账户: {self.service_account_name}")
         
         try:
-            # 检查服务账户是否已存在
-            result = self.project_manager._run_gcloud_command([
-                "iam", "service-accounts", "describe", self.service_account_email
-            ])
-            
-            if result.returncode == 0:
-                console.print(f"✅ 服务账户已存在: {self.service_account_email}", style="yellow")
-                return True
-            
-            # 创建新服务账户
+            # 直接创建，已存在时由返回的错误判断，省去一次describe调用
             result = self.project_manager._run_gcloud_command([
                 "iam", "service-accounts", "create", self.service_account_name,
                 "--display-name", "GitHub Actions Cloud Run Deployer",
@@ -306,14 +444,17 @@ class ServiceAccountManager:
             ])
             
             if result.returncode == 0:
-                console.print(f"✅ 服务账户创建成功: {self.service_account_email}", style="green")
+                get_console().print(f"✅ 服务账户创建成功: {self.service_account_email}", style="green")
+                return True
+            elif "ALREADY_EXISTS" in result.stderr or "already exists" in result.stderr.lower():
+                get_console().print(f"✅ 服务账户已存在: {self.service_account_email}", style="yellow")
                 return True
             else:
-                console.print(f"❌ 服务账户创建失败: {result.stderr}", style="red")
+                get_console().print(f"❌ 服务账户创建失败: {result.stderr}", style="red")
                 return False
             
         except Exception as e:
-            console.print(f"❌ 服务账户创建失败: {e}", style="red")
+            get_console().print(f"❌ 服务账户创建失败: {e}", style="red")
             return False
     
     def assign_permissions(self):
@@ -324,56 +465,88 @@ class ServiceAccountManager:
             "roles/storage.objectViewer"
         ]
         
-        console.print("🔐 分配服务账户权限...")
+        get_console().print("🔐 分配服务账户权限...")
         
-        for role in permissions:
+        # 不同角色的绑定互不依赖，并发执行；并发修改同一策略产生etag冲突时逐个重试
+        with ThreadPoolExecutor(max_workers=len(permissions)) as executor:
+            futures = {
+                executor.submit(self._add_iam_policy_binding, role): role
+                for role in permissions
+            }
+            
+            conflicted_roles = []
+            for future in as_completed(futures):
+                role = futures[future]
+                try:
+                    result = future.result()
+                    if result.returncode == 0:
+                        get_console().print(f"  ✅ {role}", style="green")
+                    elif "etag" in result.stderr.lower():
+                        conflicted_roles.append(role)
+                    else:
+                        get_console().print(f"  ❌ {role}: {result.stderr}", style="red")
+                except Exception as e:
+                    get_console().print(f"  ❌ {role}: {e}", style="red")
+        
+        for role in conflicted_roles:
             try:
-                result = self.project_manager._run_gcloud_command([
-                    "projects", "add-iam-policy-binding", self.project_id,
-                    "--member", f"serviceAccount:{self.service_account_email}",
-                    "--role", role
-                ])
+                result = self._add_iam_policy_binding(role)
                 
                 if result.returncode == 0:
-                    console.print(f"  ✅ {role}", style="green")
+                    get_console().print(f"  ✅ {role}", style="green")
                 else:
-                    console.print(f"  ❌ {role}: {result.stderr}", style="red")
+                    get_console().print(f"  ❌ {role}: {result.stderr}", style="red")
                 
             except Exception as e:
-                console.print(f"  ❌ {role}: {e}", style="red")
+                get_console().print(f"  ❌ {role}: {e}", style="red")
         
-        console.print("✅ 权限分配完成", style="green")
+        get_console().print("✅ 权限分配完成", style="green")
+    
+    @retry_with_backoff()
+    def _add_iam_policy_binding(self, role):
+        """为服务账户绑定单个角色"""
+        with _GCP_SEMAPHORE:
+            return self.project_manager._run_gcloud_command([
+                "projects", "add-iam-policy-binding", self.project_id,
+                "--member", f"serviceAccount:{self.service_account_email}",
+                "--role", role
+            ])
     
     def create_key(self):
         """创建密钥文件"""
-        console.print("🗝️ 创建服务账户密钥...")
+        import requests
+        
+        get_console().print("🗝️ 创建服务账户密钥...")
         
         try:
-            # 创建临时文件
-            with tempfile.NamedTemporaryFile(mode='w+', suffix='.json', delete=False) as f:
-                key_file = f.name
+            # 通过IAM REST API直接在内存中获取密钥，私钥不落盘
+            result = self.project_manager._run_gcloud_command(["auth", "print-access-token"])
+            if result.returncode != 0:
+                get_console().print(f"❌ 获取访问令牌失败: {result.stderr}", style="red")
+                return None
+            token = result.stdout.strip()
             
-            result = self.project_manager._run_gcloud_command([
-                "iam", "service-accounts", "keys", "create", key_file,
-                "--iam-account", self.service_account_email
-            ])
+            response = requests.post(
+                f"https://iam.googleapis.com/v1/projects/{self.project_id}"
+                f"/serviceAccounts/{self.service_account_email}/keys",
+                headers={"Authorization": f"Bearer {token}"},
+                json={
+                    "privateKeyType": "TYPE_GOOGLE_CREDENTIALS_FILE",
+                    "keyAlgorithm": "KEY_ALG_RSA_2048"
+                },
+                timeout=30
+            )
             
-            if result.returncode == 0:
-                # 读取密钥内容
-                with open(key_file, 'r') as f:
-                    key_content = f.read()
-                
-                # 删除临时文件
-                os.unlink(key_file)
-                
-                console.print("✅ 服务账户密钥创建成功", style="green")
+            if response.status_code == 200:
+                key_content = base64.b64decode(_json_loads(response.content)['privateKeyData']).decode('utf-8')
+                get_console().print("✅ 服务账户密钥创建成功", style="green")
                 return key_content
             else:
-                console.print(f"❌ 密钥创建失败: {result.stderr}", style="red")
+                get_console().print(f"❌ 密钥创建失败: {response.text}", style="red")
                 return None
             
         except Exception as e:
-            console.print(f"❌ 密钥创建失败: {e}", style="red")
+            get_console().print(f"❌ 密钥创建失败: {e}", style="red")
             return None
 
 class GitHubSecretsManager:
@@ -381,70 +554,128 @@ class GitHubSecretsManager:
     
     def __init__(self):
         self.repo_info = None
+        self._gh_cli_ready = False
+        self._api_session = None
+        self._public_key = None
+        self._public_key_lock = threading.Lock()
+        self._existing_variables = None
         
     def _check_gh_cli(self):
-        """检查GitHub CLI是否已安装和认证"""
+        """检查GitHub CLI是否已安装和认证（检查通过后缓存结果）"""
+        if self._gh_cli_ready:
+            return True
+        
         try:
-            # 检查gh命令是否存在
-            result = subprocess.run(
-                ["gh", "--version"],
-                capture_output=True,
-                text=True,
-                encoding='utf-8'
-            )
-            
-            if result.returncode != 0:
-                console.print("❌ 未找到GitHub CLI (gh)命令", style="red")
-                console.print("💡 请安装GitHub CLI: https://cli.github.com/", style="yellow")
+            # 检查gh命令是否存在（模块加载时已在PATH中查找，无需启动子进程）
+            if not _GH_PATH:
+                get_console().print("❌ 未找到GitHub CLI (gh)命令", style="red")
+                get_console().print("💡 请安装GitHub CLI: https://cli.github.com/", style="yellow")
                 return False
             
             # 检查是否已认证
             result = subprocess.run(
-                ["gh", "auth", "status"],
-                capture_output=True,
-                text=True,
-                encoding='utf-8'
+                [_GH_PATH, "auth", "status"],
+                **_SUBPROCESS_KWARGS
             )
             
             if result.returncode != 0:
-                console.print("❌ GitHub CLI未认证", style="red")
-                console.print("💡 请运行: gh auth login", style="yellow")
+                get_console().print("❌ GitHub CLI未认证", style="red")
+                get_console().print("💡 请运行: gh auth login", style="yellow")
                 return False
             
-            console.print("✅ GitHub CLI已安装并认证", style="green")
+            get_console().print("✅ GitHub CLI已安装并认证", style="green")
+            self._gh_cli_ready = True
             return True
             
         except FileNotFoundError:
-            console.print("❌ 未找到GitHub CLI (gh)命令", style="red")
-            console.print("💡 请安装GitHub CLI: https://cli.github.com/", style="yellow")
+            get_console().print("❌ 未找到GitHub CLI (gh)命令", style="red")
+            get_console().print("💡 请安装GitHub CLI: https://cli.github.com/", style="yellow")
             return False
     
     def _get_repo_info(self):
         """获取当前仓库信息"""
         try:
             result = subprocess.run(
-                ["gh", "repo", "view", "--json", "owner,name"],
-                capture_output=True,
-                text=True,
-                encoding='utf-8'
+                [_GH_PATH, "repo", "view", "--json", "owner,name"],
+                **_SUBPROCESS_KWARGS
             )
             
             if result.returncode == 0:
-                repo_data = json.loads(result.stdout)
+                repo_data = _json_loads(result.stdout)
                 self.repo_info = {
                     'owner': repo_data['owner']['login'],
                     'name': repo_data['name']
                 }
-                console.print(f"📍 检测到仓库: {self.repo_info['owner']}/{self.repo_info['name']}", style="blue")
+                get_console().print(f"📍 检测到仓库: {self.repo_info['owner']}/{self.repo_info['name']}", style="blue")
                 return True
             else:
-                console.print("❌ 无法获取仓库信息，请确保在Git仓库目录中运行", style="red")
+                get_console().print("❌ 无法获取仓库信息，请确保在Git仓库目录中运行", style="red")
                 return False
                 
         except Exception as e:
-            console.print(f"❌ 获取仓库信息失败: {e}", style="red")
+            get_console().print(f"❌ 获取仓库信息失败: {e}", style="red")
             return False
     
+    def _get_api_session(self):
+        """获取复用TLS连接的GitHub REST API会话，令牌通过gh获取，失败时返回None"""
+        import requests
+        
+        if self._api_session is not None:
+            return self._api_session or None
+        
+        self._api_session = False
+        if not _GH_PATH:
+            return None
+        
+        try:
+            result = subprocess.run(
+                [_GH_PATH, "auth", "token"],
+                **_SUBPROCESS_KWARGS
+            )
+            if result.returncode != 0 or not result.stdout.strip():
+                return None
+        except FileNotFoundError:
+            return None
+        
+        session = requests.Session()
+        session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=8))
+        session.headers.update({
+            "Authorization": f"Bearer {result.stdout.strip()}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28"
+        })
+        self._api_session = session
+        return session
+    
+    @staticmethod
+    @retry_with_backoff()
+    def _api_request(session, method, url, **kwargs):
+        """发送GitHub REST API请求，限制并发并在限流时退避重试"""
+        with _GH_SEMAPHORE:
+            return session.request(method, url, timeout=30, **kwargs)
+    
+    def _repo_api_url(self, path):
+        """拼接当前仓库的REST API地址"""
+        return f"https://api.github.com/repos/{self.repo_info['owner']}/{self.repo_info['name']}/{path}"
+    
+    def _encrypt_secret(self, session, secret_value):
+        """使用仓库公钥加密Secret，缺少PyNaCl时返回None"""
+        if nacl_public is None:
+            return None
+        
+        with self._public_key_lock:
+            if self._public_key is None:
+                response = self._api_request(session, "GET", self._repo_api_url("actions/secrets/public-key"))
+                response.raise_for_status()
+                self._public_key = _json_loads(response.content)
+        
+        public_key = nacl_public.PublicKey(base64.b64decode(self._public_key['key']))
+        encrypted = nacl_public.SealedBox(public_key).encrypt(secret_value.encode('utf-8'))
+        return {
+            "encrypted_value": base64.b64encode(encrypted).decode('utf-8'),
+            "key_id": self._public_key['key_id']
+        }
+    
     def set_secret(self, secret_name, secret_value):
         """设置GitHub Secret"""
         if not self._check_gh_cli():
@@ -453,23 +684,47 @@ class GitHubSecretsManager:
         if not self.repo_info and not self._get_repo_info():
             return False
         
+        return self._set_secret(secret_name, secret_value)
+    
+    def _set_secret(self, secret_name, secret_value):
+        """设置单个Secret（调用方需已完成gh和仓库检查）"""
+        session = self._get_api_session()
+        if session is not None:
+            try:
+                payload = self._encrypt_secret(session, secret_value)
+                if payload is not None:
+                    response = self._api_request(
+                        session, "PUT",
+                        self._repo_api_url(f"actions/secrets/{secret_name}"),
+                        json=payload
+                    )
+                    if response.status_code in (201, 204):
+                        get_console().print(f"✅ 已设置GitHub Secret: {secret_name}", style="green")
+                        return True
+                    get_console().print(f"❌ 设置GitHub Secret失败: {secret_name}", style="red")
+                    get_console().print(f"错误信息: {response.text}", style="red")
+                    return False
+            except Exception as e:
+                get_console().print(f"❌ 设置GitHub Secret失败: {e}", style="red")
+                return False
+        
         try:
             # 使用gh命令设置secret，通过stdin传递内容，指定为actions应用
             result = subprocess.run([
-                "gh", "secret", "set", secret_name,
+                _GH_PATH, "secret", "set", secret_name,
                 "--app", "actions"
-            ], input=secret_value, capture_output=True, text=True, encoding='utf-8')
+            ], input=secret_value, **_SUBPROCESS_KWARGS)
             
             if result.returncode == 0:
-                console.print(f"✅ 已设置GitHub Secret: {secret_name}", style="green")
+                get_console().print(f"✅ 已设置GitHub Secret: {secret_name}", style="green")
                 return True
             else:
-                console.print(f"❌ 设置GitHub Secret失败: {secret_name}", style="red")
-                console.print(f"错误信息: {result.stderr}", style="red")
+                get_console().print(f"❌ 设置GitHub Secret失败: {secret_name}", style="red")
+                get_console().print(f"错误信息: {result.stderr}", style="red")
                 return False
                 
         except Exception as e:
-            console.print(f"❌ 设置GitHub Secret失败: {e}", style="red")
+            get_console().print(f"❌ 设置GitHub Secret失败: {e}", style="red")
             return False
     
     def set_variable(self, variable_name, variable_value):
@@ -480,47 +735,148 @@ class GitHubSecretsManager:
         if not self.repo_info and not self._get_repo_info():
             return False
         
+        return self._set_variable(variable_name, variable_value)
+    
+    def _set_variable(self, variable_name, variable_value):
+        """设置单个Variable（调用方需已完成gh和仓库检查）"""
+        session = self._get_api_session()
+        if session is not None:
+            try:
+                payload = {"name": variable_name, "value": variable_value}
+                update_url = self._repo_api_url(f"actions/variables/{variable_name}")
+                create_url = self._repo_api_url("actions/variables")
+                
+                if self._existing_variables is not None and variable_name not in self._existing_variables:
+                    # 已预取变量列表且不存在时直接创建，已存在（并发创建）时再更新
+                    response = self._api_request(session, "POST", create_url, json=payload)
+                    if response.status_code == 409:
+                        response = self._api_request(session, "PATCH", update_url, json=payload)
+                else:
+                    # 先更新已有变量，不存在时再创建
+                    response = self._api_request(session, "PATCH", update_url, json=payload)
+                    if response.status_code == 404:
+                        response = self._api_request(session, "POST", create_url, json=payload)
+                
+                if response.status_code in (201, 204):
+                    get_console().print(f"✅ 已设置GitHub Variable: {variable_name} = {variable_value}", style="green")
+                    return True
+                get_console().print(f"❌ 设置GitHub Variable失败: {variable_name}", style="red")
+                get_console().print(f"错误信息: {response.text}", style="red")
+                return False
+            except Exception as e:
+                get_console().print(f"❌ 设置GitHub Variable失败: {e}", style="red")
+                return False
+        
         try:
             # 使用gh命令设置variable
             result = subprocess.run([
-                "gh", "variable", "set", variable_name,
+                _GH_PATH, "variable", "set", variable_name,
                 "--body", variable_value
-            ], capture_output=True, text=True, encoding='utf-8')
+            ], **_SUBPROCESS_KWARGS)
             
             if result.returncode == 0:
-                console.print(f"✅ 已设置GitHub Variable: {variable_name} = {variable_value}", style="green")
+                get_console().print(f"✅ 已设置GitHub Variable: {variable_name} = {variable_value}", style="green")
                 return True
             else:
-                console.print(f"❌ 设置GitHub Variable失败: {variable_name}", style="red")
-                console.print(f"错误信息: {result.stderr}", style="red")
+                get_console().print(f"❌ 设置GitHub Variable失败: {variable_name}", style="red")
+                get_console().print(f"错误信息: {result.stderr}", style="red")
                 return False
                 
         except Exception as e:
-            console.print(f"❌ 设置GitHub Variable失败: {e}", style="red")
+            get_console().print(f"❌ 设置GitHub Variable失败: {e}", style="red")
             return False
     
+    def _prefetch_existing_variables(self):
+        """一次请求获取仓库已有的Variable名称，之后每个Variable只需一次写请求"""
+        session = self._get_api_session()
+        if session is None:
+            return
+        
+        try:
+            names = set()
+            page = 1
+            while True:
+                response = self._api_request(
+                    session, "GET", self._repo_api_url("actions/variables"),
+                    params={"per_page": 30, "page": page}
+                )
+                if response.status_code != 200:
+                    return
+                data = _json_loads(response.content)
+                names.update(variable['name'] for variable in data.get('variables', []))
+                if len(names) >= data.get('total_count', 0) or not data.get('variables'):
+                    break
+                page += 1
+            self._existing_variables = names
+        except Exception:
+            # 预取失败时退回逐个PATCH/POST探测
+            self._existing_variables = None
+    
     def set_multiple_variables(self, variables_dict):
         """批量设置GitHub Variables"""
-        console.print("⚙️ 设置GitHub Variables...")
+        get_console().print("⚙️ 设置GitHub Variables...")
         
-        success_count = 0
         total_count = len(variables_dict)
         
-        for name, value in variables_dict.items():
-            if self.set_variable(name, str(value)):
-                success_count += 1
+        # gh和仓库检查只需执行一次，之后并发提交各Variable
+        if not self._check_gh_cli():
+            return False
+        
+        if not self.repo_info and not self._get_repo_info():
+            return False
+        
+        self._prefetch_existing_variables()
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda item: self._set_variable(item[0], str(item[1])),
+                variables_dict.items()
+            ))
+        success_count = sum(results)
         
         if success_count == total_count:
-            console.print(f"✅ 所有GitHub Variables设置成功 ({success_count}/{total_count})", style="green")
+            get_console().print(f"✅ 所有GitHub Variables设置成功 ({success_count}/{total_count})", style="green")
             return True
         else:
-            console.print(f"⚠️ 部分GitHub Variables设置失败 ({success_count}/{total_count})", style="yellow")
+            get_console().print(f"⚠️ 部分GitHub Variables设置失败 ({success_count}/{total_count})", style="yellow")
+            return False
+    
+    def set_secrets_and_variables(self, secrets_dict, variables_dict):
+        """并发设置GitHub Secrets和Variables，总耗时取决于最慢的一次调用"""
+        if not self._check_gh_cli():
+            return False
+        
+        if not self.repo_info and not self._get_repo_info():
+            return False
+        
+        self._prefetch_existing_variables()
+        
+        tasks = [
+            lambda name=name, value=value: self._set_secret(name, value)
+            for name, value in secrets_dict.items()
+        ] + [
+            lambda name=name, value=value: self._set_variable(name, str(value))
+            for name, value in variables_dict.items()
+        ]
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda task: task(), tasks))
+        
+        success_count = sum(results)
+        total_count = len(tasks)
+        
+        if success_count == total_count:
+            get_console().print(f"✅ 所有GitHub Secrets和Variables设置成功 ({success_count}/{total_count})", style="green")
+            return True
+        else:
+            get_console().print(f"⚠️ 部分GitHub Secrets和Variables设置失败 ({success_count}/{total_count})", style="yellow")
             return False
 
 class GitHubSetupManager:
     """GitHub独立设置管理器"""
     
-    def __init__(self):
+    def __init__(self, non_interactive=False):
+        self.non_interactive = non_interactive
         self.config_file = Path("scripts/gcp-config.yaml")
         self.service_account_key_file = Path("scripts/gcp-service-account-key.json")
         self.config = None
@@ -528,38 +884,40 @@ class GitHubSetupManager:
     
     def load_config(self):
         """从文件加载配置"""
+        import yaml
+        
         try:
             if not self.config_file.exists():
-                console.print(f"❌ 配置文件不存在: {self.config_file}", style="red")
-                console.print("💡 请先运行完整的GCP配置: python scripts/gcp_init.py", style="yellow")
+                get_console().print(f"❌ 配置文件不存在: {self.config_file}", style="red")
+                get_console().print("💡 请先运行完整的GCP配置: python scripts/gcp_init.py", style="yellow")
                 return False
             
             with open(self.config_file, 'r', encoding='utf-8') as f:
-                self.config = yaml.safe_load(f)
+                self.config = yaml.load(f, Loader=_yaml_loader_dumper()[0])
             
-            console.print(f"✅ 已加载配置文件: {self.config_file}", style="green")
+            get_console().print(f"✅ 已加载配置文件: {self.config_file}", style="green")
             return True
             
         except Exception as e:
-            console.print(f"❌ 加载配置文件失败: {e}", style="red")
+            get_console().print(f"❌ 加载配置文件失败: {e}", style="red")
             return False
     
     def load_service_account_key(self):
         """从文件加载服务账户密钥"""
         try:
             if not self.service_account_key_file.exists():
-                console.print(f"❌ 服务账户密钥文件不存在: {self.service_account_key_file}", style="red")
-                console.print("💡 请先运行完整的GCP配置: python scripts/gcp_init.py", style="yellow")
+                get_console().print(f"❌ 服务账户密钥文件不存在: {self.service_account_key_file}", style="red")
+                get_console().print("💡 请先运行完整的GCP配置: python scripts/gcp_init.py", style="yellow")
                 return False
             
             with open(self.service_account_key_file, 'r', encoding='utf-8') as f:
                 self.service_account_key = f.read()
             
-            console.print(f"✅ 已加载服务账户密钥文件: {self.service_account_key_file}", style="green")
+            get_console().print(f"✅ 已加载服务账户密钥文件: {self.service_account_key_file}", style="green")
             return True
             
         except Exception as e:
-            console.print(f"❌ 加载服务账户密钥文件失败: {e}", style="red")
+            get_console().print(f"❌ 加载服务账户密钥文件失败: {e}", style="red")
             return False
     
     def generate_variables(self):
@@ -583,7 +941,9 @@ class GitHubSetupManager:
     
     def setup_from_config(self):
         """从配置文件设置GitHub Secrets和Variables"""
-        console.print("\n🔧 [bold]从配置文件设置GitHub Secrets和Variables[/bold]")
+        from rich.table import Table
+        
+        get_console().print("\n🔧 [bold]从配置文件设置GitHub Secrets和Variables[/bold]")
         
         # 加载配置文件
         if not self.load_config():
@@ -594,7 +954,7 @@ class GitHubSetupManager:
             return False
         
         # 显示配置信息
-        console.print("\n📋 [bold]当前配置:[/bold]")
+        get_console().print("\n📋 [bold]当前配置:[/bold]")
         config_table = Table()
         config_table.add_column("配置项", style="cyan")
         config_table.add_column("值", style="green")
@@ -605,71 +965,63 @@ class GitHubSetupManager:
         config_table.add_row("内存", self.config.get('memory', 'N/A'))
         config_table.add_row("CPU", str(self.config.get('cpu', 'N/A')))
         
-        console.print(config_table)
-        
-        # 询问是否继续
-        questions = [
-            Confirm('confirm_setup',
-                   message="确认使用上述配置设置GitHub Secrets和Variables?",
-                   default=True)
-        ]
-        answers = prompt(questions)
+        get_console().print(config_table)
         
-        if not answers['confirm_setup']:
-            console.print("❌ 用户取消操作", style="yellow")
-            return False
+        # 询问是否继续（非交互模式直接设置）
+        if not self.non_interactive:
+            from inquirer import prompt, Confirm
+            
+            questions = [
+                Confirm('confirm_setup',
+                       message="确认使用上述配置设置GitHub Secrets和Variables?",
+                       default=True)
+            ]
+            answers = prompt(questions)
+            
+            if not answers['confirm_setup']:
+                get_console().print("❌ 用户取消操作", style="yellow")
+                return False
         
         # 创建GitHub管理器并设置
         github_manager = GitHubSecretsManager()
         
-        # 设置GitHub Secret (服务账户密钥)
-        console.print("\n🔐 设置GitHub Secrets...")
-        if not github_manager.set_secret("GCP_SA_KEY", self.service_account_key):
-            return False
-        
-        # 设置GitHub Variables
-        console.print("\n⚙️ 设置GitHub Variables...")
+        # 同时设置GitHub Secret (服务账户密钥) 和 Variables
+        get_console().print("\n🔐 设置GitHub Secrets和Variables...")
         variables = self.generate_variables()
-        if not github_manager.set_multiple_variables(variables):
+        if not github_manager.set_secrets_and_variables(
+            {"GCP_SA_KEY": self.service_account_key}, variables
+        ):
             return False
         
-        console.print("\n✅ [bold green]GitHub配置完成![/bold green]", style="green")
-        console.print("💡 可以通过以下命令验证设置:")
-        console.print("   [dim]gh secret list[/dim]")
-        console.print("   [dim]gh variable list[/dim]")
+        get_console().print("\n✅ [bold green]GitHub配置完成![/bold green]", style="green")
+        get_console().print("💡 可以通过以下命令验证设置:")
+        get_console().print("   [dim]gh secret list[/dim]")
+        get_console().print("   [dim]gh variable list[/dim]")
         
         return True
 
 class ConfigurationManager:
     """配置管理器"""
     
-    def __init__(self):
+    def __init__(self, non_interactive=False):
+        self.non_interactive = non_interactive
         self.config = {}
         self.config_file = Path("scripts/gcp-config.yaml")
     
     def collect_configuration(self):
         """收集配置信息"""
-        console.print("\n⚙️ [bold]配置Cloud Run参数[/bold]")
-        
-        # 区域选择
-        regions = [
-            ("us-central1", "美国中部 (推荐)"),
-            ("us-east1", "美国东部"),
-            ("us-west1", "美国西部"),
-            ("asia-east2", "亚洲东部2 (香港，推荐中国用户)"),
-            ("asia-northeast1", "亚洲东北部 (东京，推荐中国用户)"),
-            ("asia-southeast1", "亚洲东南部 (新加坡)"),
-            ("europe-west1", "欧洲西部 (比利时)"),
-            ("europe-west2", "欧洲西部 (伦敦)")
-        ]
+        if self.non_interactive:
+            return self._collect_configuration_from_env()
+        
+        from inquirer import List as InquirerList, prompt, Text
         
-        region_choices = [f"{region[0]} - {region[1]}" for region in regions]
+        get_console().print("\n⚙️ [bold]配置Cloud Run参数[/bold]")
         
         questions = [
             InquirerList('region',
                  message="选择部署区域:",
-                 choices=region_choices,
-                 default=region_choices[3]),  # 默认选择asia-east2 (香港)
+                 choices=_REGION_CHOICES,
+                 default=_REGION_CHOICES[3]),  # 默认选择asia-east2 (香港)
             
             Text('service_name',
                  message="Cloud Run服务名称:",
@@ -704,34 +1056,56 @@ class ConfigurationManager:
         
         answers = prompt(questions)
         
-        self.config = {
-            'project_id': getattr(self, 'project_id', ''),
-            'region': answers['region'].split(' - ')[0],
-            'service_name': answers['service_name'],
-            'memory': answers['memory'],
-            'cpu': answers['cpu'],
-            'max_instances': int(answers['max_instances']),
-            'min_instances': int(answers['min_instances']),
-            'concurrency': int(answers['concurrency']),
-            'gunicorn_workers': int(answers['gunicorn_workers']),
-            'created_at': datetime.now().isoformat()
+        answers['region'] = answers['region'].split(' - ')[0]
+        return self._build_config(answers)
+    
+    def _collect_configuration_from_env(self):
+        """非交互模式：按 环境变量 > 已保存配置 > 默认值 的顺序取值，不加载inquirer"""
+        saved = {}
+        if self.config_file.exists():
+            import yaml
+            
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                saved = yaml.load(f, Loader=_yaml_loader_dumper()[0]) or {}
+        
+        answers = {
+            key: os.getenv(env_var, saved.get(key, default))
+            for key, env_var, default in _CONFIG_ENV_VARS
         }
+        # 命令行参数优先
+        for key in ('region', 'service_name'):
+            if getattr(self, key, None):
+                answers[key] = getattr(self, key)
+        get_console().print(f"⚙️ 使用非交互配置: {answers}")
+        return self._build_config(answers)
+    
+    def _build_config(self, answers):
+        """由各项取值生成最终配置"""
+        self.config = {'project_id': getattr(self, 'project_id', '')}
+        self.config.update(
+            (key, int(value) if key in _INT_KEYS else value)
+            for key, value in answers.items()
+        )
+        self.config['created_at'] = datetime.now(timezone.utc).isoformat()
         
         return self.config
     
     def save_configuration(self):
         """保存配置到文件"""
+        import yaml
+        
         try:
             # 确保目录存在
             self.config_file.parent.mkdir(parents=True, exist_ok=True)
             
             with open(self.config_file, 'w', encoding='utf-8') as f:
-                yaml.dump(self.config, f, default_flow_style=False, allow_unicode=True)
+                yaml.dump(self.config, f, Dumper=_yaml_loader_dumper()[1],
+                          default_flow_style=False, allow_unicode=True)
             
-            console.print(f"✅ 配置已保存到: {self.config_file}", style="green")
+            get_console().print(f"✅ 配置已保存到: {self.config_file}", style="green")
             return True
         except Exception as e:
-            console.print(f"❌ 配置保存失败: {e}", style="red")
+            get_console().print(f"❌ 配置保存失败: {e}", style="red")
             return False
     
     def generate_github_variables_instructions(self):
@@ -753,10 +1127,12 @@ class ConfigurationManager:
 class GCPInitializer:
     """GCP初始化管理器"""
     
-    def __init__(self):
-        self.project_manager = GCPProjectManager()
-        self.config_manager = ConfigurationManager()
+    def __init__(self, non_interactive=False):
+        self.non_interactive = non_interactive
+        self.project_manager = GCPProjectManager(non_interactive)
+        self.config_manager = ConfigurationManager(non_interactive)
         self.service_account_key = None
+        self._gh_configured = False
         
     def run(self):
         """运行初始化流程"""
@@ -798,11 +1174,13 @@ class GCPInitializer:
         
         # 收集配置
         self.config_manager.project_id = self.project_manager.project_id
+        self.config_manager.region = self.project_manager.region
+        self.config_manager.service_name = self.project_manager.service_name
         config = self.config_manager.collect_configuration()
         self.config_manager.save_configuration()
         
         # 自动设置GitHub Secrets和Variables
-        self._setup_github_secrets_and_variables()
+        self._gh_configured = self._setup_github_secrets_and_variables()
         
         # 显示设置说明
         self._show_setup_instructions(sa_manager.service_account_email)
@@ -811,8 +1189,10 @@ class GCPInitializer:
     
     def _show_welcome(self):
         """显示欢迎信息"""
-        console.print()
-        console.print(Panel.fit(
+        from rich.panel import Panel
+        
+        get_console().print()
+        get_console().print(Panel.fit(
             "🌐 [bold blue]GCP Cloud Run 配置初始化工具[/bold blue]\n\n"
             "此工具将帮助你:\n"
             "• 设置GCP项目和权限\n"
@@ -825,10 +1205,16 @@ class GCPInitializer:
     
     def _check_prerequisites(self):
         """检查前置条件"""
-        console.print("\n🔍 [bold]检查前置条件[/bold]")
+        get_console().print("\n🔍 [bold]检查前置条件[/bold]")
         
         # 检查gcloud认证
         if not self.project_manager.check_gcloud_auth():
+            if self.non_interactive:
+                get_console().print("❌ 需要先登录GCP", style="red")
+                return False
+            
+            from inquirer import prompt, Confirm
+            
             questions = [
                 Confirm('login_now',
                        message="是否立即登录GCP?",
@@ -840,49 +1226,54 @@ class GCPInitializer:
                 if not self.project_manager.login_gcloud():
                     return False
             else:
-                console.print("❌ 需要先登录GCP", style="red")
+                get_console().print("❌ 需要先登录GCP", style="red")
                 return False
         
         return True
     
     def _setup_github_secrets_and_variables(self):
-        """自动设置GitHub Secrets和Variables"""
-        console.print("\n🔧 [bold]自动配置GitHub Secrets和Variables[/bold]")
+        """自动设置GitHub Secrets和Variables，返回是否全部设置成功"""
+        get_console().print("\n🔧 [bold]自动配置GitHub Secrets和Variables[/bold]")
         
         # 创建GitHub管理器
         github_manager = GitHubSecretsManager()
         
-        # 询问是否自动设置
-        questions = [
-            Confirm('auto_setup',
-                   message="是否自动设置GitHub Secrets和Variables?",
-                   default=True)
-        ]
-        answers = prompt(questions)
-        
-        if not answers['auto_setup']:
-            console.print("⏭️ 跳过自动设置，将在最后显示手动设置说明", style="yellow")
-            return
-        
-        # 设置GitHub Secret (服务账户密钥)
-        console.print("\n🔐 设置GitHub Secrets...")
-        github_manager.set_secret("GCP_SA_KEY", self.service_account_key)
+        # 询问是否自动设置（非交互模式直接设置）
+        if not self.non_interactive:
+            from inquirer import prompt, Confirm
+            
+            questions = [
+                Confirm('auto_setup',
+                       message="是否自动设置GitHub Secrets和Variables?",
+                       default=True)
+            ]
+            answers = prompt(questions)
+            
+            if not answers['auto_setup']:
+                get_console().print("⏭️ 跳过自动设置，将在最后显示手动设置说明", style="yellow")
+                return False
         
-        # 设置GitHub Variables
-        console.print("\n⚙️ 设置GitHub Variables...")
+        # 同时设置GitHub Secret (服务账户密钥) 和 Variables
+        get_console().print("\n🔐 设置GitHub Secrets和Variables...")
         variables = self.config_manager.generate_github_variables_instructions()
-        github_manager.set_multiple_variables(variables)
+        configured = github_manager.set_secrets_and_variables(
+            {"GCP_SA_KEY": self.service_account_key}, variables
+        )
         
-        console.print("\n✅ GitHub配置完成!", style="green")
+        if configured:
+            get_console().print("\n✅ GitHub配置完成!", style="green")
+        return configured
     
     def _show_setup_instructions(self, service_account_email):
         """显示设置说明"""
-        console.print("\n" + "="*60)
-        console.print("🎉 [bold green]GCP配置完成![/bold green]")
-        console.print("="*60)
+        from rich.table import Table
+        
+        get_console().print("\n" + "="*60)
+        get_console().print("🎉 [bold green]GCP配置完成![/bold green]")
+        get_console().print("="*60)
         
         # 显示项目信息
-        console.print("\n📋 [bold]项目信息:[/bold]")
+        get_console().print("\n📋 [bold]项目信息:[/bold]")
         project_table = Table()
         project_table.add_column("项目", style="cyan")
         project_table.add_column("值", style="green")
@@ -892,19 +1283,12 @@ class GCPInitializer:
         project_table.add_row("服务名", self.config_manager.config['service_name'])
         project_table.add_row("服务账户", service_account_email)
         
-        console.print(project_table)
+        get_console().print(project_table)
         
-        # 检查是否自动设置了GitHub配置
-        try:
-            # 检查是否有gh命令并且已认证
-            result = subprocess.run(["gh", "auth", "status"], capture_output=True, encoding='utf-8')
-            auto_setup_available = (result.returncode == 0)
-        except:
-            auto_setup_available = False
-        
-        if auto_setup_available:
-            console.print("\n✅ [bold green]GitHub Secrets和Variables已自动配置完成![/bold green]")
-            console.print("如需手动验证，请查看GitHub仓库的 Settings > Secrets and variables > Actions")
+        # 根据之前的自动设置结果决定是否显示手动设置说明
+        if self._gh_configured:
+            get_console().print("\n✅ [bold green]GitHub Secrets和Variables已自动配置完成![/bold green]")
+            get_console().print("如需手动验证，请查看GitHub仓库的 Settings > Secrets and variables > Actions")
         else:
             # 显示手动设置说明
             self._show_manual_github_setup()
@@ -912,39 +1296,53 @@ class GCPInitializer:
         # 保存密钥到文件
         key_file = Path("scripts/gcp-service-account-key.json")
         try:
-            with open(key_file, 'w') as f:
-                f.write(self.service_account_key)
-            console.print(f"\n💾 服务账户密钥已保存到: [cyan]{key_file}[/cyan]")
-            console.print("⚠️ [yellow]请妥善保管此文件，不要提交到代码库![/yellow]")
+            if sys.platform == "win32":
+                # Windows忽略权限位，直接写入
+                key_file.write_text(self.service_account_key, encoding='utf-8')
+            else:
+                # 创建时即限定为仅属主可读写，避免密钥文件短暂地对其他用户可读
+                fd = os.open(str(key_file), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                try:
+                    # 文件已存在时O_CREAT的权限参数不生效，需显式收紧
+                    os.fchmod(fd, 0o600)
+                    os.write(fd, self.service_account_key.encode('utf-8'))
+                finally:
+                    os.close(fd)
+            get_console().print(f"\n💾 服务账户密钥已保存到: [cyan]{key_file}[/cyan]")
+            get_console().print("⚠️ [yellow]请妥善保管此文件，不要提交到代码库![/yellow]")
         except Exception as e:
-            console.print(f"❌ 密钥文件保存失败: {e}", style="red")
+            get_console().print(f"❌ 密钥文件保存失败: {e}", style="red")
         
         # 下一步说明
-        console.print("\n🚀 [bold]下一步操作:[/bold]")
-        console.print("1. 验证GitHub Secrets和Variables已正确设置")
-        console.print("2. 推送版本标签测试自动部署:")
-        console.print("   [dim]git tag v1.0.x && git push origin v1.0.x[/dim]")
+        get_console().print("\n🚀 [bold]下一步操作:[/bold]")
+        get_console().print("1. 验证GitHub Secrets和Variables已正确设置")
+        get_console().print("2. 推送版本标签测试自动部署:")
+        get_console().print("   [dim]git tag v1.0.x && git push origin v1.0.x[/dim]")
     
     def _show_manual_github_setup(self):
         """显示手动GitHub设置说明"""
+        from rich.panel import Panel
+        from rich.syntax import Syntax
+        from rich.table import Table
+        
         # GitHub Secrets设置
-        console.print("\n🔐 [bold]GitHub Secrets 手动设置:[/bold]")
-        console.print("在GitHub仓库的 [cyan]Settings > Secrets and variables > Actions[/cyan] 中添加:")
+        get_console().print("\n🔐 [bold]GitHub Secrets 手动设置:[/bold]")
+        get_console().print("在GitHub仓库的 [cyan]Settings > Secrets and variables > Actions[/cyan] 中添加:")
         
         secrets_table = Table()
         secrets_table.add_column("Secret名称", style="yellow")
         secrets_table.add_column("说明", style="white")
         
         secrets_table.add_row("GCP_SA_KEY", "服务账户密钥 (JSON格式)")
-        console.print(secrets_table)
+        get_console().print(secrets_table)
         
-        console.print("\n📄 [bold]服务账户密钥内容:[/bold]")
+        get_console().print("\n📄 [bold]服务账户密钥内容:[/bold]")
         syntax = Syntax(self.service_account_key, "json", theme="monokai", line_numbers=False)
-        console.print(Panel(syntax, title="GCP_SA_KEY", expand=False))
+        get_console().print(Panel(syntax, title="GCP_SA_KEY", expand=False))
         
         # GitHub Variables设置
-        console.print("\n⚙️ [bold]GitHub Variables 手动设置:[/bold]")
-        console.print("在GitHub仓库的 [cyan]Settings > Secrets and variables > Actions > Variables[/cyan] 中添加:")
+        get_console().print("\n⚙️ [bold]GitHub Variables 手动设置:[/bold]")
+        get_console().print("在GitHub仓库的 [cyan]Settings > Secrets and variables > Actions > Variables[/cyan] 中添加:")
         
         variables = self.config_manager.generate_github_variables_instructions()
         variables_table = Table()
@@ -954,24 +1352,19 @@ class GCPInitializer:
         for name, value in variables.items():
             variables_table.add_row(name, value)
         
-        console.print(variables_table)
+        get_console().print(variables_table)
 
-@click.command()
-@click.option('--project-id', help='指定GCP项目ID')
-@click.option('--region', help='指定部署区域')
-@click.option('--service-name', help='指定Cloud Run服务名称')
-@click.option('--github-only', is_flag=True, help='只设置GitHub Secrets和Variables（需要先运行完整配置）')
-def main(project_id, region, service_name, github_only):
+def main(project_id, region, service_name, github_only, non_interactive=False):
     """GCP Cloud Run 配置初始化工具"""
     
     try:
         if github_only:
             # 只设置GitHub相关信息
-            github_setup = GitHubSetupManager()
+            github_setup = GitHubSetupManager(non_interactive)
             success = github_setup.setup_from_config()
         else:
             # 完整的GCP配置流程
-            initializer = GCPInitializer()
+            initializer = GCPInitializer(non_interactive)
             
             # 如果提供了命令行参数，直接使用
             if project_id:
@@ -984,17 +1377,39 @@ def main(project_id, region, service_name, github_only):
             success = initializer.run()
         
         if success:
-            console.print("\n🎉 [bold green]配置完成![/bold green]")
+            get_console().print("\n🎉 [bold green]配置完成![/bold green]")
         else:
-            console.print("\n❌ [bold red]配置失败[/bold red]")
+            get_console().print("\n❌ [bold red]配置失败[/bold red]")
             sys.exit(1)
             
+    except ImportError as e:
+        print(f"❌ 缺少依赖库: {e}")
+        print(_DEPENDENCY_HINT)
+        sys.exit(1)
     except KeyboardInterrupt:
-        console.print("\n❌ 用户取消操作", style="yellow")
+        get_console().print("\n❌ 用户取消操作", style="yellow")
         sys.exit(1)
     except Exception as e:
-        console.print(f"\n❌ 配置失败: {e}", style="red")
+        get_console().print(f"\n❌ 配置失败: {e}", style="red")
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
+    try:
+        import click
+    except ImportError as e:
+        print(f"❌ 缺少依赖库: {e}")
+        print(_DEPENDENCY_HINT)
+        sys.exit(1)
+    
+    @click.command()
+    @click.option('--project-id', help='指定GCP项目ID')
+    @click.option('--region', help='指定部署区域')
+    @click.option('--service-name', help='指定Cloud Run服务名称')
+    @click.option('--github-only', is_flag=True, help='只设置GitHub Secrets和Variables（需要先运行完整配置）')
+    @click.option('--non-interactive/--interactive', default=lambda: bool(os.getenv("CI")),
+                  help='非交互模式：配置取自环境变量和已保存的配置文件（设置CI环境变量时默认开启）')
+    def cli(project_id, region, service_name, github_only, non_interactive):
+        """GCP Cloud Run 配置初始化工具"""
+        main(project_id, region, service_name, github_only, non_interactive)
+    
+    cli()
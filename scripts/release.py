@@ -23,7 +23,6 @@ try:
     from rich.table import Table
     from rich.syntax import Syntax
     from rich import print as rprint
-    from packaging import version
 except ImportError as e:
     print(f"❌ 缺少依赖库: {e}")
     print("请安装依赖: pip install -r requirements-release.txt")
@@ -31,12 +30,56 @@ except ImportError as e:
 
 console = Console()
 
+# AI提交信息提示词模板，只有版本号和文件更改（最多20条）是动态部分
+_PROMPT_TEMPLATE = """
+你是一个专业的Git提交信息生成器。请根据以下文件更改生成一个高质量的提交信息。
+
+项目: VeriText - 智能敏感词检测系统
+新版本: %(version)s
+
+文件更改:
+%(changes)s
+
+要求:
+1. 使用中文
+2. 遵循Conventional Commits规范
+3. 第一行是简洁的标题(不超过50字符)
+4. 如果有多个更改，在标题后添加详细描述
+5. 突出版本发布的重要性
+
+格式示例:
+feat: 发布v%(version)s版本
+
+- 新增功能A和功能B
+- 修复重要bug C
+- 优化性能和用户体验
+- 更新文档和配置
+
+请生成提交信息:
+"""
+
+# git status --porcelain 暂存区状态字符到统计项的映射
+_CHANGE_STATUS_KEYS = {'A': 'added', 'M': 'modified', 'D': 'deleted', 'R': 'renamed'}
+
+def _parse_status_line(line):
+    """将git status --porcelain的一行拆为 (状态码, 文件路径)"""
+    return line[:2], line[3:] if line[2] == ' ' else line[2:].lstrip()
+
+
+# 语义化版本号 主.次.修订（允许v前缀和预发布后缀，缺省的次/修订号视为0）
+_VER_RE = re.compile(r'^v?(\d+)(?:\.(\d+))?(?:\.(\d+))?')
+
+# 版本号匹配：version / __version__ / app_version / VERSION（忽略大小写），一次扫描取最先出现者
+_VERSION_RE = re.compile(r'(?:__version__|app_version|version)\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+
 class VersionManager:
     """版本管理器"""
     
     def __init__(self, project_root):
         self.project_root = project_root
         self.current_version = self._get_current_version()
+        match = _VER_RE.match(self.current_version)
+        self.current_version_tuple = tuple(int(part or 0) for part in match.groups()) if match else None
     
     def _get_current_version(self):
         """获取当前版本号"""
@@ -78,17 +121,9 @@ class VersionManager:
         try:
             content = file_path.read_text(encoding='utf-8')
             
-            patterns = [
-                r'version\s*=\s*["\']([^"\']+)["\']',
-                r'__version__\s*=\s*["\']([^"\']+)["\']',
-                r'app_version\s*=\s*["\']([^"\']+)["\']',
-                r'VERSION\s*=\s*["\']([^"\']+)["\']'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, content, re.IGNORECASE)
-                if match:
-                    return match.group(1)
+            match = _VERSION_RE.search(content)
+            if match:
+                return match.group(1)
         except:
             pass
         
@@ -97,18 +132,20 @@ class VersionManager:
     def bump_version(self, bump_type):
         """升级版本号"""
         try:
-            current = version.parse(self.current_version)
+            if self.current_version_tuple is None:
+                raise ValueError(f"无法解析当前版本号: {self.current_version}")
+            major, minor, patch = self.current_version_tuple
             
             if bump_type == "patch":
-                new_version = f"{current.major}.{current.minor}.{current.micro + 1}"
+                new_version = (major, minor, patch + 1)
             elif bump_type == "minor":
-                new_version = f"{current.major}.{current.minor + 1}.0"
+                new_version = (major, minor + 1, 0)
             elif bump_type == "major":
-                new_version = f"{current.major + 1}.0.0"
+                new_version = (major + 1, 0, 0)
             else:
                 raise ValueError(f"Invalid bump type: {bump_type}")
             
-            return new_version
+            return "%d.%d.%d" % new_version
         except Exception as e:
             console.print(f"❌ 版本号升级失败: {e}", style="red")
             sys.exit(1)
@@ -118,89 +155,85 @@ class GitManager:
     
     def __init__(self, project_root):
         self.project_root = project_root
+        self._uncommitted_cache = None
+    
+    def _git(self, *args):
+        """在项目目录下运行git命令，输出保留为bytes，由调用方一次性解码；失败时打印git的错误输出"""
+        result = subprocess.run(
+            ["git", *args],
+            capture_output=True,
+            cwd=self.project_root
+        )
+        if result.returncode != 0:
+            stderr = result.stderr.decode('utf-8', errors='replace').strip()
+            console.print(f"❌ git {args[0]} 失败: {stderr}", style="red", markup=False)
+        return result
     
     def get_uncommitted_changes(self):
-        """获取未提交的更改"""
+        """获取未提交的更改（结果缓存，工作区变化后需调用invalidate_status）"""
+        if self._uncommitted_cache is not None:
+            return self._uncommitted_cache
+        
         try:
-            result = subprocess.run(
-                ["git", "status", "--porcelain"],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                cwd=self.project_root
-            )
+            result = self._git("status", "--porcelain")
             
             if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                return [line for line in lines if line.strip()]
+                lines = result.stdout.decode('utf-8', errors='replace').splitlines()
+                self._uncommitted_cache = [line for line in lines if line.strip()]
+                return self._uncommitted_cache
             return []
         except:
             return []
     
+    def invalidate_status(self):
+        """清除缓存的工作区状态"""
+        self._uncommitted_cache = None
+    
     def get_recent_commits(self, count=10):
         """获取最近的提交记录"""
         try:
-            result = subprocess.run(
-                ["git", "log", f"--max-count={count}", "--pretty=format:%H|%s|%an|%ad", "--date=short"],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                cwd=self.project_root
-            )
+            # 字段以NUL分隔，提交标题中含有'|'也能正确解析；%s只有一行，记录按行拆分
+            result = self._git("log", f"--max-count={count}", "--pretty=format:%H%x00%s%x00%an%x00%ad", "--date=short")
             
             commits = []
             if result.returncode == 0:
-                for line in result.stdout.strip().split('\n'):
-                    if line:
-                        hash_val, subject, author, date = line.split('|', 3)
-                        commits.append({
-                            'hash': hash_val[:8],
-                            'subject': subject,
-                            'author': author,
-                            'date': date
-                        })
+                commits = [
+                    {
+                        'hash': hash_val[:8],
+                        'subject': subject,
+                        'author': author,
+                        'date': date
+                    }
+                    for hash_val, subject, author, date in (
+                        line.split('\x00', 3)
+                        for line in result.stdout.decode('utf-8', errors='replace').splitlines()
+                        if line
+                    )
+                ]
             return commits
         except:
             return []
     
     def commit_changes(self, message):
         """提交所有更改"""
-        try:
-            # 添加所有文件
-            subprocess.run(["git", "add", "."], cwd=self.project_root, check=True, encoding='utf-8')
-            
-            # 提交
-            subprocess.run(
-                ["git", "commit", "-m", message],
-                cwd=self.project_root,
-                check=True,
-                encoding='utf-8'
-            )
-            return True
-        except subprocess.CalledProcessError:
+        # 添加所有文件
+        if self._git("add", ".").returncode != 0:
+            return False
+        
+        # 提交
+        if self._git("commit", "-m", message).returncode != 0:
             return False
+        
+        self.invalidate_status()
+        return True
     
     def create_tag(self, tag, message):
         """创建标签"""
-        try:
-            subprocess.run(
-                ["git", "tag", "-a", tag, "-m", message],
-                cwd=self.project_root,
-                check=True,
-                encoding='utf-8'
-            )
-            return True
-        except subprocess.CalledProcessError:
-            return False
+        return self._git("tag", "-a", tag, "-m", message).returncode == 0
     
     def push_with_tags(self):
-        """推送代码和标签"""
-        try:
-            subprocess.run(["git", "push", "origin", "main"], cwd=self.project_root, check=True, encoding='utf-8')
-            subprocess.run(["git", "push", "origin", "--tags"], cwd=self.project_root, check=True, encoding='utf-8')
-            return True
-        except subprocess.CalledProcessError:
-            return False
+        """推送代码和标签（一次原子推送，分支和标签要么都成功要么都不更新）"""
+        return self._git("push", "--atomic", "origin", "main", "--tags").returncode == 0
 
 class AICommitGenerator:
     """AI提交信息生成器"""
@@ -216,6 +249,13 @@ class AICommitGenerator:
             sys.exit(1)
         
         self.base_url = "https://openrouter.ai/api/v1/chat/completions"
+        
+        # 复用keep-alive连接，重试时无需重新进行TCP和TLS握手
+        self._session = requests.Session()
+        self._session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
     
     def generate_commit_message(self, changes, version):
         """生成提交信息"""
@@ -229,70 +269,57 @@ class AICommitGenerator:
         # 分析更改类型
         change_summary = self._analyze_changes(changes)
         
-        prompt = f"""
-你是一个专业的Git提交信息生成器。请根据以下文件更改生成一个高质量的提交信息。
-
-项目: VeriText - 智能敏感词检测系统
-新版本: {version}
-
-文件更改:
-{chr(10).join(changes[:20])}  # 限制显示前20个更改
-
-要求:
-1. 使用中文
-2. 遵循Conventional Commits规范
-3. 第一行是简洁的标题(不超过50字符)
-4. 如果有多个更改，在标题后添加详细描述
-5. 突出版本发布的重要性
-
-格式示例:
-feat: 发布v{version}版本
-
-- 新增功能A和功能B
-- 修复重要bug C
-- 优化性能和用户体验
-- 更新文档和配置
-
-请生成提交信息:
-"""
+        prompt = _PROMPT_TEMPLATE % {
+            'version': version,
+            'changes': '\n'.join(f"{status} {file_path}" for status, file_path in changes[:20])
+        }
 
         try:
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                console=console
-            ) as progress:
-                task = progress.add_task("🤖 AI正在生成提交信息...", total=None)
-                
-                response = requests.post(
-                    self.base_url,
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": "anthropic/claude-3.5-sonnet",
-                        "messages": [
-                            {
-                                "role": "user", 
-                                "content": prompt
-                            }
-                        ],
-                        "max_tokens": 500,
-                        "temperature": 0.7
-                    },
-                    timeout=30
-                )
+            console.print("🤖 AI正在生成提交信息...", style="dim")
+            
+            # 流式接收，生成的内容边到达边显示
+            with self._session.post(
+                self.base_url,
+                json={
+                    "model": "anthropic/claude-3.5-sonnet",
+                    "messages": [
+                        {
+                            "role": "user", 
+                            "content": prompt
+                        }
+                    ],
+                    "max_tokens": 500,
+                    "temperature": 0.7,
+                    "stream": True
+                },
+                stream=True,
+                timeout=30
+            ) as response:
+                if response.status_code != 200:
+                    console.print(f"❌ AI服务错误: {response.status_code}", style="red")
+                    return self._fallback_commit_message(version, change_summary)
                 
-                progress.remove_task(task)
+                buf = []
+                for line in response.iter_lines(decode_unicode=True):
+                    # SSE数据行格式为 "data: {...}"，以 "data: [DONE]" 结束
+                    if not line or not line.startswith('data: '):
+                        continue
+                    data = line[6:]
+                    if data == '[DONE]':
+                        break
+                    
+                    chunk = json.loads(data)
+                    choices = chunk.get('choices') or [{}]
+                    content = choices[0].get('delta', {}).get('content') or ''
+                    if content:
+                        buf.append(content)
+                        console.print(content, end='', markup=False, highlight=False)
+                console.print()
             
-            if response.status_code == 200:
-                result = response.json()
-                commit_message = result['choices'][0]['message']['content'].strip()
-                return commit_message
-            else:
-                console.print(f"❌ AI服务错误: {response.status_code}", style="red")
+            commit_message = ''.join(buf).strip()
+            if not commit_message:
                 return self._fallback_commit_message(version, change_summary)
+            return commit_message
                 
         except Exception as e:
             console.print(f"❌ AI生成失败: {e}", style="yellow")
@@ -308,18 +335,12 @@ feat: 发布v{version}版本
             'files': []
         }
         
-        for change in changes:
-            if change.startswith('A '):
-                summary['added'] += 1
-            elif change.startswith('M '):
-                summary['modified'] += 1
-            elif change.startswith('D '):
-                summary['deleted'] += 1
-            elif change.startswith('R '):
-                summary['renamed'] += 1
+        for status, file_path in changes:
+            # 按暂存区状态字符分类
+            key = _CHANGE_STATUS_KEYS.get(status[0])
+            if key:
+                summary[key] += 1
             
-            # 提取文件名
-            file_path = change[2:].strip()
             summary['files'].append(file_path)
         
         return summary
@@ -341,6 +362,7 @@ class ReleaseManager:
         self.version_manager = VersionManager(self.project_root)
         self.git_manager = GitManager(self.project_root)
         self.ai_generator = AICommitGenerator(required=False)  # 不强制要求API密钥
+        self._changes_records = ()  # (状态码, 文件路径) 记录，检查Git状态时解析一次
     
     def run(self):
         """运行发布流程"""
@@ -391,6 +413,8 @@ class ReleaseManager:
             console.print("❌ 没有发现未提交的更改", style="red")
             sys.exit(1)
         
+        self._changes_records = tuple(_parse_status_line(change) for change in changes)
+        
         console.print(f"✅ 发现 {len(changes)} 个未提交的更改", style="green")
     
     def _select_version_type(self):
@@ -442,16 +466,12 @@ class ReleaseManager:
     
     def _show_changes_preview(self):
         """显示更改预览"""
-        changes = self.git_manager.get_uncommitted_changes()
+        changes = self._changes_records
         
         console.print("\n📋 [bold]文件更改预览:[/bold]")
         
         # 限制显示数量
-        display_changes = changes[:15]
-        for change in display_changes:
-            status = change[:2]
-            file_path = change[2:].strip()
-            
+        for status, file_path in changes[:15]:
             if status.strip() == 'M':
                 console.print(f"  [yellow]📝 修改[/yellow] {file_path}")
             elif status.strip() == 'A':
@@ -466,11 +486,9 @@ class ReleaseManager:
     
     def _generate_commit_message(self, new_version):
         """生成提交信息"""
-        changes = self.git_manager.get_uncommitted_changes()
-        
         console.print("\n🤖 [bold]生成提交信息...[/bold]")
         
-        commit_message = self.ai_generator.generate_commit_message(changes, new_version)
+        commit_message = self.ai_generator.generate_commit_message(self._changes_records, new_version)
         
         # 显示生成的提交信息
         console.print("\n📝 [bold]生成的提交信息:[/bold]")
@@ -508,28 +526,26 @@ class ReleaseManager:
             console=console
         ) as progress:
             
-            # 提交更改
-            task1 = progress.add_task("📝 提交代码更改...", total=None)
+            # 提交更改（各步骤共用一个任务，只更新描述文字）
+            task = progress.add_task("📝 提交代码更改...", total=None)
             if not self.git_manager.commit_changes(commit_message):
                 console.print("❌ 代码提交失败", style="red")
                 sys.exit(1)
-            progress.remove_task(task1)
             
             # 创建标签
-            task2 = progress.add_task("🏷️  创建版本标签...", total=None)
+            progress.update(task, description="🏷️  创建版本标签...")
             tag_name = f"v{new_version}"
             tag_message = f"Release version {new_version}"
             if not self.git_manager.create_tag(tag_name, tag_message):
                 console.print("❌ 标签创建失败", style="red")
                 sys.exit(1)
-            progress.remove_task(task2)
             
             # 推送到远程
-            task3 = progress.add_task("⬆️  推送到远程仓库...", total=None)
+            progress.update(task, description="⬆️  推送到远程仓库...")
             if not self.git_manager.push_with_tags():
                 console.print("❌ 推送失败", style="red")
                 sys.exit(1)
-            progress.remove_task(task3)
+            progress.remove_task(task)
         
         # 显示成功信息
         console.print()
@@ -1,10 +1,10 @@
 """
 API包导出
 """
-from .dependencies import get_detection_service, get_app_settings
+from .dependencies import get_detection_service, get_detection_batcher, get_app_settings
 from .routes import detection_router, health_router
 
 __all__ = [
-    "get_detection_service", "get_app_settings",
+    "get_detection_service", "get_detection_batcher", "get_app_settings",
     "detection_router", "health_router"
 ]
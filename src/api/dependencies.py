@@ -1,19 +1,30 @@
 """
 FastAPI依赖注入
 """
-from functools import lru_cache
-from ..services import SensitiveWordDetectionService
+from ..services import SensitiveWordDetectionService, DetectionBatcher
 from ..core import get_settings
 
 
-# 全局服务实例缓存
-@lru_cache()
+# 全局服务实例在导入时创建，依赖函数只需返回模块全局变量
+_DETECTION_SERVICE = SensitiveWordDetectionService()
+_SETTINGS = get_settings()
+_DETECTION_BATCHER = DetectionBatcher(
+    _DETECTION_SERVICE,
+    max_batch_size=_SETTINGS.max_batch_size,
+    batch_window_ms=_SETTINGS.batch_window_ms
+)
+
+
 def get_detection_service() -> SensitiveWordDetectionService:
     """获取检测服务实例（单例）"""
-    return SensitiveWordDetectionService()
+    return _DETECTION_SERVICE
+
+
+def get_detection_batcher() -> DetectionBatcher:
+    """获取检测请求批处理器（单例，由应用lifespan启动和停止）"""
+    return _DETECTION_BATCHER
 
 
-@lru_cache()
 def get_app_settings():
     """获取应用配置（单例）"""
-    return get_settings()
+    return _SETTINGS
@@ -2,100 +2,182 @@
 更新后的主API路由
 集成新的检测服务和词库管理
 """
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import HTMLResponse
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, BackgroundTasks, Body
+from fastapi.responses import HTMLResponse, Response
 
 from ..models.detection import DetectionRequest, DetectionResponse
 from ..services.enhanced_detection_service import EnhancedDetectionService
-from ..core import get_logger
+from ..core import get_logger, get_settings
 
 logger = get_logger()
 router = APIRouter(prefix="/api", tags=["检测服务"])
 
-# 检测服务实例（单例）
-detection_service = None
+# 分类和词库配置接口的响应缓存，配置文件或词库文件修改时间变化时重建
+_categories_cache = {"mtimes": None, "payload": None}
+_wordlists_cache = {"mtimes": None, "payload": None}
 
-def get_detection_service():
-    """获取检测服务实例"""
-    global detection_service
-    if detection_service is None:
-        detection_service = EnhancedDetectionService()
-    return detection_service
+# 批量检测接口单次允许提交的最大请求数
+_MAX_BATCH_REQUESTS = 100
+
+_ADMIN_HTML_PATH = Path(__file__).parent.parent / "templates" / "wordlist_manager.html"
+
+
+def _load_admin_html() -> Optional[bytes]:
+    """读取管理界面HTML，文件不存在时返回None"""
+    try:
+        return _ADMIN_HTML_PATH.read_bytes()
+    except OSError as e:
+        logger.warning(f"管理界面文件不可用 {_ADMIN_HTML_PATH}: {e}")
+        return None
+
+
+# 管理界面在导入时读取一次，请求处理中不再访问磁盘
+_ADMIN_HTML = _load_admin_html()
+
+
+def get_detection_service(request: Request) -> EnhancedDetectionService:
+    """获取检测服务实例（由应用lifespan在启动时创建）"""
+    return request.app.state.detection_service
+
+
+# 各路由共享同一个依赖声明对象
+_DETECTION_SERVICE_DEP = Depends(get_detection_service)
 
 
 @router.post("/detect", response_model=DetectionResponse)
-async def detect_sensitive_content(request: DetectionRequest):
+async def detect_sensitive_content(
+    request: DetectionRequest,
+    service: EnhancedDetectionService = _DETECTION_SERVICE_DEP
+):
     """
     检测敏感内容
     
     这是主要的检测接口，支持多种检测模式和配置选项。
     """
     try:
-        service = get_detection_service()
         return await service.detect(request)
     except Exception as e:
         logger.error(f"检测失败: {e}")
         raise HTTPException(status_code=500, detail=f"检测失败: {str(e)}")
 
 
+@router.post("/detect/batch", response_model=List[DetectionResponse])
+async def detect_sensitive_content_batch(
+    requests: List[DetectionRequest] = Body(..., min_length=1, max_length=_MAX_BATCH_REQUESTS),
+    service: EnhancedDetectionService = _DETECTION_SERVICE_DEP
+):
+    """
+    批量检测敏感内容
+    
+    适用于评论流、日志等批量审核场景，重复文本只检测一次。
+    任一请求失败时整个批次返回错误。
+    """
+    outcomes = await service.detect_batch(requests)
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            logger.error(f"批量检测失败: {outcome}")
+            raise HTTPException(status_code=500, detail=str(outcome))
+    return outcomes
+
+
 @router.get("/health")
-async def health_check():
+async def health_check(service: EnhancedDetectionService = _DETECTION_SERVICE_DEP):
     """
     健康检查
     
     返回服务状态和统计信息。
     """
     try:
-        service = get_detection_service()
         return await service.health_check()
     except Exception as e:
         logger.error(f"健康检查失败: {e}")
         raise HTTPException(status_code=500, detail="服务不可用")
 
 
+# 最近一次后台重新加载的结果
+_reload_status = {
+    "rules": {"running": False, "completed_at": None, "success": None, "error": None},
+    "wordlists": {"running": False, "completed_at": None, "success": None, "error": None},
+}
+
+
+async def _run_reload(kind: str, reload_func: Callable[[], Awaitable[None]]):
+    """执行重新加载并记录结果（规则构建在工作线程中进行，不阻塞事件循环）"""
+    status = _reload_status[kind]
+    try:
+        await reload_func()
+        status.update(success=True, error=None)
+    except Exception as e:
+        logger.error(f"重新加载{kind}失败: {e}")
+        status.update(success=False, error=str(e))
+    finally:
+        status.update(running=False, completed_at=datetime.now().isoformat())
+
+
+def _schedule_reload(kind: str, reload_func: Callable[[], Awaitable[None]], background_tasks: BackgroundTasks):
+    """将重新加载任务放入后台执行；同类重新加载尚未完成时拒绝新的请求"""
+    status = _reload_status[kind]
+    if status["running"]:
+        raise HTTPException(status_code=409, detail="重新加载正在进行，请通过 /api/reload/status 查询结果")
+    status["running"] = True
+    background_tasks.add_task(_run_reload, kind, reload_func)
+
+
 @router.post("/reload/rules")
-async def reload_rules():
+async def reload_rules(
+    background_tasks: BackgroundTasks,
+    service: EnhancedDetectionService = _DETECTION_SERVICE_DEP
+):
     """
     重新加载检测规则
     
-    用于在运行时更新检测规则配置。
+    用于在运行时更新检测规则配置。重新加载在后台执行，结果通过 /api/reload/status 查询。
     """
-    try:
-        service = get_detection_service()
-        service.reload_rules()
-        return {"success": True, "message": "检测规则重新加载成功"}
-    except Exception as e:
-        logger.error(f"重新加载规则失败: {e}")
-        raise HTTPException(status_code=500, detail=f"重新加载失败: {str(e)}")
+    _schedule_reload("rules", service.reload_rules, background_tasks)
+    return {"success": True, "message": "检测规则重新加载已开始"}
 
 
 @router.post("/reload/wordlists")
-async def reload_wordlists():
+async def reload_wordlists(
+    background_tasks: BackgroundTasks,
+    service: EnhancedDetectionService = _DETECTION_SERVICE_DEP
+):
     """
     重新加载词库
     
-    用于在运行时更新词库内容。
+    用于在运行时更新词库内容。重新加载在后台执行，结果通过 /api/reload/status 查询。
     """
-    try:
-        service = get_detection_service()
-        service.reload_wordlists()
-        return {"success": True, "message": "词库重新加载成功"}
-    except Exception as e:
-        logger.error(f"重新加载词库失败: {e}")
-        raise HTTPException(status_code=500, detail=f"重新加载失败: {str(e)}")
+    _schedule_reload("wordlists", service.reload_wordlists, background_tasks)
+    return {"success": True, "message": "词库重新加载已开始"}
+
+
+@router.get("/reload/status")
+async def reload_status():
+    """
+    重新加载状态
+    
+    返回最近一次规则和词库重新加载的完成时间及结果。
+    """
+    return {"success": True, "status": _reload_status}
 
 
 @router.get("/config/categories")
-async def get_categories():
+async def get_categories(service: EnhancedDetectionService = _DETECTION_SERVICE_DEP):
     """
     获取所有可用的敏感词分类
     
     从YAML配置文件中读取分类信息，用于前端动态渲染分类选择器。
     """
     try:
-        service = get_detection_service()
         # 从配置读取器获取分类信息
         config_reader = service.config_reader
+        mtimes = config_reader.get_wordlist_mtimes()
+        if _categories_cache["mtimes"] == mtimes:
+            return _categories_cache["payload"]
+        
         wordlists = config_reader.get_all_wordlists()
         
         # 提取分类信息
@@ -105,41 +187,45 @@ async def get_categories():
                 categories.append({
                     "name": wordlist.name,
                     "description": wordlist.description,
-                    "word_count": len(config_reader.load_words(wordlist.name))
+                    "word_count": config_reader.word_count(wordlist.name)
                 })
         
-        return {
+        payload = {
             "success": True,
             "categories": categories,
             "total_categories": len(categories)
         }
+        _categories_cache.update(mtimes=mtimes, payload=payload)
+        return payload
     except Exception as e:
         logger.error(f"获取分类失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取分类失败: {str(e)}")
 
 
 @router.get("/config/wordlists")
-async def get_wordlists_config():
+async def get_wordlists_config(service: EnhancedDetectionService = _DETECTION_SERVICE_DEP):
     """
     获取词库配置信息
     
     返回完整的词库配置，包括启用状态、文件路径等。
     """
     try:
-        service = get_detection_service()
         config_reader = service.config_reader
+        mtimes = config_reader.get_wordlist_mtimes()
+        if _wordlists_cache["mtimes"] == mtimes:
+            return _wordlists_cache["payload"]
+        
         wordlists = config_reader.get_all_wordlists()
         
         wordlists_info = []
         for wordlist in wordlists:
             try:
-                words = config_reader.load_words(wordlist.name)
                 wordlists_info.append({
                     "name": wordlist.name,
                     "description": wordlist.description,
                     "file": wordlist.file,
                     "enabled": wordlist.enabled,
-                    "word_count": len(words)
+                    "word_count": config_reader.word_count(wordlist.name)
                 })
             except Exception as e:
                 logger.warning(f"无法加载词库 {wordlist.name}: {e}")
@@ -152,11 +238,13 @@ async def get_wordlists_config():
                     "error": str(e)
                 })
         
-        return {
+        payload = {
             "success": True,
             "wordlists": wordlists_info,
             "total_wordlists": len(wordlists_info)
         }
+        _wordlists_cache.update(mtimes=mtimes, payload=payload)
+        return payload
     except Exception as e:
         logger.error(f"获取词库配置失败: {e}")
         raise HTTPException(status_code=500, detail=f"获取词库配置失败: {str(e)}")
@@ -166,5 +254,8 @@ async def get_wordlists_config():
 @router.get("/", response_class=HTMLResponse)
 async def admin_interface():
     """管理界面首页"""
-    with open("src/templates/wordlist_manager.html", "r", encoding="utf-8") as f:
-        return f.read()
+    # 调试模式下每次重新读取，便于修改页面后直接刷新
+    content = _load_admin_html() if get_settings().debug else _ADMIN_HTML
+    if content is None:
+        raise HTTPException(status_code=404, detail="管理界面不存在")
+    return Response(content=content, media_type="text/html; charset=utf-8")
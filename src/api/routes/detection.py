@@ -1,64 +1,88 @@
 """
 检测相关API路由
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Request
+from fastapi.responses import Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError as PydanticValidationError
 from typing import Dict, Any
 
 from ...models import DetectionRequest, DetectionResponse
-from ...services import SensitiveWordDetectionService
-from ...core import get_logger, DetectionError, ValidationError
-from ..dependencies import get_detection_service
+from ...core import get_logger
+from ..dependencies import get_detection_batcher
 
 logger = get_logger()
 router = APIRouter(prefix="/detect", tags=["检测"])
 
+# 批处理器是进程内单例，直接绑定到模块变量，省去每个请求的Depends解析
+_batcher = get_detection_batcher()
+
+
+def _inline_schema(model) -> Dict[str, Any]:
+    """生成模型的JSON Schema并内联$defs引用，用于在OpenAPI文档中描述原始请求体"""
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+    
+    def resolve(node):
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if ref:
+                return resolve(defs[ref.rsplit("/", 1)[-1]])
+            return {key: resolve(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [resolve(value) for value in node]
+        return node
+    
+    return resolve(schema)
+
+
+_DETECTION_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": _inline_schema(DetectionRequest)}}
+    }
+}
+
 
 @router.post(
     "/",
-    response_model=DetectionResponse,
+    response_model=None,
+    responses={200: {"model": DetectionResponse}},
     summary="敏感词检测",
-    description="对输入文本进行敏感词检测，支持规则匹配和语义检测"
+    description="对输入文本进行敏感词检测，支持规则匹配和语义检测",
+    openapi_extra=_DETECTION_REQUEST_BODY
 )
 async def detect_sensitive_content(
-    request: DetectionRequest,
-    service: SensitiveWordDetectionService = Depends(get_detection_service)
-) -> DetectionResponse:
+    http_request: Request
+) -> Response:
     """
     敏感词检测接口
     
+    请求体直接由pydantic-core从原始JSON字节解析校验为DetectionRequest，
+    省去FastAPI先json.loads再逐字段校验dict的两遍处理。
+    服务返回的DetectionResponse已是校验过的模型，直接序列化输出，不再经过response_model二次校验。
+    
     Args:
-        request: 检测请求
-        service: 检测服务
+        http_request: 原始HTTP请求，请求体为DetectionRequest的JSON
         
     Returns:
-        检测结果
+        检测结果（DetectionResponse的JSON）
         
     Raises:
-        HTTPException: 当检测失败时
+        RequestValidationError: 请求体校验失败时
+        DetectionError: 当检测失败时
     """
     try:
-        logger.info(f"收到检测请求，文本长度: {len(request.text)}")
-        
-        # 执行检测
-        response = await service.detect(request)
-        
-        return response
-        
-    except ValidationError as e:
-        logger.warning(f"请求参数验证失败: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=f"请求参数无效: {e.message}"
-        )
-    except DetectionError as e:
-        logger.error(f"检测过程出错: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"检测失败: {e.message}"
-        )
-    except Exception as e:
-        logger.error(f"未知错误: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="服务内部错误"
-        )
+        request = DetectionRequest.model_validate_json(await http_request.body())
+    except PydanticValidationError as e:
+        # 与FastAPI默认的请求体校验错误保持一致的loc格式
+        raise RequestValidationError([
+            {**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)
+        ])
+    
+    logger.info(f"收到检测请求，文本长度: {len(request.text)}")
+    
+    # 执行检测；ValidationError/DetectionError由应用级异常处理器转换为响应
+    # 并发请求由批处理器合并为一次批量检测
+    response = await _batcher.detect(request)
+    return Response(content=response.model_dump_json(), media_type="application/json")
@@ -1,8 +1,10 @@
 """
 健康检查API路由
 """
-from fastapi import APIRouter, Depends
-from typing import Dict, Any
+import time
+from fastapi import APIRouter
+from fastapi.responses import Response
+from typing import Dict, Any, Optional
 
 from ...models import HealthResponse
 from ...services import SensitiveWordDetectionService
@@ -12,6 +14,29 @@ from ..dependencies import get_detection_service, get_app_settings
 logger = get_logger()
 router = APIRouter(prefix="/health", tags=["健康检查"])
 
+# 版本号和检测服务在进程内不变，直接绑定到模块变量，省去每次探测的Depends解析
+_APP_VERSION = get_app_settings().app_version
+_service: SensitiveWordDetectionService = get_detection_service()
+
+# 存活检查响应体固定不变，预先序列化
+_ALIVE_BODY = b'{"status":"alive"}'
+
+# 组件状态按秒缓存：同一秒内的多次探测复用上一次的检查结果
+_health_cache: Dict[str, Any] = {"bucket": None, "data": None}
+
+
+async def _get_health_data(service: SensitiveWordDetectionService) -> Dict[str, Any]:
+    """获取服务健康状态，组件状态1秒内复用，运行时长每次重新计算"""
+    bucket = int(time.monotonic())
+    data: Optional[Dict[str, Any]] = _health_cache["data"]
+    
+    if data is None or _health_cache["bucket"] != bucket:
+        data = await service.health_check()
+        _health_cache["bucket"] = bucket
+        _health_cache["data"] = data
+    
+    return {**data, "uptime_seconds": int(time.time() - service.start_time)}
+
 
 @router.get(
     "/",
@@ -19,23 +44,16 @@ router = APIRouter(prefix="/health", tags=["健康检查"])
     summary="健康检查",
     description="检查服务运行状态和各组件健康状况"
 )
-async def health_check(
-    service: SensitiveWordDetectionService = Depends(get_detection_service),
-    settings = Depends(get_app_settings)
-) -> HealthResponse:
+async def health_check() -> HealthResponse:
     """
     健康检查接口
     
-    Args:
-        service: 检测服务
-        settings: 应用配置
-        
     Returns:
         健康状态信息
     """
     try:
         # 获取服务健康状态
-        health_data = await service.health_check()
+        health_data = await _get_health_data(_service)
         
         response = HealthResponse(
             status=health_data["status"],
@@ -53,7 +71,7 @@ async def health_check(
         # 返回错误状态但不抛出异常
         return HealthResponse(
             status="unhealthy",
-            version=settings.app_version,
+            version=_APP_VERSION,
             uptime_seconds=0,
             components={},
             success=False,
@@ -66,20 +84,15 @@ async def health_check(
     summary="就绪检查", 
     description="检查服务是否已准备好接收请求"
 )
-async def readiness_check(
-    service: SensitiveWordDetectionService = Depends(get_detection_service)
-) -> Dict[str, Any]:
+async def readiness_check() -> Dict[str, Any]:
     """
     就绪检查接口（用于k8s readiness probe）
     
-    Args:
-        service: 检测服务
-        
     Returns:
         就绪状态
     """
     try:
-        health_data = await service.health_check()
+        health_data = await _get_health_data(_service)
         components = health_data.get("components", {})
         
         # 检查关键组件是否就绪
@@ -100,11 +113,11 @@ async def readiness_check(
     summary="存活检查",
     description="检查服务进程是否存活"
 )
-async def liveness_check() -> Dict[str, str]:
+async def liveness_check() -> Response:
     """
     存活检查接口（用于k8s liveness probe）
     
     Returns:
-        存活状态
+        存活状态（预序列化的JSON）
     """
-    return {"status": "alive"}
+    return Response(content=_ALIVE_BODY, media_type="application/json")
@@ -1,7 +1,7 @@
 """
 核心包导出
 """
-from .config import Settings, get_settings
+from .config import Settings, get_settings, get_server_io_options
 from .exceptions import (
     VeriTextBaseException, ConfigurationError, WordListError,
     DetectionError, ValidationError,
@@ -10,7 +10,7 @@ from .exceptions import (
 from .logging import get_logger
 
 __all__ = [
-    "Settings", "get_settings",
+    "Settings", "get_settings", "get_server_io_options",
     "VeriTextBaseException", "ConfigurationError", "WordListError",
     "DetectionError", "ValidationError",
     "ResourceNotFoundError", "ServiceUnavailableError", "RateLimitError",
@@ -2,6 +2,7 @@
 应用配置管理
 """
 import os
+import sys
 import argparse
 from typing import List, Dict, Any, Optional
 from pydantic import Field
@@ -17,13 +18,15 @@ def parse_args() -> argparse.Namespace:
 示例用法:
   python -m src.main --port 8080 --host 0.0.0.0 --debug
   python -m src.main --port 9000 --workers 4 --log-level DEBUG
+
+环境变量 PRODUCTION=true 时跳过命令行参数解析，只使用 VERI_TEXT_* 环境变量
         """
     )
     
     # 服务配置
     parser.add_argument("--host", type=str, help="监听地址 (默认: 127.0.0.1)")
     parser.add_argument("--port", type=int, help="监听端口 (默认: 18085)")
-    parser.add_argument("--workers", type=int, help="工作进程数 (默认: 1)")
+    parser.add_argument("--workers", type=int, help="工作进程数，大于1时通过Gunicorn启动 (默认: 2*CPU+1)")
     parser.add_argument("--debug", action="store_true", help="启用调试模式")
     
     # API配置
@@ -53,6 +56,23 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+def _should_parse_cli() -> bool:
+    """是否需要解析命令行参数：Gunicorn/Uvicorn启动或无命令行参数的非交互启动时跳过"""
+    if 'gunicorn' in sys.modules or os.getenv('PRODUCTION', 'false').lower() == 'true':
+        return False
+    
+    # 由uvicorn/gunicorn命令启动时，argv中是服务器自身的参数
+    if sys.argv and os.path.basename(sys.argv[0]).endswith(('uvicorn', 'gunicorn')):
+        return False
+    
+    # 非交互环境（如容器、进程管理器）且未传入参数时，无需构建argparse
+    stdin_is_tty = sys.stdin is not None and sys.stdin.isatty()
+    if not stdin_is_tty and len(sys.argv) <= 1:
+        return False
+    
+    return True
+
+
 class Settings(BaseSettings):
     """应用配置"""
     
@@ -64,7 +84,7 @@ class Settings(BaseSettings):
     # 服务配置
     host: str = Field(default="127.0.0.1", description="监听地址")
     port: int = Field(default=18085, description="监听端口")
-    workers: int = Field(default=1, description="工作进程数")
+    workers: int = Field(default_factory=lambda: (os.cpu_count() or 1) * 2 + 1, description="工作进程数")
     
     # API配置
     api_prefix: str = Field(default="/api/v1", description="API前缀")
@@ -83,6 +103,9 @@ class Settings(BaseSettings):
     # 性能配置
     max_concurrent_requests: int = Field(default=100, description="最大并发请求数")
     request_timeout: int = Field(default=30, description="请求超时时间（秒）")
+    max_batch_size: int = Field(default=32, description="检测请求微批处理的单批最大请求数（小于等于1时关闭）")
+    batch_window_ms: int = Field(default=5, description="检测请求微批处理的收集窗口（毫秒）")
+    detection_cache_size: int = Field(default=1024, description="检测响应LRU缓存条目数（0表示关闭）")
     
     # 数据路径配置
     data_dir: str = Field(default="data", description="数据目录")
@@ -95,12 +118,8 @@ class Settings(BaseSettings):
     log_file: str = Field(default="", description="日志文件路径")
     
     def __init__(self, **kwargs):
-        # 检查是否在生产环境（Gunicorn环境）
-        import sys
-        is_gunicorn = 'gunicorn' in sys.modules or os.getenv('PRODUCTION', 'false').lower() == 'true'
-        
-        if is_gunicorn:
-            # 生产环境：只使用环境变量，跳过命令行解析
+        if not _should_parse_cli():
+            # 生产环境/服务器启动：只使用环境变量，跳过命令行解析
             cli_config = {}
         else:
             # 开发环境：从命令行参数中获取值
@@ -124,16 +143,30 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
-# 全局配置实例（延迟初始化）
-_settings: Optional[Settings] = None
+# 全局配置实例：导入时创建，之后只读，Gunicorn fork后各进程共享同一份副本
+SETTINGS = Settings()
 
 
 def get_settings() -> Settings:
-    """获取应用配置（单例模式）"""
-    global _settings
-    if _settings is None:
-        _settings = Settings()
-    return _settings
+    """获取应用配置（单例）"""
+    return SETTINGS
+
+
+def get_server_io_options() -> Dict[str, str]:
+    """uvicorn事件循环与HTTP解析器选项：优先uvloop+httptools，缺失时退回纯Python实现"""
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+    
+    return {"loop": loop, "http": http}
 
 
 def create_settings(**kwargs) -> Settings:
@@ -1,14 +1,27 @@
 """
 日志配置
 """
+import json
 import logging
 import sys
+import time
 from typing import Dict, Any
-from datetime import datetime
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson为可选加速依赖
+    orjson = None
 
 from .config import get_settings
 
 
+def _dumps(log_entry: Dict[str, Any]) -> str:
+    """序列化日志记录，优先使用orjson"""
+    if orjson is not None:
+        return orjson.dumps(log_entry, default=str).decode()
+    return json.dumps(log_entry, ensure_ascii=False, default=str)
+
+
 def setup_logging() -> logging.Logger:
     """设置日志配置"""
     settings = get_settings()
@@ -47,10 +60,11 @@ class JsonFormatter(logging.Formatter):
     """JSON格式的日志格式化器"""
     
     def format(self, record: logging.LogRecord) -> str:
-        import json
+        # 直接使用记录创建时间，避免每条日志构造datetime对象
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z"
         
         log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": timestamp,
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -69,7 +83,7 @@ class JsonFormatter(logging.Formatter):
         if record.exc_info:
             log_entry["exception"] = self.formatException(record.exc_info)
         
-        return json.dumps(log_entry, ensure_ascii=False)
+        return _dumps(log_entry)
 
 
 # 全局logger实例
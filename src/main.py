@@ -1,32 +1,68 @@
 """
 FastAPI应用主入口
 """
+import logging
+import os
+import shutil
+import sys
 import uvicorn
 from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from jinja2 import TemplateNotFound
 import time
 import uuid
+from typing import Dict, Optional, Tuple
 
-from .core import get_settings, get_logger, VeriTextBaseException
-from .api import detection_router, health_router, get_detection_service
+from .core import (
+    get_settings, get_server_io_options, get_logger,
+    VeriTextBaseException, ValidationError, DetectionError
+)
+from .api import detection_router, health_router, get_detection_batcher
+from .services.enhanced_detection_service import EnhancedDetectionService
 
 # 获取配置和日志
 settings = get_settings()
 logger = get_logger()
 
+# 日志级别在运行期间基本不变，启动时确定是否记录每个请求的INFO日志
+_LOG_INFO_ON = logger.isEnabledFor(logging.INFO)
+
 # 设置路径
 BASE_DIR = Path(__file__).parent
 STATIC_DIR = BASE_DIR / "static"
 TEMPLATES_DIR = BASE_DIR / "templates"
+GUNICORN_CONF = BASE_DIR.parent / "gunicorn.conf.py"
 
 # 模板引擎
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
+# 检测界面模板缺失时的备用页面
+_FALLBACK_INDEX_HTML = """
+            <html>
+                <head><title>敏感词检测服务</title></head>
+                <body>
+                    <h1>敏感词检测服务</h1>
+                    <p>Web界面暂不可用，请直接使用API接口。</p>
+                    <p>API文档: <a href="/docs">/docs</a></p>
+                </body>
+            </html>
+            """.encode("utf-8")
+
+
+def _render_index_html() -> bytes:
+    """渲染检测界面（模板不依赖请求上下文，启动时渲染一次即可）"""
+    try:
+        return templates.get_template("detector.html").render().encode("utf-8")
+    except TemplateNotFound:
+        logger.error("检测界面模板文件不存在")
+        return _FALLBACK_INDEX_HTML
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -35,10 +71,16 @@ async def lifespan(app: FastAPI):
     logger.info("正在启动敏感词检测服务...")
     
     try:
-        # 预加载检测服务（触发词库和模型加载）
-        detection_service = get_detection_service()
+        # 主API路由（配置和管理接口）通过app.state读取增强检测服务
+        app.state.detection_service = EnhancedDetectionService()
         logger.info("检测服务预加载完成")
         
+        # 预先渲染检测界面
+        app.state.index_html = _render_index_html()
+        
+        # 启动检测请求微批处理
+        await get_detection_batcher().start()
+        
         logger.info(f"敏感词检测服务启动成功，版本: {settings.app_version}")
         yield
         
@@ -48,6 +90,7 @@ async def lifespan(app: FastAPI):
     finally:
         # 关闭时清理
         logger.info("敏感词检测服务正在关闭...")
+        await get_detection_batcher().stop()
 
 
 # 创建FastAPI应用
@@ -57,6 +100,7 @@ app = FastAPI(
     description="高性能敏感词检测API服务，支持规则匹配和语义检测",
     docs_url=settings.docs_url if not settings.debug else settings.docs_url,
     openapi_url=settings.openapi_url,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -69,45 +113,62 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 响应压缩：level 1 CPU开销低，对HTML/JS/CSS和较大的检测结果JSON仍有明显压缩效果
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
+
 
 # 请求ID中间件
 @app.middleware("http")
 async def add_request_id(request: Request, call_next):
     """为每个请求添加唯一ID"""
-    request_id = str(uuid.uuid4())
+    # hex形式省去带连字符的格式化
+    request_id = uuid.uuid4().hex
     request.state.request_id = request_id
     
-    start_time = time.time()
+    start_time = time.perf_counter()
     
     # 处理请求
     response = await call_next(request)
     
     # 添加响应头
-    process_time = time.time() - start_time
+    process_time = time.perf_counter() - start_time
     response.headers["X-Request-ID"] = request_id
     response.headers["X-Process-Time"] = str(process_time)
     
-    # 记录请求日志
-    logger.info(
-        f"请求处理完成",
-        extra={
-            "request_id": request_id,
-            "method": request.method,
-            "url": str(request.url),
-            "status_code": response.status_code,
-            "process_time": process_time
-        }
-    )
+    # 记录请求日志（INFO未开启时跳过extra构造和格式化）
+    if _LOG_INFO_ON:
+        logger.info(
+            "请求处理完成",
+            extra={
+                "request_id": request_id,
+                "method": request.method,
+                "url": str(request.url),
+                "status_code": response.status_code,
+                "process_time": process_time
+            }
+        )
     
     return response
 
 
+# 业务异常类型 -> (HTTP状态码, 消息前缀)，未列出的类型按400处理
+_EXCEPTION_STATUS: Dict[type, Tuple[int, Optional[str]]] = {
+    ValidationError: (422, "请求参数无效"),
+    DetectionError: (500, "检测失败"),
+}
+_DEFAULT_EXCEPTION_STATUS: Tuple[int, Optional[str]] = (400, None)
+
+
 # 全局异常处理器
 @app.exception_handler(VeriTextBaseException)
 async def veri_text_exception_handler(request: Request, exc: VeriTextBaseException):
-    """处理自定义异常"""
-    logger.error(
-        f"业务异常: {exc.message}",
+    """处理自定义异常，按异常类型查表得到状态码"""
+    status_code, prefix = _EXCEPTION_STATUS.get(type(exc), _DEFAULT_EXCEPTION_STATUS)
+    message = f"{prefix}: {exc.message}" if prefix else exc.message
+    
+    log = logger.error if status_code >= 500 else logger.warning
+    log(
+        f"业务异常: {message}",
         extra={
             "request_id": getattr(request.state, "request_id", "unknown"),
             "error_code": exc.error_code,
@@ -115,11 +176,11 @@ async def veri_text_exception_handler(request: Request, exc: VeriTextBaseExcepti
         }
     )
     
-    return JSONResponse(
-        status_code=400,
+    return ORJSONResponse(
+        status_code=status_code,
         content={
             "success": False,
-            "message": exc.message,
+            "message": message,
             "error_code": exc.error_code,
             "details": exc.details,
             "request_id": getattr(request.state, "request_id", "unknown")
@@ -138,7 +199,7 @@ async def general_exception_handler(request: Request, exc: Exception):
         exc_info=True
     )
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "success": False,
@@ -163,37 +224,59 @@ app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 # Web界面路由
 @app.get("/", response_class=HTMLResponse, summary="敏感词检测界面")
 async def web_interface(request: Request):
-    """提供敏感词检测Web界面"""
-    try:
-        return templates.TemplateResponse("detector.html", {"request": request})
-    except FileNotFoundError:
-        logger.error("检测界面模板文件不存在")
-        return HTMLResponse(
-            content="""
-            <html>
-                <head><title>敏感词检测服务</title></head>
-                <body>
-                    <h1>敏感词检测服务</h1>
-                    <p>Web界面暂不可用，请直接使用API接口。</p>
-                    <p>API文档: <a href="/docs">/docs</a></p>
-                </body>
-            </html>
-            """,
-            status_code=200
-        )
+    """提供敏感词检测Web界面（返回启动时渲染好的页面）"""
+    index_html = getattr(request.app.state, "index_html", None)
+    if index_html is None:
+        # 未经过lifespan启动（如直接挂载测试）时按需渲染并缓存
+        index_html = request.app.state.index_html = _render_index_html()
+    return HTMLResponse(content=index_html)
+
+
+# API服务信息只依赖启动时的配置，构建一次后复用
+_API_INFO = {
+    "service": settings.app_name,
+    "version": settings.app_version,
+    "status": "running",
+    "docs_url": settings.docs_url,
+    "api_prefix": settings.api_prefix
+}
 
 
 # API信息路由
 @app.get("/api", summary="API服务信息")
 async def api_info():
     """API服务信息"""
-    return {
-        "service": settings.app_name,
-        "version": settings.app_version,
-        "status": "running",
-        "docs_url": settings.docs_url,
-        "api_prefix": settings.api_prefix
-    }
+    return _API_INFO
+
+
+def _settings_env(settings) -> Dict[str, str]:
+    """把当前配置（含命令行参数）导出为环境变量，Gunicorn worker中跳过命令行解析时仍能得到相同配置"""
+    env = dict(os.environ)
+    for name, value in settings.model_dump().items():
+        env[f"{settings.model_config.get('env_prefix', '')}{name}".upper()] = str(value)
+    # worker进程只从环境变量读取配置
+    env["PRODUCTION"] = "true"
+    return env
+
+
+def _exec_gunicorn(settings) -> None:
+    """多进程模式下以Gunicorn + UvicornWorker替换当前进程；Gunicorn不可用时直接返回"""
+    gunicorn = shutil.which("gunicorn")
+    if gunicorn is None or sys.platform == "win32":
+        return
+    
+    command = [
+        gunicorn,
+        "--config", str(GUNICORN_CONF),
+        "--workers", str(settings.workers),
+        "--bind", f"{settings.host}:{settings.port}",
+        "--log-level", settings.log_level.lower(),
+        "src.main:app"
+    ]
+    # exec替换进程，信号直接送达Gunicorn master；exec前先刷出已打印的启动信息
+    sys.stdout.flush()
+    os.chdir(BASE_DIR.parent)
+    os.execve(gunicorn, command, _settings_env(settings))
 
 
 # 命令行启动
@@ -207,13 +290,19 @@ def main():
     print(f"调试模式: {'开启' if settings.debug else '关闭'}")
     print("-" * 50)
     
+    if settings.workers > 1 and not settings.debug:
+        _exec_gunicorn(settings)
+    
+    # 使用导入路径启动，workers>1时uvicorn才会真正fork多个进程；请求日志已由中间件记录，关闭access log
     uvicorn.run(
         "src.main:app",
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
         workers=1 if settings.debug else settings.workers,
-        log_level=settings.log_level.lower()
+        access_log=False,
+        log_level=settings.log_level.lower(),
+        **get_server_io_options()
     )
 
 
@@ -2,14 +2,18 @@
 更新后的主应用入口
 集成新的检测服务和管理界面
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import uvicorn
 from pathlib import Path
 
-from .core import get_settings, get_logger
+from .core import get_settings, get_server_io_options, get_logger
 from .api.main_api import router as main_router
+from .services.enhanced_detection_service import EnhancedDetectionService
 from .api.wordlist_api import router as wordlist_router
 from .utils.init_app import init_application
 
@@ -18,6 +22,29 @@ settings = get_settings()
 logger = get_logger()
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期管理"""
+    logger.info(f"启动 {settings.app_name} v{settings.app_version}")
+    logger.info(f"服务地址: http://{settings.host}:{settings.port}")
+    logger.info(f"管理界面: http://{settings.host}:{settings.port}/api/")
+    if settings.debug:
+        logger.info(f"API文档: http://{settings.host}:{settings.port}{settings.docs_url}")
+    
+    # 初始化应用数据（仅在首次启动时）
+    try:
+        init_application()
+    except Exception as e:
+        logger.warning(f"应用初始化出现问题（可能已初始化过）: {e}")
+    
+    # 启动时创建唯一的检测服务实例，请求通过依赖注入读取
+    app.state.detection_service = EnhancedDetectionService()
+    
+    yield
+    
+    logger.info("应用正在关闭...")
+
+
 def create_app() -> FastAPI:
     """创建FastAPI应用"""
     
@@ -28,6 +55,8 @@ def create_app() -> FastAPI:
         description="基于多规则引擎的敏感词检测服务",
         docs_url=settings.docs_url if settings.debug else None,
         openapi_url=settings.openapi_url if settings.debug else None,
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan
     )
     
     # CORS中间件
@@ -39,6 +68,9 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
+    # 响应压缩：level 1 CPU开销低，对HTML/JS/CSS和较大的JSON仍有明显压缩效果
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
+    
     # 静态文件服务
     static_path = Path(__file__).parent / "static"
     if static_path.exists():
@@ -48,45 +80,23 @@ def create_app() -> FastAPI:
     app.include_router(main_router)
     app.include_router(wordlist_router)
     
-    # 应用启动事件
-    @app.on_event("startup")
-    async def startup_event():
-        """应用启动时执行"""
-        logger.info(f"启动 {settings.app_name} v{settings.app_version}")
-        logger.info(f"服务地址: http://{settings.host}:{settings.port}")
-        logger.info(f"管理界面: http://{settings.host}:{settings.port}/api/")
-        if settings.debug:
-            logger.info(f"API文档: http://{settings.host}:{settings.port}{settings.docs_url}")
-        
-        # 初始化应用数据（仅在首次启动时）
-        try:
-            init_application()
-        except Exception as e:
-            logger.warning(f"应用初始化出现问题（可能已初始化过）: {e}")
-    
-    @app.on_event("shutdown")
-    async def shutdown_event():
-        """应用关闭时执行"""
-        logger.info("应用正在关闭...")
-    
     return app
 
 
 def main():
     """主函数"""
     try:
-        # 创建应用
-        app = create_app()
-        
-        # 启动服务
+        # 以工厂导入路径启动：传入app对象时uvicorn会忽略workers和reload
         uvicorn.run(
-            app,
+            "src.main_updated:create_app",
+            factory=True,
             host=settings.host,
             port=settings.port,
             workers=settings.workers if not settings.debug else 1,
             reload=settings.debug,
             log_level=settings.log_level.lower(),
-            access_log=settings.debug
+            access_log=settings.debug,
+            **get_server_io_options()
         )
         
     except Exception as e:
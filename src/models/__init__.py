@@ -3,7 +3,9 @@
 """
 from .common import (
     DetectionMode, StrictnessLevel,
-    MatchType, DetectionMethod, RiskLevel, Position, BaseResponse
+    MatchType, DetectionMethod, RiskLevel, Position, BaseResponse,
+    DetectionModeValue, StrictnessLevelValue, MatchTypeValue,
+    DetectionMethodValue, RiskLevelValue
 )
 from .detection import (
     DetectionConfig, DetectionRequest, DetectionResultItem,
@@ -18,6 +20,8 @@ __all__ = [
     # Common models
     "DetectionMode", "StrictnessLevel",
     "MatchType", "DetectionMethod", "RiskLevel", "Position", "BaseResponse",
+    "DetectionModeValue", "StrictnessLevelValue", "MatchTypeValue",
+    "DetectionMethodValue", "RiskLevelValue",
     
     # Detection models
     "DetectionConfig", "DetectionRequest", "DetectionResultItem",
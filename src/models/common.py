@@ -1,42 +1,51 @@
 """
 通用数据模型
 """
-from enum import Enum
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
 
-class DetectionMode(str, Enum):
+# 模型字段使用Literal类型，由pydantic-core直接校验字符串取值；
+# 同名类只作为取值常量的命名空间，供内部代码比较和赋值使用
+DetectionModeValue = Literal["rule", "hybrid"]
+StrictnessLevelValue = Literal["loose", "standard", "strict", "custom"]
+MatchTypeValue = Literal["exact", "fuzzy", "regex"]
+DetectionMethodValue = Literal["rule"]
+RiskLevelValue = Literal["low", "medium", "high", "critical"]
+
+
+class DetectionMode:
     """检测模式"""
-    RULE = "rule"
-    HYBRID = "hybrid"
+    RULE: DetectionModeValue = "rule"
+    HYBRID: DetectionModeValue = "hybrid"
 
 
-class StrictnessLevel(str, Enum):
+class StrictnessLevel:
     """检测严格程度"""
-    LOOSE = "loose"
-    STANDARD = "standard"
-    STRICT = "strict"
-    CUSTOM = "custom"
+    LOOSE: StrictnessLevelValue = "loose"
+    STANDARD: StrictnessLevelValue = "standard"
+    STRICT: StrictnessLevelValue = "strict"
+    CUSTOM: StrictnessLevelValue = "custom"
 
 
-class MatchType(str, Enum):
+class MatchType:
     """匹配类型"""
-    EXACT = "exact"
-    FUZZY = "fuzzy"
+    EXACT: MatchTypeValue = "exact"
+    FUZZY: MatchTypeValue = "fuzzy"
+    REGEX: MatchTypeValue = "regex"
 
 
-class DetectionMethod(str, Enum):
+class DetectionMethod:
     """检测方法"""
-    RULE = "rule"
+    RULE: DetectionMethodValue = "rule"
 
 
-class RiskLevel(str, Enum):
+class RiskLevel:
     """风险等级"""
-    LOW = "low"
-    MEDIUM = "medium"
-    HIGH = "high"
-    CRITICAL = "critical"
+    LOW: RiskLevelValue = "low"
+    MEDIUM: RiskLevelValue = "medium"
+    HIGH: RiskLevelValue = "high"
+    CRITICAL: RiskLevelValue = "critical"
 
 
 class Position(BaseModel):
@@ -5,15 +5,16 @@ from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 
 from .common import (
-    DetectionMode, StrictnessLevel, 
-    MatchType, DetectionMethod, RiskLevel, Position, BaseResponse
+    DetectionMode, StrictnessLevel,
+    DetectionModeValue, StrictnessLevelValue, MatchTypeValue,
+    DetectionMethodValue, RiskLevelValue, Position, BaseResponse
 )
 
 
 class DetectionConfig(BaseModel):
     """检测配置模型"""
-    detection_mode: DetectionMode = Field(default=DetectionMode.HYBRID, description="检测模式")
-    strictness_level: StrictnessLevel = Field(default=StrictnessLevel.STANDARD, description="严格程度")
+    detection_mode: DetectionModeValue = Field(default=DetectionMode.HYBRID, description="检测模式")
+    strictness_level: StrictnessLevelValue = Field(default=StrictnessLevel.STANDARD, description="严格程度")
     categories: List[str] = Field(default=[], description="检测的敏感词分类，空列表表示全部")
     return_positions: bool = Field(default=True, description="是否返回敏感词位置")
     return_suggestions: bool = Field(default=False, description="是否返回替换建议")
@@ -30,10 +31,10 @@ class DetectionResultItem(BaseModel):
     """检测结果项模型"""
     matched_word: str = Field(..., description="匹配到的敏感词")
     category: str = Field(..., description="敏感词分类")
-    match_type: MatchType = Field(..., description="匹配类型")
+    match_type: MatchTypeValue = Field(..., description="匹配类型")
     confidence: float = Field(..., ge=0.0, le=1.0, description="检测置信度")
     positions: List[Position] = Field(default=[], description="在原文中的位置")
-    detection_method: DetectionMethod = Field(..., description="检测方法")
+    detection_method: DetectionMethodValue = Field(..., description="检测方法")
     suggestion: Optional[str] = Field(default=None, description="替换建议")
 
 
@@ -47,10 +48,10 @@ class DetectionSummary(BaseModel):
 class DetectionResponse(BaseResponse):
     """检测响应模型"""
     is_sensitive: bool = Field(..., description="是否包含敏感内容")
-    risk_level: RiskLevel = Field(..., description="风险等级")
+    risk_level: RiskLevelValue = Field(..., description="风险等级")
     overall_score: float = Field(..., ge=0.0, le=1.0, description="整体敏感度评分")
     detection_time_ms: int = Field(..., ge=0, description="检测耗时（毫秒）")
-    detection_mode_used: DetectionMode = Field(..., description="实际使用的检测模式")
+    detection_mode_used: DetectionModeValue = Field(..., description="实际使用的检测模式")
     results: List[DetectionResultItem] = Field(default=[], description="检测结果详情")
     summary: DetectionSummary = Field(..., description="检测结果汇总")
 
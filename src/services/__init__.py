@@ -2,12 +2,14 @@
 服务包导出
 """
 from .detection_service import SensitiveWordDetectionService
+from .batcher import DetectionBatcher
 from .rule_detector import RuleBasedDetector
 from .text_processor import TextPreprocessor
 from .yaml_config_reader import YamlConfigReader
 
 __all__ = [
     "SensitiveWordDetectionService",
+    "DetectionBatcher",
     "RuleBasedDetector", 
     "TextPreprocessor",
     "YamlConfigReader"
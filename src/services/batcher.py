@@ -0,0 +1,130 @@
+"""
+检测请求微批处理
+将短时间窗口内并发到达的检测请求合并为一次批量检测
+"""
+import asyncio
+from typing import List, Optional, Tuple
+
+from ..models import DetectionRequest, DetectionResponse
+from ..core import get_logger
+from .detection_service import SensitiveWordDetectionService
+
+logger = get_logger()
+
+
+class DetectionBatcher:
+    """检测请求微批处理器"""
+    
+    def __init__(
+        self,
+        service: SensitiveWordDetectionService,
+        max_batch_size: int = 32,
+        batch_window_ms: int = 5
+    ):
+        """
+        初始化批处理器
+        
+        Args:
+            service: 检测服务
+            max_batch_size: 单批最大请求数，小于等于1时不启用批处理
+            batch_window_ms: 收集同批请求的最长等待时间（毫秒）
+        """
+        self.service = service
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window_ms / 1000
+        
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # 已从队列取出、尚未返回结果的批次（收集中或检测中），停止时需要一并结束
+        self._batch: List[Tuple[DetectionRequest, asyncio.Future]] = []
+    
+    @property
+    def enabled(self) -> bool:
+        """是否启用批处理"""
+        return self.max_batch_size > 1
+    
+    async def start(self) -> None:
+        """启动后台批处理协程（需在事件循环中调用）"""
+        if not self.enabled or self._worker is not None:
+            return
+        
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+        logger.info(f"检测批处理已启动，单批最多 {self.max_batch_size} 个请求，窗口 {self.batch_window * 1000:.0f}ms")
+    
+    async def stop(self) -> None:
+        """停止后台批处理协程，未完成的请求（包括正在处理的批次）以异常结束"""
+        if self._worker is None:
+            return
+        
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        
+        pending = self._batch
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+        
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(RuntimeError("检测服务正在关闭"))
+        
+        self._worker = None
+        self._queue = None
+        self._batch = []
+    
+    async def detect(self, request: DetectionRequest) -> DetectionResponse:
+        """提交检测请求并等待所在批次的结果；未启动时直接调用检测服务"""
+        if self._worker is None:
+            return await self.service.detect(request)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((request, future))
+        return await future
+    
+    async def _collect_batch(self) -> List[Tuple[DetectionRequest, asyncio.Future]]:
+        """等待第一个请求，然后在时间窗口内继续收集，直到达到单批上限"""
+        batch = self._batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_window
+        
+        while len(batch) < self.max_batch_size:
+            # 已在队列中的请求直接取出，无需等待
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def _run(self) -> None:
+        """后台批处理循环"""
+        while True:
+            batch = await self._collect_batch()
+            requests = [request for request, _ in batch]
+            
+            try:
+                outcomes = await self.service.detect_batch(requests)
+            except Exception as e:
+                logger.error(f"批量检测失败: {e}")
+                outcomes = [e] * len(batch)
+            
+            for (_, future), outcome in zip(batch, outcomes):
+                # 客户端断开时对应的future可能已被取消
+                if future.done():
+                    continue
+                if isinstance(outcome, Exception):
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+            
+            self._batch = []
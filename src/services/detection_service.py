@@ -3,18 +3,22 @@
 """
 import time
 import asyncio
-from typing import List, Dict, Any
+import itertools
+from typing import List, Dict, Any, Tuple, Union
 from datetime import datetime
 
 from ..models import (
     DetectionRequest, DetectionResponse, DetectionResultItem, 
-    DetectionSummary, DetectionMode, RiskLevel
+    DetectionSummary, DetectionMode, RiskLevel, DetectionModeValue, RiskLevelValue
 )
 from ..core import get_logger, get_settings, DetectionError
 from .rule_detector import RuleBasedDetector
 
 logger = get_logger()
 
+# 需要执行规则检测的模式（语义检测已移除，混合模式仅执行规则检测）
+_RULE_DETECTION_MODES = frozenset({DetectionMode.RULE, DetectionMode.HYBRID})
+
 
 class SensitiveWordDetectionService:
     """敏感词检测服务主入口"""
@@ -28,6 +32,8 @@ class SensitiveWordDetectionService:
         
         # 服务状态
         self.start_time = time.time()
+        # itertools.count的next()在C层完成，多线程并发调用也不会丢失计数
+        self._request_counter = itertools.count(1)
         self.request_count = 0
         
         logger.info("敏感词检测服务初始化完成 - 使用YAML配置")
@@ -43,20 +49,21 @@ class SensitiveWordDetectionService:
             检测响应
         """
         start_time = time.time()
-        self.request_count += 1
+        self.request_count = next(self._request_counter)
         
         try:
-            logger.debug(f"开始检测，文本长度: {len(request.text)}, 模式: {request.config.detection_mode}")
+            text_length = len(request.text)
+            logger.debug(f"开始检测，文本长度: {text_length}, 模式: {request.config.detection_mode}")
             
             # 验证文本长度
-            if len(request.text) > self.settings.max_text_length:
-                raise DetectionError(f"文本长度超过限制: {len(request.text)} > {self.settings.max_text_length}")
+            if text_length > self.settings.max_text_length:
+                raise DetectionError(f"文本长度超过限制: {text_length} > {self.settings.max_text_length}")
             
             # 根据检测模式执行相应的检测
             results = await self._execute_detection(request)
             
             # 生成检测响应
-            response = await self._build_response(
+            response = self._build_response(
                 results, 
                 request.config.detection_mode,
                 start_time
@@ -85,26 +92,71 @@ class SensitiveWordDetectionService:
         config = request.config
         mode = config.detection_mode
         
-        all_results = []
+        if mode not in _RULE_DETECTION_MODES:
+            return []
+        
+        # 目前只有规则检测一个结果来源，且规则检测器已按敏感词和分类去重，只需排序；
+        # 将来接入多个检测器时再通过_merge_and_deduplicate_results合并
+        rule_results = await self.rule_detector.detect(text, config)
+        rule_results.sort(key=lambda x: x.confidence, reverse=True)
+        return rule_results
+    
+    async def detect_batch(
+        self,
+        requests: List[DetectionRequest]
+    ) -> List[Union[DetectionResponse, DetectionError]]:
+        """
+        批量执行敏感词检测
+        
+        所有请求的规则匹配合并为一次AC自动机扫描。单个请求失败不影响其他请求，
+        失败的请求在对应位置返回DetectionError。
         
-        if mode == DetectionMode.RULE:
-            # 仅规则检测
-            rule_results = await self.rule_detector.detect(text, config)
-            all_results.extend(rule_results)
+        Args:
+            requests: 检测请求列表
             
-        elif mode == DetectionMode.SEMANTIC:
-            # 语义检测已被移除，返回空结果
-            logger.warning("语义检测已不支持，返回空结果")
+        Returns:
+            与请求一一对应的检测响应或异常
+        """
+        start_time = time.time()
+        if requests:
+            # 一次推进len(requests)个计数，取最后一个作为当前请求总数
+            self.request_count = next(itertools.islice(self._request_counter, len(requests) - 1, None))
+        
+        outcomes: List[Union[DetectionResponse, DetectionError, None]] = [None] * len(requests)
+        rule_indices = []
+        for index, request in enumerate(requests):
+            if len(request.text) > self.settings.max_text_length:
+                outcomes[index] = DetectionError(
+                    f"检测失败: 文本长度超过限制: {len(request.text)} > {self.settings.max_text_length}"
+                )
+            elif request.config.detection_mode in _RULE_DETECTION_MODES:
+                rule_indices.append(index)
+        
+        try:
+            rule_results = await self.rule_detector.detect_batch(
+                [requests[index].text for index in rule_indices],
+                [requests[index].config for index in rule_indices]
+            ) if rule_indices else []
+            rule_results_by_index = dict(zip(rule_indices, rule_results))
             
-        elif mode == DetectionMode.HYBRID:
-            # 仅执行规则检测（语义检测已移除）
-            rule_results = await self.rule_detector.detect(text, config)
-            all_results.extend(rule_results)
+            for index, request in enumerate(requests):
+                if outcomes[index] is not None:
+                    continue
+                results = sorted(rule_results_by_index.get(index, []), key=lambda x: x.confidence, reverse=True)
+                outcomes[index] = self._build_response(
+                    results,
+                    request.config.detection_mode,
+                    start_time
+                )
+        except Exception as e:
+            logger.error(f"批量检测过程出错: {e}")
+            error = DetectionError(f"检测失败: {e}")
+            outcomes = [outcome if outcome is not None else error for outcome in outcomes]
         
-        # 去重和合并结果
-        merged_results = self._merge_and_deduplicate_results(all_results)
+        detection_time = (time.time() - start_time) * 1000
+        logger.info(f"批量检测完成，{len(requests)} 个请求，耗时 {detection_time:.2f}ms")
         
-        return merged_results
+        return outcomes
     
     def _merge_and_deduplicate_results(
         self, 
@@ -119,35 +171,21 @@ class SensitiveWordDetectionService:
         Returns:
             去重后的结果列表
         """
-        if not results:
-            return []
-        
-        # 简单去重：基于匹配词和分类
-        seen = set()
-        unique_results = []
-        
+        # 基于匹配词和分类去重，重复时保留置信度更高的结果
+        best: Dict[Tuple[str, str], DetectionResultItem] = {}
         for result in results:
             key = (result.matched_word, result.category)
-            if key not in seen:
-                seen.add(key)
-                unique_results.append(result)
-            else:
-                # 如果重复，保留置信度更高的
-                for i, existing in enumerate(unique_results):
-                    if (existing.matched_word, existing.category) == key:
-                        if result.confidence > existing.confidence:
-                            unique_results[i] = result
-                        break
+            current = best.get(key)
+            if current is None or result.confidence > current.confidence:
+                best[key] = result
         
         # 按置信度排序
-        unique_results.sort(key=lambda x: x.confidence, reverse=True)
-        
-        return unique_results
+        return sorted(best.values(), key=lambda x: x.confidence, reverse=True)
     
-    async def _build_response(
+    def _build_response(
         self, 
         results: List[DetectionResultItem],
-        detection_mode: DetectionMode,
+        detection_mode: DetectionModeValue,
         start_time: float
     ) -> DetectionResponse:
         """
@@ -167,24 +205,25 @@ class SensitiveWordDetectionService:
         # 是否包含敏感内容
         is_sensitive = len(results) > 0
         
-        # 计算整体风险评分
+        # 一次遍历得到最高置信度、对应结果和分类集合
         overall_score = 0.0
-        if results:
-            overall_score = max(result.confidence for result in results)
+        top_result = None
+        categories = set()
+        for result in results:
+            confidence = result.confidence
+            if top_result is None or confidence > overall_score:
+                overall_score = confidence
+                top_result = result
+            categories.add(result.category)
         
         # 确定风险等级
         risk_level = self._calculate_risk_level(overall_score, results)
         
         # 构建汇总信息
-        categories_found = list(set(result.category for result in results))
-        highest_risk_category = None
-        if results:
-            highest_risk_category = max(results, key=lambda x: x.confidence).category
-        
         summary = DetectionSummary(
             total_matches=len(results),
-            categories_found=categories_found,
-            highest_risk_category=highest_risk_category
+            categories_found=list(categories),
+            highest_risk_category=top_result.category if top_result is not None else None
         )
         
         return DetectionResponse(
@@ -202,7 +241,7 @@ class SensitiveWordDetectionService:
         self, 
         overall_score: float, 
         results: List[DetectionResultItem]
-    ) -> RiskLevel:
+    ) -> RiskLevelValue:
         """
         计算风险等级
         
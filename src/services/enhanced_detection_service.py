@@ -2,16 +2,22 @@
 增强的敏感词检测服务管理器
 集成多规则检测、结果仲裁和YAML配置系统
 """
+import os
 import time
+import asyncio
+import itertools
 import hashlib
-from typing import List, Dict, Any, Optional
+import logging
+from anyio import CapacityLimiter, to_thread
+from collections import OrderedDict
+from typing import List, Dict, Any, Callable, Optional, Tuple, Union
 from datetime import datetime
 
 from ..models.detection import (
     DetectionRequest, DetectionResponse, DetectionResultItem, 
     DetectionSummary, DetectionConfig
 )
-from ..models.common import RiskLevel, DetectionMode
+from ..models.common import RiskLevel, DetectionMode, DetectionModeValue
 from ..services.rule_engine import (
     BaseDetectionRule, ExactMatchRule, JiebaRule, RegexRule, 
     RuleConfig
@@ -22,6 +28,21 @@ from ..core import get_logger, get_settings, DetectionError
 
 logger = get_logger()
 
+# 各规则的检测在线程池中并发执行，限制同时占用的线程数
+_RULE_LIMITER = CapacityLimiter((os.cpu_count() or 1) * 2)
+
+# 无命中响应模板，干净文本只需浅拷贝并更新耗时和检测模式，不再逐次校验构造
+_EMPTY_RESPONSE = DetectionResponse(
+    is_sensitive=False,
+    risk_level=RiskLevel.LOW,
+    overall_score=0.0,
+    detection_time_ms=0,
+    detection_mode_used=DetectionMode.HYBRID,
+    results=[],
+    summary=DetectionSummary(total_matches=0, categories_found=[], highest_risk_category=None),
+    message="检测完成"
+)
+
 
 class EnhancedDetectionService:
     """增强的敏感词检测服务"""
@@ -32,38 +53,94 @@ class EnhancedDetectionService:
         
         # 初始化YAML配置读取器
         self.config_reader = YamlConfigReader(config_file)
+        self._base_path = self.config_reader.config_file.parent.parent
         
         # 初始化组件
         self.arbitrator = DetectionResultArbitrator(yaml_config_reader=self.config_reader)
         
-        # 检测规则
+        # 检测规则，以及按检测模式预先筛选好的已启用规则快照：((规则名, detect方法), ...)
         self.rules: Dict[str, BaseDetectionRule] = {}
+        self._rules_by_mode: Dict[str, Tuple[Tuple[str, Callable], ...]] = {}
         
         # 服务状态
         self.start_time = time.time()
+        # 请求计数，next()为原子递增
+        self._request_counter = itertools.count(1)
         self.request_count = 0
         
-        # 加载检测规则
-        self._load_detection_rules()
+        # 检测响应缓存：(文本sha256, 配置指纹) -> (响应, 使用的规则)，按LRU淘汰
+        self._response_cache: "OrderedDict[Tuple[str, tuple], Tuple[DetectionResponse, List[str]]]" = OrderedDict()
+        self._response_cache_size = self.settings.detection_cache_size
+        
+        # 最近一次加载时各词库文件的词数，供健康检查使用，避免每次探测都重新读取词库
+        self._wordlist_counts: Dict[str, int] = {}
+        
+        # 规则代数，每次替换规则时递增；规则替换前开始的检测不再写入响应缓存
+        self._rules_generation = 0
+        # 串行化重新加载，同一时间只构建一套新规则
+        self._reload_lock = asyncio.Lock()
+        
+        # 加载检测规则，失败时退回不含词库的默认规则，保证服务可以启动
+        try:
+            rules, wordlist_counts = self._load_detection_rules()
+        except DetectionError as e:
+            logger.error(str(e))
+            rules, wordlist_counts = self._create_default_rules(), {}
+        self._install_rules(rules, wordlist_counts)
         
         logger.info("增强敏感词检测服务初始化完成 - 使用YAML配置")
     
-    def _load_detection_rules(self):
-        """从YAML配置加载检测规则"""
+    def _load_detection_rules(self) -> Tuple[Dict[str, BaseDetectionRule], Dict[str, int]]:
+        """
+        从YAML配置创建一套新的检测规则并加载词库（不修改当前使用的规则）
+        
+        Returns:
+            (规则名 -> 规则, 词库文件 -> 词数)
+        
+        Raises:
+            DetectionError: 读取配置、读取词库或为规则加载词库失败
+        """
         try:
             # 重新加载配置
             self.config_reader.reload_config()
             
             # 创建多种检测规则
-            self._create_default_rules()
+            rules = self._create_default_rules()
             
             # 为规则加载词库
-            self._load_wordlists_for_rules()
-                
+            wordlist_counts = self._load_wordlists_for_rules(rules)
+        
+        except DetectionError:
+            raise
         except Exception as e:
-            logger.error(f"加载检测规则失败: {e}")
-            # 创建默认规则
-            self._create_default_rules()
+            raise DetectionError(f"加载检测规则失败: {e}")
+        
+        return rules, wordlist_counts
+    
+    def _install_rules(self, rules: Dict[str, BaseDetectionRule], wordlist_counts: Dict[str, int]):
+        """替换当前使用的规则并清空响应缓存（在事件循环中调用，替换期间没有检测读取到一半的状态）"""
+        self.rules = rules
+        self._wordlist_counts = wordlist_counts
+        self._build_rules_by_mode()
+        self._rules_generation += 1
+        self._response_cache.clear()
+    
+    def _build_rules_by_mode(self):
+        """
+        按检测模式预先筛选已启用的规则，规则变化（重新加载）时重建
+        
+        快照为不可变元组并整体替换，重新加载期间进行中的请求仍使用旧快照。
+        """
+        enabled_rules = [(name, rule) for name, rule in self.rules.items() if rule.enabled]
+        self._rules_by_mode = {
+            # 仅规则检测，排除语义规则
+            DetectionMode.RULE: tuple(
+                (name, rule.detect) for name, rule in enabled_rules
+                if rule.rule_config.rule_type != 'semantic'
+            ),
+            # 混合模式使用所有规则（语义检测模式已移除）
+            DetectionMode.HYBRID: tuple((name, rule.detect) for name, rule in enabled_rules),
+        }
     
     def _create_rule_instance(self, rule_config: RuleConfig) -> Optional[BaseDetectionRule]:
         """创建规则实例"""
@@ -79,8 +156,10 @@ class EnhancedDetectionService:
             logger.warning(f"未知的规则类型: {rule_type}")
             return None
     
-    def _create_default_rules(self):
-        """创建默认检测规则"""
+    def _create_default_rules(self) -> Dict[str, BaseDetectionRule]:
+        """创建默认检测规则（尚未加载词库）"""
+        rules: Dict[str, BaseDetectionRule] = {}
+        
         # 精确匹配规则
         exact_config = RuleConfig(
             name="default_exact",
@@ -93,7 +172,7 @@ class EnhancedDetectionService:
                 "check_boundaries": True
             }
         )
-        self.rules["default_exact"] = ExactMatchRule(exact_config)
+        rules["default_exact"] = ExactMatchRule(exact_config)
         
         # jieba分词规则
         jieba_config = RuleConfig(
@@ -107,36 +186,50 @@ class EnhancedDetectionService:
                 "case_sensitive": False
             }
         )
-        self.rules["default_jieba"] = JiebaRule(jieba_config)
+        rules["default_jieba"] = JiebaRule(jieba_config)
         
         logger.info("创建了默认检测规则")
+        return rules
     
-    def _load_wordlists_for_rules(self):
-        """为规则加载词库"""
-        for rule_name, rule in self.rules.items():
+    def _build_words_by_category(self) -> Tuple[Dict[str, List[str]], Dict[str, int]]:
+        """读取所有启用的词库并按分类组织词汇，同时返回各词库文件的词数"""
+        words_by_category: Dict[str, List[str]] = {}
+        wordlist_counts: Dict[str, int] = {}
+        
+        for wordlist_config in self.config_reader.get_enabled_wordlists():
+            category = wordlist_config.name  # 使用name作为分类
+            words = wordlist_config.load_words(self._base_path)
+            words_by_category.setdefault(category, []).extend(words)
+            wordlist_counts[wordlist_config.file] = len(words)
+        
+        return words_by_category, wordlist_counts
+    
+    def _load_wordlists_for_rules(self, rules: Dict[str, BaseDetectionRule]) -> Dict[str, int]:
+        """
+        为规则加载词库（每次加载只读取一次词库文件，所有规则共用）
+        
+        Returns:
+            词库文件 -> 词数
+        
+        Raises:
+            DetectionError: 读取词库或任一规则加载词库失败
+        """
+        try:
+            words_by_category, wordlist_counts = self._build_words_by_category()
+        except Exception as e:
+            raise DetectionError(f"读取词库失败: {e}")
+        
+        for rule_name, rule in rules.items():
             try:
-                # 获取所有启用的词库
-                enabled_wordlists = self.config_reader.get_enabled_wordlists()
-                
-                # 按分类组织词汇
-                words_by_category = {}
-                base_path = self.config_reader.config_file.parent.parent
-                
-                for wordlist_config in enabled_wordlists:
-                    category = wordlist_config.name  # 使用name作为分类
-                    words = wordlist_config.load_words(base_path)
-                    
-                    if category not in words_by_category:
-                        words_by_category[category] = []
-                    words_by_category[category].extend(words)
-                
                 # 加载到规则
                 rule.load_wordlist(words_by_category)
                 
                 logger.debug(f"规则 {rule_name} 加载了 {len(words_by_category)} 个分类的词库")
-                
+            
             except Exception as e:
-                logger.error(f"为规则 {rule_name} 加载词库失败: {e}")
+                raise DetectionError(f"为规则 {rule_name} 加载词库失败: {e}")
+        
+        return wordlist_counts
     
     async def detect(self, request: DetectionRequest) -> DetectionResponse:
         """
@@ -144,154 +237,257 @@ class EnhancedDetectionService:
         
         Args:
             request: 检测请求
-            
+        
         Returns:
             检测响应
         """
+        return await self._detect(request)
+    
+    async def _detect(
+        self,
+        request: DetectionRequest,
+        cache_key: Optional[Tuple[str, tuple]] = None
+    ) -> DetectionResponse:
+        """执行检测；cache_key为已算好的响应缓存键，未提供时在通过校验后再计算"""
         start_time = time.time()
-        self.request_count += 1
+        self.request_count = next(self._request_counter)
         
         try:
-            logger.debug(f"开始检测，文本长度: {len(request.text)}, 模式: {request.config.detection_mode}")
+            text_length = len(request.text)
+            logger.debug(f"开始检测，文本长度: {text_length}, 模式: {request.config.detection_mode}")
             
             # 验证文本长度
-            if len(request.text) > self.settings.max_text_length:
-                raise DetectionError(f"文本长度超过限制: {len(request.text)} > {self.settings.max_text_length}")
+            if text_length > self.settings.max_text_length:
+                raise DetectionError(f"文本长度超过限制: {text_length} > {self.settings.max_text_length}")
             
-            # 执行多规则检测
-            results_by_rule = await self._execute_multi_rule_detection(request)
+            # 纯空白文本不可能命中任何规则，不再哈希和分发到各规则
+            if request.text.isspace():
+                return _EMPTY_RESPONSE.model_copy(update={
+                    "detection_time_ms": int((time.time() - start_time) * 1000),
+                    "detection_mode_used": request.config.detection_mode
+                })
+            
+            # 相同文本和配置的重复请求直接返回缓存结果
+            text_hash = None
+            cached = None
+            if self._response_cache_size > 0:
+                if cache_key is None:
+                    cache_key = self._make_cache_key(request)
+                text_hash = cache_key[0]
+                cached = self._response_cache.get(cache_key)
+            else:
+                cache_key = None
             
-            # 结果仲裁
-            final_results, summary = self.arbitrator.arbitrate(results_by_rule)
+            if cached is not None:
+                self._response_cache.move_to_end(cache_key)
+                cached_response, rule_ids = cached
+                response = cached_response.model_copy(
+                    update={"detection_time_ms": int((time.time() - start_time) * 1000)}
+                )
+                await self._record_detection_history(request, response, rule_ids, text_hash)
+                logger.debug("命中检测缓存")
+                return response
             
-            # 计算风险等级
-            risk_level = self.arbitrator.calculate_overall_risk_level(final_results)
+            # 执行多规则检测；检测期间规则被重新加载时，结果不写入缓存
+            rules_generation = self._rules_generation
+            results_by_rule = await self._execute_multi_rule_detection(request)
             
-            # 计算整体评分
-            overall_score = 0.0
-            if final_results:
-                overall_score = max(result.confidence for result in final_results)
+            if not any(results_by_rule.values()):
+                # 所有规则均无命中（干净文本的常见情况），跳过仲裁，直接复制空响应模板
+                response = _EMPTY_RESPONSE.model_copy(update={
+                    "detection_time_ms": int((time.time() - start_time) * 1000),
+                    "detection_mode_used": request.config.detection_mode
+                })
+            else:
+                # 结果仲裁，同时得到风险等级和整体评分
+                final_results, summary, risk_level, overall_score = self.arbitrator.arbitrate(results_by_rule)
+                
+                # 构建响应
+                response = DetectionResponse(
+                    is_sensitive=len(final_results) > 0,
+                    risk_level=risk_level,
+                    overall_score=overall_score,
+                    detection_time_ms=int((time.time() - start_time) * 1000),
+                    detection_mode_used=request.config.detection_mode,
+                    results=final_results,
+                    summary=summary,
+                    message="检测完成"
+                )
             
-            # 构建响应
-            response = DetectionResponse(
-                is_sensitive=len(final_results) > 0,
-                risk_level=risk_level,
-                overall_score=overall_score,
-                detection_time_ms=int((time.time() - start_time) * 1000),
-                detection_mode_used=request.config.detection_mode,
-                results=final_results,
-                summary=summary,
-                message="检测完成"
-            )
+            # 写入缓存
+            rule_ids = list(results_by_rule.keys())
+            if cache_key is not None and rules_generation == self._rules_generation:
+                self._cache_response(cache_key, response, rule_ids)
             
             # 记录检测历史
-            await self._record_detection_history(request, response, results_by_rule)
+            await self._record_detection_history(request, response, rule_ids, text_hash)
             
             detection_time = (time.time() - start_time) * 1000
             logger.info(f"检测完成，耗时 {detection_time:.2f}ms，发现敏感内容: {response.is_sensitive}")
             
             return response
-            
+        
         except Exception as e:
             logger.error(f"检测过程出错: {e}")
             raise DetectionError(f"检测失败: {e}")
     
+    async def detect_batch(
+        self,
+        requests: List[DetectionRequest]
+    ) -> List[Union[DetectionResponse, DetectionError]]:
+        """
+        批量执行敏感词检测
+        
+        文本和配置都相同的请求只检测一次并共享响应；不同请求并发执行，
+        各规则的匹配仍在线程池中进行。单个请求失败不影响其他请求，
+        失败的请求在对应位置返回DetectionError。
+        
+        Args:
+            requests: 检测请求列表
+        
+        Returns:
+            与请求一一对应的检测响应或异常
+        """
+        # 去重键同时用作响应缓存键，每个请求只计算一次文本哈希和配置指纹
+        unique: Dict[Tuple[str, tuple], DetectionRequest] = {}
+        keys = []
+        for request in requests:
+            key = self._make_cache_key(request)
+            unique.setdefault(key, request)
+            keys.append(key)
+        
+        outcomes = await asyncio.gather(
+            *[self._detect(request, key) for key, request in unique.items()],
+            return_exceptions=True
+        )
+        
+        outcome_by_key = {}
+        for key, outcome in zip(unique, outcomes):
+            if isinstance(outcome, Exception) and not isinstance(outcome, DetectionError):
+                outcome = DetectionError(f"检测失败: {outcome}")
+            outcome_by_key[key] = outcome
+        
+        return [outcome_by_key[key] for key in keys]
+    
     async def _execute_multi_rule_detection(
         self, 
         request: DetectionRequest
     ) -> Dict[str, List[DetectionResultItem]]:
-        """执行多规则检测"""
+        """执行多规则检测（各规则在线程池中并发执行，总耗时取决于最慢的规则）"""
         text = request.text
         config = request.config
         
         results_by_rule = {}
         
-        # 根据检测模式确定使用的规则
+        # 根据检测模式确定使用的规则（快照中只有已启用的规则）
         rules_to_use = self._get_rules_for_mode(config.detection_mode)
         
-        for rule_name, rule in rules_to_use.items():
-            try:
-                if not rule.enabled:
-                    continue
-                
-                # 执行检测
-                results = rule.detect(text, config)
-                results_by_rule[rule_name] = results
-                
-                logger.debug(f"规则 {rule_name} 检测到 {len(results)} 个匹配")
-                
-            except Exception as e:
-                logger.error(f"规则 {rule_name} 检测失败: {e}")
+        outcomes = await asyncio.gather(
+            *[to_thread.run_sync(detect, text, config, limiter=_RULE_LIMITER) for _, detect in rules_to_use],
+            return_exceptions=True
+        )
+        
+        for (rule_name, _), results in zip(rules_to_use, outcomes):
+            if isinstance(results, Exception):
+                logger.error(f"规则 {rule_name} 检测失败: {results}")
                 results_by_rule[rule_name] = []
+                continue
+            
+            results_by_rule[rule_name] = results
+            logger.debug(f"规则 {rule_name} 检测到 {len(results)} 个匹配")
         
         return results_by_rule
     
-    def _get_rules_for_mode(self, detection_mode: DetectionMode) -> Dict[str, BaseDetectionRule]:
-        """根据检测模式获取规则"""
-        if detection_mode == DetectionMode.RULE:
-            # 仅规则检测，排除语义规则
-            return {
-                name: rule for name, rule in self.rules.items()
-                if rule.rule_config.rule_type != 'semantic'
-            }
-        elif detection_mode == DetectionMode.SEMANTIC:
-            # 仅语义检测
-            return {
-                name: rule for name, rule in self.rules.items()
-                if rule.rule_config.rule_type == 'semantic'
-            }
-        else:  # HYBRID
-            # 所有规则
-            return self.rules
+    def _get_rules_for_mode(self, detection_mode: DetectionModeValue) -> Tuple[Tuple[str, Callable], ...]:
+        """根据检测模式获取规则快照（未知模式按混合模式处理）"""
+        rules = self._rules_by_mode.get(detection_mode)
+        return rules if rules is not None else self._rules_by_mode[DetectionMode.HYBRID]
+    
+    @staticmethod
+    def _config_fingerprint(config: DetectionConfig) -> tuple:
+        """检测配置指纹，作为响应缓存键的一部分（分类保持请求顺序，多分类词按先列出的分类报告）"""
+        return (
+            config.detection_mode,
+            config.strictness_level,
+            tuple(config.categories),
+            config.return_positions,
+            config.return_suggestions,
+            config.custom_threshold
+        )
+    
+    def _make_cache_key(self, request: DetectionRequest) -> Tuple[str, tuple]:
+        """响应缓存键：(文本sha256, 配置指纹)"""
+        text_hash = hashlib.sha256(request.text.encode('utf-8')).hexdigest()
+        return text_hash, self._config_fingerprint(request.config)
+    
+    def _cache_response(
+        self,
+        cache_key: Tuple[str, tuple],
+        response: DetectionResponse,
+        rule_ids: List[str]
+    ) -> None:
+        """写入响应缓存，超出容量时淘汰最久未使用的条目"""
+        self._response_cache[cache_key] = (response, rule_ids)
+        self._response_cache.move_to_end(cache_key)
+        if len(self._response_cache) > self._response_cache_size:
+            self._response_cache.popitem(last=False)
     
     async def _record_detection_history(
         self, 
         request: DetectionRequest, 
         response: DetectionResponse,
-        results_by_rule: Dict[str, List[DetectionResultItem]]
+        rule_ids: List[str],
+        text_hash: Optional[str] = None
     ):
-        """记录检测历史到日志"""
+        """记录检测历史到日志（INFO未开启时直接跳过；已有缓存键中的sha256时复用）"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
         try:
-            # 计算文本哈希
-            text_hash = hashlib.sha256(request.text.encode('utf-8')).hexdigest()
+            # 日志只展示8位十六进制摘要，没有现成哈希时用短输出的blake2b
+            if text_hash is None:
+                text_hash = hashlib.blake2b(request.text.encode('utf-8'), digest_size=4).hexdigest()
             
             # 文本预览
             text_preview = request.text[:200]
             
-            # 使用的规则ID
-            rule_ids = list(results_by_rule.keys())
-            
             # 记录检测结果到日志
             logger.info(f"检测历史记录: hash={text_hash[:8]}, "
                        f"preview='{text_preview}', "
                        f"sensitive={response.is_sensitive}, "
-                       f"risk={response.risk_level.value}, "
+                       f"risk={response.risk_level}, "
                        f"score={response.overall_score:.2f}, "
                        f"time={response.detection_time_ms}ms, "
                        f"rules={rule_ids}, "
                        f"matches={len(response.results)}")
-                
+        
         except Exception as e:
             logger.error(f"记录检测历史失败: {e}")
     
-    def reload_rules(self):
+    async def _reload(self):
+        """
+        在工作线程中构建新规则，完成后在事件循环中整体替换并清空响应缓存
+        
+        并发的重新加载依次执行；失败时抛出DetectionError，当前规则保持不变。
+        """
+        async with self._reload_lock:
+            rules, wordlist_counts = await to_thread.run_sync(self._load_detection_rules)
+            self._install_rules(rules, wordlist_counts)
+    
+    async def reload_rules(self):
         """重新加载检测规则"""
         logger.info("重新加载检测规则")
-        self.rules.clear()
-        self._load_detection_rules()
+        await self._reload()
     
-    def reload_wordlists(self):
-        """重新加载词库"""
+    async def reload_wordlists(self):
+        """重新加载词库（为新词库创建新的规则实例，不修改检测中的规则）"""
         logger.info("重新加载词库")
-        self.config_reader.reload_config()
-        self._load_wordlists_for_rules()
+        await self._reload()
     
-    def reload_config(self):
+    async def reload_config(self):
         """重新加载整个配置"""
         logger.info("重新加载YAML配置")
-        self.config_reader.reload_config()
-        self.rules.clear()
-        self._load_detection_rules()
+        await self._reload()
     
     async def health_check(self) -> Dict[str, Any]:
         """服务健康检查"""
@@ -306,10 +502,11 @@ class EnhancedDetectionService:
             "wordlist_details": []
         }
         
-        base_path = self.config_reader.config_file.parent.parent
         for wordlist_config in enabled_wordlists:
-            words = wordlist_config.load_words(base_path)
-            word_count = len(words)
+            word_count = self._wordlist_counts.get(wordlist_config.file)
+            if word_count is None:
+                # 配置中新增但尚未加载的词库
+                word_count = len(wordlist_config.load_words(self._base_path))
             total_words += word_count
             
             wordlist_stats["wordlist_details"].append({
@@ -2,19 +2,26 @@
 敏感词检测结果仲裁组件
 基于贪心策略的最大匹配算法来合并和仲裁多个引擎的检测结果
 """
+import logging
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
 from typing import List, Dict, Set, Tuple, Optional
 from collections import defaultdict
 from dataclasses import dataclass, field
 
 from ..models.detection import DetectionResultItem, DetectionSummary
-from ..models.common import RiskLevel, MatchType, Position
+from ..models.common import RiskLevel, MatchTypeValue, RiskLevelValue, Position
 from ..core import get_logger
 from .yaml_config_reader import YamlConfigReader
 
 logger = get_logger()
 
+_HIT_START = attrgetter('start')
+_HIT_END = attrgetter('end')
+_RESULT_CONFIDENCE = attrgetter('confidence')
 
-@dataclass 
+
+@dataclass(slots=True)
 class Hit:
     """标准化的命中结果数据结构"""
     word: str           # 命中的敏感词
@@ -23,10 +30,11 @@ class Hit:
     category: str       # 敏感词分类
     source: str         # 来源引擎标识
     confidence: float   # 置信度
-    match_type: MatchType  # 匹配类型
+    match_type: MatchTypeValue  # 匹配类型
     detection_method: str  # 检测方法
     suggestion: Optional[str] = None  # 替换建议
     positions: Optional[List[Position]] = field(default=None)  # 位置列表
+    source_result: Optional[DetectionResultItem] = None  # 只有一个位置时对应的原始检测结果，字段不变时可直接复用
     
     def __post_init__(self):
         """初始化后处理"""
@@ -79,7 +87,7 @@ class DetectionResultArbitrator:
     def arbitrate(
         self, 
         results_by_rule: Dict[str, List[DetectionResultItem]]
-    ) -> Tuple[List[DetectionResultItem], DetectionSummary]:
+    ) -> Tuple[List[DetectionResultItem], DetectionSummary, RiskLevelValue, float]:
         """
         仲裁多个引擎的检测结果，采用基于最大匹配原则的贪心算法
         
@@ -87,7 +95,7 @@ class DetectionResultArbitrator:
             results_by_rule: 按规则分组的检测结果
             
         Returns:
-            仲裁后的结果列表和汇总信息
+            仲裁后的结果列表、汇总信息、整体风险等级和整体评分
         """
         logger.debug(f"开始仲裁 {len(results_by_rule)} 个引擎的检测结果")
         
@@ -100,65 +108,83 @@ class DetectionResultArbitrator:
         else:
             merged_hits = all_hits
         
-        # 3. 增强多引擎匹配的置信度
-        enhanced_hits = self._enhance_multi_engine_matches(merged_hits, results_by_rule)
-        
-        # 4. 过滤低置信度结果
-        filtered_hits = self._filter_by_confidence(enhanced_hits)
-        
-        # 5. 应用分类权重
-        weighted_hits = self._apply_category_weights(filtered_hits)
+        # 3-5. 增强多引擎匹配的置信度、过滤低置信度结果、应用分类权重
+        weighted_hits = self._post_process_hits(merged_hits, results_by_rule)
         
         # 6. 转换回DetectionResultItem格式并排序
         final_results = self._convert_to_detection_results(weighted_hits)
         final_results = self._sort_results(final_results)
         
-        # 7. 生成汇总信息
-        summary = self._generate_summary(final_results)
+        # 7. 一次遍历生成汇总信息、整体风险等级和评分
+        summary, risk_level, overall_score = self._summarize(final_results)
         
         logger.debug(f"仲裁完成，最终结果: {len(final_results)} 个匹配")
         
-        return final_results, summary
+        return final_results, summary, risk_level, overall_score
+    
+    def _summarize(
+        self,
+        results: List[DetectionResultItem]
+    ) -> Tuple[DetectionSummary, RiskLevelValue, float]:
+        """对已按置信度降序排序的结果，一次遍历得到汇总信息、风险等级和整体评分"""
+        if not results:
+            summary = DetectionSummary(total_matches=0, categories_found=[], highest_risk_category=None)
+            return summary, RiskLevel.LOW, 0.0
+        
+        # 排序后的第一个结果置信度最高，同时也是最高风险分类
+        overall_score = results[0].confidence
+        weighted_score = overall_score
+        categories = set()
+        category_weights = self.config.category_weights
+        for result in results:
+            categories.add(result.category)
+            if category_weights.get(result.category, 1.0) >= 0.9:  # 高权重分类
+                weighted_score += 0.1
+        
+        summary = DetectionSummary(
+            total_matches=len(results),
+            categories_found=list(categories),
+            highest_risk_category=results[0].category
+        )
+        return summary, self._risk_level_from_score(weighted_score, len(results)), overall_score
     
     def _convert_to_hits(self, results_by_rule: Dict[str, List[DetectionResultItem]]) -> List[Hit]:
         """将检测结果转换为标准化的Hit结构"""
         all_hits = []
+        append = all_hits.append
         
         for rule_name, results in results_by_rule.items():
+            # 应用引擎权重调整置信度（每个规则只查一次权重）
+            engine_weight = self.config.engine_weights.get(rule_name, 1.0)
+            
             for result in results:
-                # 应用引擎权重调整置信度
-                engine_weight = self.config.engine_weights.get(rule_name, 1.0)
                 adjusted_confidence = min(1.0, result.confidence * engine_weight)
+                word = result.matched_word
+                category = result.category
+                match_type = result.match_type
+                detection_method = result.detection_method
+                suggestion = result.suggestion
                 
-                # 提取位置信息
-                if result.positions:
-                    for pos in result.positions:
-                        hit = Hit(
-                            word=result.matched_word,
-                            start=pos.start,
-                            end=pos.end,
-                            category=result.category,
-                            source=rule_name,
-                            confidence=adjusted_confidence,
-                            match_type=result.match_type,
-                            detection_method=result.detection_method,
-                            suggestion=result.suggestion
-                        )
-                        all_hits.append(hit)
+                # 提取位置信息；直接复用结果中的Position对象，不再由__post_init__重新创建
+                positions = result.positions
+                if len(positions) == 1:
+                    pos = positions[0]
+                    append(Hit(
+                        word, pos.start, pos.end, category, rule_name, adjusted_confidence,
+                        match_type, detection_method, suggestion, positions, result
+                    ))
+                elif positions:
+                    for pos in positions:
+                        append(Hit(
+                            word, pos.start, pos.end, category, rule_name, adjusted_confidence,
+                            match_type, detection_method, suggestion, [pos]
+                        ))
                 else:
                     # 如果没有位置信息，创建一个默认的Hit
-                    hit = Hit(
-                        word=result.matched_word,
-                        start=0,
-                        end=len(result.matched_word),
-                        category=result.category,
-                        source=rule_name,
-                        confidence=adjusted_confidence,
-                        match_type=result.match_type,
-                        detection_method=result.detection_method,
-                        suggestion=result.suggestion
-                    )
-                    all_hits.append(hit)
+                    append(Hit(
+                        word, 0, len(word), category, rule_name, adjusted_confidence,
+                        match_type, detection_method, suggestion
+                    ))
         
         return all_hits
     
@@ -181,11 +207,16 @@ class DetectionResultArbitrator:
         # 第一排序键：按start(起始索引)升序排列
         # 第二排序键：如果start相同，则按end(结束索引)降序排列
         # 这确保了在同一个起始位置，更长的词会排在前面
-        sorted_hits = sorted(all_hits, key=lambda x: (x.start, -x.end))
+        # 利用排序的稳定性分两次按单个属性排序，等价于按(start, -end)排序，
+        # 但排序键由C实现的attrgetter取得，不再为每个命中构造元组
+        sorted_hits = sorted(all_hits, key=_HIT_END, reverse=True)
+        sorted_hits.sort(key=_HIT_START)
         
         # 步骤2：遍历与过滤 - 贪心选择
         final_hits = []
         last_accepted_end = -1
+        # 逐条命中的调试日志只在DEBUG级别开启时格式化
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         
         for hit in sorted_hits:
             # 检查重叠：判断当前hit的起始位置是否小于上一个被接受的hit的结束位置
@@ -193,93 +224,103 @@ class DetectionResultArbitrator:
                 # 没有重叠，这是一个全新的、有效的命中
                 final_hits.append(hit)
                 last_accepted_end = hit.end
-                logger.debug(f"接受命中: '{hit.word}' at [{hit.start}:{hit.end}] from {hit.source}")
-            else:
+                if debug_enabled:
+                    logger.debug(f"接受命中: '{hit.word}' at [{hit.start}:{hit.end}] from {hit.source}")
+            elif debug_enabled:
                 # 有重叠，根据最大匹配原则忽略这个较短或重叠的匹配
                 logger.debug(f"忽略重叠命中: '{hit.word}' at [{hit.start}:{hit.end}] from {hit.source}")
         
         logger.debug(f"贪心合并完成: {len(all_hits)} -> {len(final_hits)} 个命中")
         return final_hits
     
-    def _enhance_multi_engine_matches(
+    def _post_process_hits(
         self, 
         hits: List[Hit],
         results_by_rule: Dict[str, List[DetectionResultItem]]
     ) -> List[Hit]:
-        """增强多引擎匹配的置信度"""
-        enhanced_hits = []
+        """
+        一次遍历完成多引擎置信度增强、低置信度过滤和分类权重调整
+        
+        命中的置信度原地更新，不再为每个阶段重新创建Hit。
+        """
+        processed_hits = []
+        if not hits:
+            return processed_hits
+        
+        threshold = self.config.confidence_threshold
+        get_category_weight = self.config.category_weights.get
+        
+        # 只有一个引擎给出结果时不存在多引擎匹配，跳过位置索引，只做过滤和分类权重调整
+        if sum(1 for rule_results in results_by_rule.values() if rule_results) < 2:
+            for hit in hits:
+                confidence = hit.confidence
+                if confidence >= threshold:
+                    hit.confidence = min(1.0, confidence * get_category_weight(hit.category, 1.0))
+                    processed_hits.append(hit)
+            return processed_hits
+        
+        position_index = self._build_position_index(results_by_rule)
+        boost_factor = self.config.confidence_boost_factor
         
         for hit in hits:
-            # 计算有多少个引擎匹配了这个词在相似位置
+            # 计算有多少个引擎匹配了这个词在相似位置（位置容忍度±2）
             match_count = 0
-            for rule_results in results_by_rule.values():
-                for rule_result in rule_results:
-                    if (rule_result.matched_word == hit.word and 
-                        rule_result.category == hit.category):
-                        # 检查位置是否相近
-                        if rule_result.positions:
-                            for pos in rule_result.positions:
-                                if abs(pos.start - hit.start) <= 2:  # 位置容忍度
-                                    match_count += 1
-                                    break
-                        else:
-                            match_count += 1
-                        break
+            for starts in position_index.get((hit.word, hit.category), {}).values():
+                if starts is None:
+                    match_count += 1
+                elif bisect_right(starts, hit.start + 2) > bisect_left(starts, hit.start - 2):
+                    match_count += 1
             
             # 如果多个引擎都匹配，提升置信度
+            confidence = hit.confidence
             if match_count > 1:
-                boost = self.config.confidence_boost_factor * (match_count - 1)
-                enhanced_confidence = min(1.0, hit.confidence + boost)
-                
-                enhanced_hit = Hit(
-                    word=hit.word,
-                    start=hit.start,
-                    end=hit.end,
-                    category=hit.category,
-                    source=hit.source,
-                    confidence=enhanced_confidence,
-                    match_type=hit.match_type,
-                    detection_method=hit.detection_method,
-                    suggestion=hit.suggestion
-                )
-                enhanced_hits.append(enhanced_hit)
-            else:
-                enhanced_hits.append(hit)
-        
-        return enhanced_hits
+                confidence = min(1.0, confidence + boost_factor * (match_count - 1))
+            
+            # 过滤低置信度结果
+            if confidence < threshold:
+                continue
+            
+            # 应用分类权重
+            hit.confidence = min(1.0, confidence * get_category_weight(hit.category, 1.0))
+            processed_hits.append(hit)
+        
+        return processed_hits
+    
+    @staticmethod
+    def _build_position_index(
+        results_by_rule: Dict[str, List[DetectionResultItem]]
+    ) -> Dict[Tuple[str, str], Dict[str, Optional[List[int]]]]:
+        """
+        构建 (敏感词, 分类) -> 规则名 -> 有序起始位置列表 的索引
+        
+        每个规则只取该词的第一个检测结果；结果没有位置信息时记为None，表示按匹配计数。
+        """
+        index: Dict[Tuple[str, str], Dict[str, Optional[List[int]]]] = {}
+        for rule_name, rule_results in results_by_rule.items():
+            for rule_result in rule_results:
+                per_rule = index.setdefault((rule_result.matched_word, rule_result.category), {})
+                if rule_name not in per_rule:
+                    per_rule[rule_name] = (
+                        sorted(pos.start for pos in rule_result.positions)
+                        if rule_result.positions else None
+                    )
+        return index
     
     def _filter_by_confidence(self, hits: List[Hit]) -> List[Hit]:
         """按置信度过滤"""
         return [hit for hit in hits if hit.confidence >= self.config.confidence_threshold]
     
-    def _apply_category_weights(self, hits: List[Hit]) -> List[Hit]:
-        """应用分类权重"""
-        weighted_hits = []
-        
-        for hit in hits:
-            weight = self.config.category_weights.get(hit.category, 1.0)
-            weighted_confidence = min(1.0, hit.confidence * weight)
-            
-            weighted_hit = Hit(
-                word=hit.word,
-                start=hit.start,
-                end=hit.end,
-                category=hit.category,
-                source=hit.source,
-                confidence=weighted_confidence,
-                match_type=hit.match_type,
-                detection_method=hit.detection_method,
-                suggestion=hit.suggestion
-            )
-            weighted_hits.append(weighted_hit)
-        
-        return weighted_hits
-    
     def _convert_to_detection_results(self, hits: List[Hit]) -> List[DetectionResultItem]:
         """将Hit结构转换回DetectionResultItem格式"""
         results = []
         
         for hit in hits:
+            # 置信度未被权重调整的单位置命中与原始结果完全相同，直接复用，不再重新构建和校验模型
+            source_result = hit.source_result
+            if source_result is not None and source_result.confidence == hit.confidence:
+                results.append(source_result)
+                continue
+            
             result = DetectionResultItem(
                 matched_word=hit.word,
                 category=hit.category,
@@ -295,131 +336,41 @@ class DetectionResultArbitrator:
     
     def _sort_results(self, results: List[DetectionResultItem]) -> List[DetectionResultItem]:
         """排序结果"""
-        # 按置信度降序，然后按分类权重降序
-        def sort_key(result):
-            category_weight = self.config.category_weights.get(result.category, 1.0)
-            return (-result.confidence, -category_weight)
-        
-        return sorted(results, key=sort_key)
+        # 按置信度降序，然后按分类权重降序：
+        # 先按次要键排序，再利用排序稳定性按主要键排序，主要键由C实现的attrgetter取得
+        get_category_weight = self.config.category_weights.get
+        sorted_results = sorted(results, key=lambda result: get_category_weight(result.category, 1.0), reverse=True)
+        sorted_results.sort(key=_RESULT_CONFIDENCE, reverse=True)
+        return sorted_results
     
     def _generate_summary(self, results: List[DetectionResultItem]) -> DetectionSummary:
-        """生成检测汇总"""
-        if not results:
-            return DetectionSummary(
-                total_matches=0,
-                categories_found=[],
-                highest_risk_category=None
-            )
-        
-        # 统计分类
-        categories_found = list(set(result.category for result in results))
-        
-        # 找出最高风险分类
-        highest_risk_category = None
-        if results:
-            # 按置信度和分类权重排序后的第一个
-            highest_confidence_result = results[0]
-            highest_risk_category = highest_confidence_result.category
-        
-        return DetectionSummary(
-            total_matches=len(results),
-            categories_found=categories_found,
-            highest_risk_category=highest_risk_category
-        )
+        """生成检测汇总（结果需已按置信度降序排序）"""
+        return self._summarize(results)[0]
     
-    def calculate_overall_risk_level(self, results: List[DetectionResultItem]) -> RiskLevel:
+    def calculate_overall_risk_level(self, results: List[DetectionResultItem]) -> RiskLevelValue:
         """计算整体风险等级"""
         if not results:
             return RiskLevel.LOW
         
-        # 基于最高置信度和匹配数量
-        max_confidence = max(result.confidence for result in results)
-        match_count = len(results)
-        
-        # 计算加权分数
-        weighted_score = max_confidence
-        
-        # 高权重分类的额外权重（权重>=90的分类视为高风险）
+        # 一次遍历得到最高置信度和高权重分类（权重>=90的分类视为高风险）的结果数
+        max_confidence = results[0].confidence
+        high_weight_count = 0
+        get_category_weight = self.config.category_weights.get
         for result in results:
-            category_weight = self.config.category_weights.get(result.category, 1.0)
-            if category_weight >= 0.9:  # 高权重分类
-                weighted_score += 0.1
+            if result.confidence > max_confidence:
+                max_confidence = result.confidence
+            if get_category_weight(result.category, 1.0) >= 0.9:  # 高权重分类
+                high_weight_count += 1
         
-        # 多匹配的额外权重
-        if match_count >= 5:
-            weighted_score += 0.2
-        elif match_count >= 3:
+        # 计算加权分数：最高置信度加上高权重分类的额外权重（逐次累加，与逐条计算的浮点结果一致）
+        weighted_score = max_confidence
+        for _ in range(high_weight_count):
             weighted_score += 0.1
         
-        # 确定风险等级
-        if weighted_score >= 0.9:
-            return RiskLevel.CRITICAL
-        elif weighted_score >= 0.7:
-            return RiskLevel.HIGH
-        elif weighted_score >= 0.5:
-            return RiskLevel.MEDIUM
-        else:
-            return RiskLevel.LOW
+        return self._risk_level_from_score(weighted_score, len(results))
     
-    def _filter_by_confidence(self, results: List[DetectionResultItem]) -> List[DetectionResultItem]:
-        """按置信度过滤"""
-        return [
-            result for result in results 
-            if result.confidence >= self.config.confidence_threshold
-        ]
-    
-    def _sort_results(self, results: List[DetectionResultItem]) -> List[DetectionResultItem]:
-        """排序结果"""
-        # 按置信度降序，然后按分类权重降序
-        def sort_key(result):
-            category_weight = self.config.category_weights.get(result.category, 1.0)
-            return (-result.confidence, -category_weight)
-        
-        return sorted(results, key=sort_key)
-    
-    def _generate_summary(self, results: List[DetectionResultItem]) -> DetectionSummary:
-        """生成检测汇总"""
-        if not results:
-            return DetectionSummary(
-                total_matches=0,
-                categories_found=[],
-                highest_risk_category=None
-            )
-        
-        # 统计分类
-        categories_found = list(set(result.category for result in results))
-        
-        # 找出最高风险分类
-        highest_risk_category = None
-        if results:
-            # 按置信度和分类权重排序后的第一个
-            highest_confidence_result = results[0]
-            highest_risk_category = highest_confidence_result.category
-        
-        return DetectionSummary(
-            total_matches=len(results),
-            categories_found=categories_found,
-            highest_risk_category=highest_risk_category
-        )
-    
-    def calculate_overall_risk_level(self, results: List[DetectionResultItem]) -> RiskLevel:
-        """计算整体风险等级"""
-        if not results:
-            return RiskLevel.LOW
-        
-        # 基于最高置信度和匹配数量
-        max_confidence = max(result.confidence for result in results)
-        match_count = len(results)
-        
-        # 计算加权分数
-        weighted_score = max_confidence
-        
-        # 高权重分类的额外权重（权重>=90的分类视为高风险）
-        for result in results:
-            category_weight = self.config.category_weights.get(result.category, 1.0)
-            if category_weight >= 0.9:  # 高权重分类
-                weighted_score += 0.1
-        
+    def _risk_level_from_score(self, weighted_score: float, match_count: int) -> RiskLevelValue:
+        """根据加权分数和匹配数量确定风险等级"""
         # 多匹配的额外权重
         if match_count >= 5:
             weighted_score += 0.2
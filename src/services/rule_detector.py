@@ -2,8 +2,14 @@
 基于规则的敏感词检测器 - 使用YAML配置
 """
 import ahocorasick
+import asyncio
+import functools
+import os
 import time
-from typing import List, Dict, Set, Optional, Any
+from anyio import CapacityLimiter, to_thread
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import List, Dict, Set, Optional, Any, Tuple
 from pathlib import Path
 
 from ..models import (
@@ -12,10 +18,35 @@ from ..models import (
 )
 from ..core import get_logger, DetectionError
 from .text_processor import TextPreprocessor
-from .yaml_config_reader import YamlConfigReader
+from .yaml_config_reader import YamlConfigReader, WordlistConfig
 
 logger = get_logger()
 
+# 批量检测时拼接文本的分隔符，敏感词中不会出现，因此匹配不会跨越两段文本
+_BATCH_DELIMITER = "\x00"
+
+# 匹配计算放到线程池执行，避免阻塞事件循环；限制同时占用的线程数
+_MATCH_LIMITER = CapacityLimiter((os.cpu_count() or 1) * 2)
+
+# 预处理结果缓存的条目数（重试和重复提交的文本无需再次繁简转换和清理）
+_PREPARED_TEXT_CACHE_SIZE = 1024
+
+# 加载词库时每处理这么多个敏感词输出一次进度日志
+_LOAD_PROGRESS_INTERVAL = 100_000
+
+
+@dataclass(frozen=True, slots=True)
+class _MatcherState:
+    """一次词库加载的完整匹配状态，加载完成后整体替换，检测时只读取一次"""
+    # AC自动机，存储所有敏感词；值为词表序号
+    automaton: ahocorasick.Automaton
+    # 词表：序号 -> (原始敏感词, 分类, 词长, 分类位)
+    word_table: List[Tuple[str, str, int, int]]
+    # 分类 -> 分类位（1 << 分类序号），按分类过滤时用整数位运算代替字符串集合查找
+    category_bits: Dict[str, int]
+    # 词汇到分类的映射 (使用词库名称作为分类)
+    word_to_category: Dict[str, str]
+
 
 class RuleBasedDetector:
     """基于规则的敏感词检测器 - 使用YAML配置"""
@@ -30,59 +61,51 @@ class RuleBasedDetector:
         self.config_reader = YamlConfigReader(config_file)
         self.text_processor = TextPreprocessor()
         
-        # AC自动机，存储所有敏感词
-        self.automaton: ahocorasick.Automaton = None
+        # lru_cache线程安全，可在线程池的并发匹配中共用
+        self._prepare_text = functools.lru_cache(maxsize=_PREPARED_TEXT_CACHE_SIZE)(self._prepare_text_uncached)
         
-        # 词汇到分类的映射 (使用词库名称作为分类)
-        self.word_to_category: Dict[str, str] = {}
+        # 当前匹配状态，词库加载前为None
+        self._state: Optional[_MatcherState] = None
         
-        # 词库加载状态
-        self.loaded = False
+        # 串行化词库加载，首次检测的并发请求只构建一次自动机
+        self._load_lock = asyncio.Lock()
         self.last_load_time = 0
         
         logger.info(f"规则检测器初始化完成，配置文件: {config_file}")
     
+    @property
+    def loaded(self) -> bool:
+        """词库是否已加载"""
+        return self._state is not None
+    
     async def load_wordlists(self) -> None:
         """从YAML配置加载敏感词库"""
+        async with self._load_lock:
+            await self._load_wordlists()
+    
+    async def _ensure_loaded(self) -> None:
+        """首次检测时加载词库；等待锁期间已被其他请求加载完成时直接返回"""
+        async with self._load_lock:
+            if self._state is None:
+                await self._load_wordlists()
+    
+    async def _load_wordlists(self) -> None:
+        """加载词库并替换匹配状态（调用方需持有_load_lock）"""
         try:
             start_time = time.time()
             
             # 重新加载配置
             self.config_reader.reload_config()
             
-            # 创建新的AC自动机
-            self.automaton = ahocorasick.Automaton()
-            self.word_to_category.clear()
-            
             # 从配置中获取所有启用的词库
             enabled_wordlists = self.config_reader.get_enabled_wordlists()
             
-            total_words = 0
+            # 词汇标准化和自动机构建都是纯CPU计算，放到工作线程执行，避免大词库加载期间阻塞事件循环；
+            # 新的匹配状态构建完成后一次赋值整体替换，线程池中进行的匹配不会看到新旧混合的状态
+            state = await to_thread.run_sync(self._build_automaton, enabled_wordlists)
+            total_words = len(state.word_table)
             
-            for wordlist_config in enabled_wordlists:
-                # 直接使用词库名称作为分类
-                category = wordlist_config.name
-                
-                # 加载词汇
-                base_path = self.config_reader.config_file.parent.parent
-                words = wordlist_config.load_words(base_path)
-                
-                for word in words:
-                    if word and not word.startswith('#'):  # 跳过空行和注释
-                        # 标准化敏感词
-                        normalized_word = self.text_processor.normalize(word)
-                        if normalized_word:
-                            self.automaton.add_word(normalized_word, (word, category))
-                            self.word_to_category[normalized_word] = category
-                            total_words += 1
-                
-                logger.info(f"加载词库 '{wordlist_config.name}' ({category}): {len(words)} 个词")
-            
-            # 构建自动机
-            if total_words > 0:
-                self.automaton.make_automaton()
-            
-            self.loaded = True
+            self._state = state
             self.last_load_time = time.time()
             load_duration = (self.last_load_time - start_time) * 1000
             
@@ -92,13 +115,62 @@ class RuleBasedDetector:
             logger.error(f"词库加载失败: {e}")
             raise DetectionError(f"词库加载失败: {e}")
     
+    def _build_automaton(
+        self,
+        enabled_wordlists: List[WordlistConfig]
+    ) -> _MatcherState:
+        """
+        读取并标准化词库，构建AC自动机（同步执行，供load_wordlists在工作线程中调用）
+        
+        Args:
+            enabled_wordlists: 启用的词库配置列表
+            
+        Returns:
+            新的匹配状态
+        """
+        automaton = ahocorasick.Automaton()
+        add_word = automaton.add_word
+        normalize = self.text_processor.normalize
+        word_to_category: Dict[str, str] = {}
+        word_table: List[Tuple[str, str, int, int]] = []
+        append_word = word_table.append
+        category_bits: Dict[str, int] = {}
+        base_path = self.config_reader.config_file.parent.parent
+        next_progress = _LOAD_PROGRESS_INTERVAL
+        
+        for wordlist_config in enabled_wordlists:
+            # 直接使用词库名称作为分类
+            category = wordlist_config.name
+            category_bit = category_bits.setdefault(category, 1 << len(category_bits))
+            
+            # 加载词汇，先一次性过滤空行和注释，再批量标准化
+            words = wordlist_config.load_words(base_path)
+            candidates = [word for word in words if word and not word.startswith('#')]
+            
+            for word, normalized_word in zip(candidates, map(normalize, candidates)):
+                if normalized_word:
+                    add_word(normalized_word, len(word_table))
+                    append_word((word, category, len(word), category_bit))
+                    word_to_category[normalized_word] = category
+            
+            logger.info(f"加载词库 '{wordlist_config.name}' ({category}): {len(words)} 个词")
+            if len(word_table) >= next_progress:
+                logger.info(f"词库加载进度: 已处理 {len(word_table)} 个敏感词")
+                next_progress = (len(word_table) // _LOAD_PROGRESS_INTERVAL + 1) * _LOAD_PROGRESS_INTERVAL
+        
+        # 构建自动机
+        if word_table:
+            automaton.make_automaton()
+        
+        return _MatcherState(automaton, word_table, category_bits, word_to_category)
+    
     async def detect(
         self, 
         text: str, 
         config: DetectionConfig
     ) -> List[DetectionResultItem]:
         """
-        执行规则匹配检测
+        执行规则匹配检测（匹配计算在线程池中执行）
         
         Args:
             text: 待检测文本
@@ -107,48 +179,63 @@ class RuleBasedDetector:
         Returns:
             检测结果列表
         """
-        if not self.loaded:
-            await self.load_wordlists()
+        if self._state is None:
+            await self._ensure_loaded()
         
-        if not text.strip() or not self.automaton:
+        return await to_thread.run_sync(self.detect_sync, text, config, limiter=_MATCH_LIMITER)
+    
+    def detect_sync(
+        self,
+        text: str,
+        config: DetectionConfig
+    ) -> List[DetectionResultItem]:
+        """
+        同步执行规则匹配检测（纯CPU计算，要求词库已加载，可在线程池中调用）
+        
+        Args:
+            text: 待检测文本
+            config: 检测配置
+            
+        Returns:
+            检测结果列表（每个敏感词和分类组合最多一项）
+        """
+        state = self._state
+        if not text.strip() or state is None or not state.automaton:
             return []
         
         try:
             start_time = time.time()
             
             # 文本预处理
-            normalized_text = self.text_processor.normalize(text)
-            cleaned_text = self.text_processor.clean_for_matching(normalized_text)
+            cleaned_text = self._prepare_text(text)
             
             results = []
             
-            # 确定要检测的分类 (直接使用字符串比较)
-            if config.categories:
-                categories_to_check = set(config.categories)
-            else:
-                categories_to_check = None  # 检测所有分类
+            # 确定要检测的分类
+            category_mask = self._category_mask(state, config.categories)
+            if category_mask == 0:
+                return results
             
-            # 执行匹配
-            for end_index, (original_word, word_category) in self.automaton.iter(cleaned_text):
+            # 执行匹配，同一(敏感词, 分类)只保留首次出现的位置；
+            # 自动机中存储的词表序号即作为去重键
+            word_table = state.word_table
+            seen = set()
+            for end_index, word_id in state.automaton.iter(cleaned_text):
+                if word_id in seen:
+                    continue
+                original_word, word_category, word_length, category_bit = word_table[word_id]
+                
                 # 检查分类是否在检测范围内
-                if categories_to_check and word_category not in categories_to_check:
+                if category_mask is not None and not category_mask & category_bit:
                     continue
                     
-                start_index = end_index - len(original_word) + 1
+                start_index = end_index - word_length + 1
                 
-                # 边界检查
-                if self._is_valid_match(cleaned_text, start_index, end_index):
-                    # 创建检测结果 (直接使用字符串分类)
-                    result_item = DetectionResultItem(
-                        matched_word=original_word,
-                        category=word_category,  # 直接使用字符串分类
-                        match_type=MatchType.EXACT,
-                        confidence=1.0,  # 规则匹配置信度为1
-                        positions=[Position(start=start_index, end=end_index + 1)] if config.return_positions else [],
-                        detection_method=DetectionMethod.RULE,
-                        suggestion="***" if config.return_suggestions else None
-                    )
-                    results.append(result_item)
+                # 中文没有明显的单词边界，不做边界检查，自动机命中即为有效匹配
+                seen.add(word_id)
+                results.append(self._build_result_item(
+                    original_word, word_category, start_index, end_index, config
+                ))
             
             detection_time = (time.time() - start_time) * 1000
             logger.debug(f"规则检测完成，发现 {len(results)} 个匹配，耗时 {detection_time:.2f}ms")
@@ -159,49 +246,153 @@ class RuleBasedDetector:
             logger.error(f"规则检测失败: {e}")
             raise DetectionError(f"规则检测失败: {e}")
     
-    def _is_valid_match(self, text: str, start: int, end: int) -> bool:
+    async def detect_batch(
+        self,
+        texts: List[str],
+        configs: List[DetectionConfig]
+    ) -> List[List[DetectionResultItem]]:
+        """
+        批量执行规则匹配检测
+        
+        将所有文本以分隔符拼接后只做一次AC自动机扫描，再按偏移量把匹配分回各文本。
+        扫描在线程池中执行，不阻塞事件循环。
+        
+        Args:
+            texts: 待检测文本列表
+            configs: 与文本一一对应的检测配置
+            
+        Returns:
+            与文本一一对应的检测结果列表
+        """
+        if self._state is None:
+            await self._ensure_loaded()
+        
+        return await to_thread.run_sync(self.detect_batch_sync, texts, configs, limiter=_MATCH_LIMITER)
+    
+    def detect_batch_sync(
+        self,
+        texts: List[str],
+        configs: List[DetectionConfig]
+    ) -> List[List[DetectionResultItem]]:
         """
-        验证匹配是否有效（边界检查）
+        同步执行批量规则匹配检测（要求词库已加载，可在线程池中调用）
         
         Args:
-            text: 文本
-            start: 起始位置
-            end: 结束位置
+            texts: 待检测文本列表
+            configs: 与文本一一对应的检测配置
             
         Returns:
-            是否为有效匹配
+            与文本一一对应的检测结果列表
         """
-        # 简化边界检查，主要防止部分匹配
-        # 比如"法轮功"不应该匹配"大法轮功夫"中的"法轮功"
-        
-        # 检查前边界 - 只检查中文字符
-        if start > 0:
-            prev_char = text[start - 1]
-            # 如果前一个字符是中文字符，可能是部分匹配
-            if '\u4e00' <= prev_char <= '\u9fff':
-                # 可以考虑放宽条件，或者使用更智能的边界检查
-                pass
-        
-        # 检查后边界 - 只检查中文字符  
-        if end < len(text) - 1:
-            next_char = text[end + 1]
-            # 如果后一个字符是中文字符，可能是部分匹配
-            if '\u4e00' <= next_char <= '\u9fff':
-                # 可以考虑放宽条件，或者使用更智能的边界检查
-                pass
-        
-        # 对于中文文本，暂时返回True，因为中文没有明显的单词边界
-        return True
+        batch_results: List[List[DetectionResultItem]] = [[] for _ in texts]
+        state = self._state
+        if state is None or not state.automaton:
+            return batch_results
+        
+        try:
+            start_time = time.time()
+            
+            # 文本预处理，记录每段文本在拼接缓冲区中的起始偏移
+            indices: List[int] = []
+            offsets: List[int] = []
+            parts: List[str] = []
+            offset = 0
+            for index, text in enumerate(texts):
+                if not text.strip():
+                    continue
+                cleaned_text = self._prepare_text(text)
+                indices.append(index)
+                offsets.append(offset)
+                parts.append(cleaned_text)
+                offset += len(cleaned_text) + len(_BATCH_DELIMITER)
+            
+            if not parts:
+                return batch_results
+            
+            category_masks = [self._category_mask(state, config.categories) for config in configs]
+            seen = [set() for _ in texts]
+            word_table = state.word_table
+            
+            # 一次扫描完成所有文本的匹配，每段文本内同一(敏感词, 分类)只保留首次出现
+            for end_index, word_id in state.automaton.iter(_BATCH_DELIMITER.join(parts)):
+                slot = bisect_right(offsets, end_index) - 1
+                index = indices[slot]
+                if word_id in seen[index]:
+                    continue
+                original_word, word_category, word_length, category_bit = word_table[word_id]
+                
+                category_mask = category_masks[index]
+                if category_mask is not None and not category_mask & category_bit:
+                    continue
+                
+                # 换算为所在文本内的位置
+                base = offsets[slot]
+                start_index = end_index - word_length + 1 - base
+                local_end_index = end_index - base
+                
+                seen[index].add(word_id)
+                batch_results[index].append(self._build_result_item(
+                    original_word, word_category, start_index, local_end_index, configs[index]
+                ))
+            
+            detection_time = (time.time() - start_time) * 1000
+            logger.debug(f"批量规则检测完成，{len(texts)} 段文本，耗时 {detection_time:.2f}ms")
+            
+            return batch_results
+            
+        except Exception as e:
+            logger.error(f"批量规则检测失败: {e}")
+            raise DetectionError(f"规则检测失败: {e}")
+    
+    def _prepare_text_uncached(self, text: str) -> str:
+        """标准化并清理待匹配文本"""
+        return self.text_processor.clean_for_matching(self.text_processor.normalize(text))
+    
+    @staticmethod
+    def _category_mask(state: _MatcherState, categories: List[str]) -> Optional[int]:
+        """
+        将待检测分类转换为分类位掩码
+        
+        Returns:
+            未指定分类时返回None（检测所有分类）；指定的分类都不存在时返回0
+        """
+        if not categories:
+            return None
+        
+        mask = 0
+        for category in categories:
+            mask |= state.category_bits.get(category, 0)
+        return mask
+    
+    def _build_result_item(
+        self,
+        original_word: str,
+        category: str,
+        start_index: int,
+        end_index: int,
+        config: DetectionConfig
+    ) -> DetectionResultItem:
+        """创建规则匹配的检测结果项"""
+        return DetectionResultItem(
+            matched_word=original_word,
+            category=category,  # 直接使用字符串分类
+            match_type=MatchType.EXACT,
+            confidence=1.0,  # 规则匹配置信度为1
+            positions=[Position(start=start_index, end=end_index + 1)] if config.return_positions else [],
+            detection_method=DetectionMethod.RULE,
+            suggestion="***" if config.return_suggestions else None
+        )
     
     def get_status(self) -> Dict[str, Any]:
         """获取检测器状态"""
         enabled_wordlists = self.config_reader.get_enabled_wordlists() if self.config_reader else []
+        state = self._state
         
         return {
-            "loaded": self.loaded,
+            "loaded": state is not None,
             "last_load_time": self.last_load_time,
             "enabled_wordlists": len(enabled_wordlists),
-            "total_words": len(self.word_to_category) if self.loaded else 0,
+            "total_words": len(state.word_to_category) if state is not None else 0,
             "wordlists": [
                 {
                     "name": wl.name,
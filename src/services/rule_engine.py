@@ -2,7 +2,7 @@
 检测规则引擎 - 每个规则有自己的预处理机制
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Set
+from typing import List, Dict, Any, Optional, Set, Iterable, Iterator, Tuple
 import ahocorasick
 import jieba
 import re
@@ -14,6 +14,18 @@ from ..core import get_logger
 
 logger = get_logger()
 
+# 精确匹配预处理时移除的常见干扰字符（预编译，文本检测和词库加载都会逐次调用）
+_NOISE_RE = re.compile(r'[\s\.\*_\-\+\|\\\/\[\]{}()（）【】《》""'']')
+# 纯ASCII文本改用str.translate删除干扰字符（删除表由_NOISE_RE推导）；非ASCII文本逐字符查表比正则慢，仍用正则
+_ASCII_NOISE_TABLE = dict.fromkeys(code for code in range(128) if _NOISE_RE.match(chr(code)))
+
+
+def _remove_noise(text: str) -> str:
+    """移除干扰字符，等价于_NOISE_RE.sub('', text)"""
+    if text.isascii():
+        return text.translate(_ASCII_NOISE_TABLE)
+    return _NOISE_RE.sub('', text)
+
 
 @dataclass
 class RuleConfig:
@@ -61,7 +73,10 @@ class ExactMatchRule(BaseDetectionRule):
     
     def __init__(self, rule_config: RuleConfig):
         super().__init__(rule_config)
-        self.automatons: Dict[str, ahocorasick.Automaton] = {}
+        # 所有分类的敏感词合并到一个AC自动机中，一次扫描即可得到全部分类的匹配；
+        # 值为该词所属的 ((分类, 原始敏感词), ...)，按分类加载顺序排列
+        self.automaton: Optional[ahocorasick.Automaton] = None
+        self.categories: List[str] = []
         
         # 规则特定配置
         self.remove_spaces = self.config.get('remove_spaces', True)
@@ -79,20 +94,20 @@ class ExactMatchRule(BaseDetectionRule):
         # 移除空格和特殊字符
         if self.remove_spaces:
             # 移除常见的干扰字符
-            noise_chars = r'[\s\.\*_\-\+\|\\\/\[\]{}()（）【】《》""'']'
-            processed = re.sub(noise_chars, '', processed)
+            processed = _remove_noise(processed)
         
         return processed
     
     def load_wordlist(self, words_by_category: Dict[str, List[str]]):
         """加载词库到AC自动机"""
-        self.automatons.clear()
+        # 预处理后的敏感词 -> {分类: 原始敏感词}；同一分类内预处理结果相同的词以最后一个为准
+        entries: Dict[str, Dict[str, str]] = {}
+        categories: List[str] = []
         
         for category, words in words_by_category.items():
             if not words:
                 continue
-                
-            automaton = ahocorasick.Automaton()
+            categories.append(category)
             
             for word in words:
                 if not word.strip():
@@ -101,38 +116,46 @@ class ExactMatchRule(BaseDetectionRule):
                 # 预处理敏感词
                 processed_word = self.preprocess_text(word.strip())
                 if processed_word:
-                    automaton.add_word(processed_word, (word, category))
-            
-            # 构建自动机
+                    entries.setdefault(processed_word, {})[category] = word
+        
+        # 构建自动机
+        automaton = ahocorasick.Automaton()
+        add_word = automaton.add_word
+        for processed_word, word_categories in entries.items():
+            add_word(processed_word, tuple(word_categories.items()))
+        
+        if entries:
             automaton.make_automaton()
-            self.automatons[category] = automaton
-            
-        logger.info(f"ExactMatchRule 加载了 {len(self.automatons)} 个分类的词库")
+            self.automaton = automaton
+        else:
+            self.automaton = None
+        self.categories = categories
+        
+        logger.info(f"ExactMatchRule 加载了 {len(self.categories)} 个分类的词库")
     
     def detect(self, text: str, config: DetectionConfig) -> List[DetectionResultItem]:
         """执行精确匹配检测"""
-        if not text.strip():
+        if not text.strip() or self.automaton is None:
             return []
         
         # 预处理文本
         processed_text = self.preprocess_text(text)
-        results = []
         
         # 确定要检测的分类
-        categories_to_check = config.categories or list(self.automatons.keys())
-        
-        for category in categories_to_check:
-            if category not in self.automatons:
-                continue
-            
-            automaton = self.automatons[category]
-            
-            # 执行匹配
-            for end_index, (original_word, word_category) in automaton.iter(processed_text):
+        requested_categories = set(config.categories)
+        check_boundaries = self.check_boundaries
+        
+        # 一次扫描所有分类，按分类收集匹配结果
+        results_by_category: Dict[str, List[DetectionResultItem]] = {}
+        for end_index, word_entries in self.automaton.iter(processed_text):
+            for word_category, original_word in word_entries:
+                if requested_categories and word_category not in requested_categories:
+                    continue
+                
                 start_index = end_index - len(original_word) + 1
                 
                 # 边界检查
-                if self.check_boundaries and not self.is_valid_match(processed_text, start_index, end_index):
+                if check_boundaries and not self.is_valid_match(processed_text, start_index, end_index):
                     continue
                 
                 # 创建检测结果
@@ -145,23 +168,28 @@ class ExactMatchRule(BaseDetectionRule):
                     detection_method=DetectionMethod.RULE,
                     suggestion="***" if config.return_suggestions else None
                 )
-                results.append(result_item)
+                results_by_category.setdefault(word_category, []).append(result_item)
+        
+        # 结果按分类顺序输出（指定分类时按请求中的顺序）
+        results = []
+        for category in config.categories or self.categories:
+            category_results = results_by_category.get(category)
+            if category_results:
+                results.extend(category_results)
         
         return results
     
     def is_valid_match(self, text: str, start: int, end: int) -> bool:
         """检查边界"""
+        # 中日韩统一表意文字（U+4E00-U+9FFF）在Unicode 14起已全部分配且属于字母类，
+        # isalnum()本身即覆盖中文，无需再做码位范围比较
         # 检查前边界
-        if start > 0:
-            prev_char = text[start - 1]
-            if prev_char.isalnum() or '\u4e00' <= prev_char <= '\u9fff':
-                return False
+        if start > 0 and text[start - 1].isalnum():
+            return False
         
         # 检查后边界
-        if end < len(text) - 1:
-            next_char = text[end + 1]
-            if next_char.isalnum() or '\u4e00' <= next_char <= '\u9fff':
-                return False
+        if end < len(text) - 1 and text[end + 1].isalnum():
+            return False
         
         return True
 
@@ -172,6 +200,8 @@ class JiebaRule(BaseDetectionRule):
     def __init__(self, rule_config: RuleConfig):
         super().__init__(rule_config)
         self.word_sets: Dict[str, Set[str]] = {}
+        # 反向索引：词 -> 包含该词的分类列表（按词库顺序），分词结果只需查一次字典
+        self.word_to_categories: Dict[str, List[str]] = {}
         
         # 规则特定配置
         self.use_hmm = self.config.get('use_hmm', True)
@@ -195,6 +225,9 @@ class JiebaRule(BaseDetectionRule):
     def load_wordlist(self, words_by_category: Dict[str, List[str]]):
         """加载词库到集合中"""
         self.word_sets.clear()
+        self.word_to_categories.clear()
+        # 待加入jieba词典的词（dict保持首次出现的顺序），多个分类共有的词只添加一次
+        dictionary_words: Dict[str, None] = {}
         
         for category, words in words_by_category.items():
             word_set = set()
@@ -206,11 +239,19 @@ class JiebaRule(BaseDetectionRule):
                 processed_word = self.preprocess_text(word.strip())
                 if processed_word:
                     word_set.add(processed_word)
-                    # 同时添加原词到jieba词典
-                    jieba.add_word(processed_word)
+                    dictionary_words[processed_word] = None
             
             self.word_sets[category] = word_set
         
+        for category, word_set in self.word_sets.items():
+            for processed_word in word_set:
+                self.word_to_categories.setdefault(processed_word, []).append(category)
+        
+        # 同时添加原词到jieba词典；add_word会对每个词分词估算词频，去重后可省去重复的估算
+        add_word = jieba.add_word
+        for processed_word in dictionary_words:
+            add_word(processed_word)
+        
         logger.info(f"JiebaRule 加载了 {len(self.word_sets)} 个分类的词库")
     
     def detect(self, text: str, config: DetectionConfig) -> List[DetectionResultItem]:
@@ -221,50 +262,64 @@ class JiebaRule(BaseDetectionRule):
         # 预处理文本
         processed_text = self.preprocess_text(text)
         
-        # 使用jieba分词
+        # 使用jieba分词，精确模式下的分词首尾相接，tokenize直接给出每个词的偏移
         if self.cut_all:
-            words = jieba.cut(processed_text, cut_all=True, HMM=self.use_hmm)
+            tokens = self._accumulate_offsets(jieba.cut(processed_text, cut_all=True, HMM=self.use_hmm))
         else:
-            words = jieba.cut(processed_text, HMM=self.use_hmm)
+            tokens = jieba.tokenize(processed_text, HMM=self.use_hmm)
         
-        word_list = list(words)
         results = []
         
-        # 确定要检测的分类
-        categories_to_check = config.categories or list(self.word_sets.keys())
+        # 确定要检测的分类（指定分类时保持请求中的顺序）
+        requested_categories = [category for category in config.categories if category in self.word_sets]
+        word_to_categories = self.word_to_categories
         
         # 检查每个分词结果
-        current_pos = 0
-        for word in word_list:
+        for word, start_pos, end_pos in tokens:
             if not word.strip():
-                current_pos += len(word)
                 continue
             
-            # 在词库中查找
-            for category in categories_to_check:
-                if category not in self.word_sets:
+            # 在反向索引中查找，绝大多数分词不是敏感词，一次字典查找即可跳过
+            word_categories = word_to_categories.get(word)
+            if word_categories is None:
+                continue
+            if config.categories:
+                word_categories = [
+                    category for category in requested_categories
+                    if word in self.word_sets[category]
+                ]
+                if not word_categories:
                     continue
-                
-                if word in self.word_sets[category]:
-                    # 找到在原文本中的位置
-                    start_pos = processed_text.find(word, current_pos)
-                    if start_pos != -1:
-                        end_pos = start_pos + len(word) - 1
-                        
-                        result_item = DetectionResultItem(
-                            matched_word=word,
-                            category=category,
-                            match_type=MatchType.EXACT,
-                            confidence=0.9,  # jieba分词的置信度稍低
-                            positions=[Position(start=start_pos, end=end_pos + 1)] if config.return_positions else [],
-                            detection_method=DetectionMethod.RULE,
-                            suggestion="***" if config.return_suggestions else None
-                        )
-                        results.append(result_item)
             
-            current_pos += len(word)
+            if self.cut_all:
+                # 全模式的分词互相重叠，累加的偏移只是查找起点，需在原文本中找到实际位置
+                start_pos = processed_text.find(word, start_pos)
+                if start_pos == -1:
+                    continue
+                end_pos = start_pos + len(word)
+            
+            for category in word_categories:
+                result_item = DetectionResultItem(
+                    matched_word=word,
+                    category=category,
+                    match_type=MatchType.EXACT,
+                    confidence=0.9,  # jieba分词的置信度稍低
+                    positions=[Position(start=start_pos, end=end_pos)] if config.return_positions else [],
+                    detection_method=DetectionMethod.RULE,
+                    suggestion="***" if config.return_suggestions else None
+                )
+                results.append(result_item)
         
         return results
+    
+    @staticmethod
+    def _accumulate_offsets(words: Iterable[str]) -> Iterator[Tuple[str, int, int]]:
+        """按词长累加偏移，生成与jieba.tokenize相同格式的 (词, 起始, 结束) 序列"""
+        position = 0
+        for word in words:
+            width = len(word)
+            yield word, position, position + width
+            position += width
 
 
 class RegexRule(BaseDetectionRule):
@@ -272,7 +327,10 @@ class RegexRule(BaseDetectionRule):
     
     def __init__(self, rule_config: RuleConfig):
         super().__init__(rule_config)
-        self.patterns: Dict[str, List[re.Pattern]] = {}
+        # 敏感词按字面量匹配（等价于re.escape后的正则），所有分类合并到一个AC自动机中，
+        # 一次扫描即可得到全部分类的匹配；值为(词长, [(分类, 词在分类中的序号), ...])
+        self.automaton: Optional[ahocorasick.Automaton] = None
+        self.categories: List[str] = []
         
         # 规则特定配置
         self.case_sensitive = self.config.get('case_sensitive', False)
@@ -290,64 +348,72 @@ class RegexRule(BaseDetectionRule):
         return processed
     
     def load_wordlist(self, words_by_category: Dict[str, List[str]]):
-        """加载词库为正则表达式"""
-        self.patterns.clear()
-        
-        # 正则标志
-        flags = 0
-        if not self.case_sensitive:
-            flags |= re.IGNORECASE
-        if self.multiline:
-            flags |= re.MULTILINE
-        if self.dotall:
-            flags |= re.DOTALL
+        """加载词库到AC自动机"""
+        entries: Dict[str, List[tuple]] = {}
         
         for category, words in words_by_category.items():
-            pattern_list = []
+            index = 0
             for word in words:
                 if not word.strip():
                     continue
                 
-                try:
-                    # 将敏感词转换为正则表达式
-                    pattern_str = re.escape(word.strip())
-                    pattern = re.compile(pattern_str, flags)
-                    pattern_list.append(pattern)
-                except re.error as e:
-                    logger.warning(f"无效的正则表达式: {word} - {e}")
-                    continue
-            
-            self.patterns[category] = pattern_list
+                processed_word = self.preprocess_text(word.strip())
+                entries.setdefault(processed_word, []).append((category, index))
+                index += 1
         
-        logger.info(f"RegexRule 加载了 {len(self.patterns)} 个分类的词库")
+        automaton = ahocorasick.Automaton()
+        for processed_word, word_entries in entries.items():
+            automaton.add_word(processed_word, (len(processed_word), word_entries))
+        
+        if entries:
+            automaton.make_automaton()
+            self.automaton = automaton
+        else:
+            self.automaton = None
+        self.categories = list(words_by_category.keys())
+        
+        logger.info(f"RegexRule 加载了 {len(self.categories)} 个分类的词库")
     
     def detect(self, text: str, config: DetectionConfig) -> List[DetectionResultItem]:
         """执行正则匹配检测"""
-        if not text.strip():
+        if not text.strip() or self.automaton is None:
             return []
         
         # 预处理文本
         processed_text = self.preprocess_text(text)
-        results = []
-        
-        # 确定要检测的分类
-        categories_to_check = config.categories or list(self.patterns.keys())
         
+        # 确定要检测的分类，结果按分类顺序输出
+        categories_to_check = config.categories or self.categories
+        category_order = {}
         for category in categories_to_check:
-            if category not in self.patterns:
-                continue
-            
-            for pattern in self.patterns[category]:
-                for match in pattern.finditer(processed_text):
-                    result_item = DetectionResultItem(
-                        matched_word=match.group(),
-                        category=category,
-                        match_type=MatchType.REGEX,
-                        confidence=0.95,
-                        positions=[Position(start=match.start(), end=match.end())] if config.return_positions else [],
-                        detection_method=DetectionMethod.RULE,
-                        suggestion="***" if config.return_suggestions else None
-                    )
-                    results.append(result_item)
-        
-        return results
+            category_order.setdefault(category, len(category_order))
+        
+        # 与逐词finditer一致：同一个词的多次匹配互不重叠
+        hits = []
+        last_end: Dict[tuple, int] = {}
+        for end_index, (length, word_entries) in self.automaton.iter(processed_text):
+            start_index = end_index - length + 1
+            for entry in word_entries:
+                order = category_order.get(entry[0])
+                if order is None or start_index < last_end.get(entry, 0):
+                    continue
+                last_end[entry] = end_index + 1
+                hits.append((order, entry[1], start_index, end_index + 1, entry[0]))
+        
+        hits.sort()
+        
+        # 命中数已知，用列表推导式直接生成结果列表
+        return_positions = config.return_positions
+        suggestion = "***" if config.return_suggestions else None
+        return [
+            DetectionResultItem(
+                matched_word=processed_text[start:end],
+                category=category,
+                match_type=MatchType.REGEX,
+                confidence=0.95,
+                positions=[Position(start=start, end=end)] if return_positions else [],
+                detection_method=DetectionMethod.RULE,
+                suggestion=suggestion
+            )
+            for _, _, start, end, category in hits
+        ]
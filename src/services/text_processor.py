@@ -1,6 +1,7 @@
 """
 文本预处理工具
 """
+import functools
 import re
 import opencc
 from typing import List, Tuple, Optional
@@ -9,6 +10,24 @@ from ..core import get_logger
 
 logger = get_logger()
 
+# 预编译的正则表达式，避免每次调用时查找re模块的模式缓存
+_WHITESPACE_RE = re.compile(r'\s+')
+# 保留中文、英文、数字和基本标点之外的字符
+_KEEP_RE = re.compile(r'[^\w\s\u4e00-\u9fff，。！？；：""''（）【】《》]')
+# 常见的干扰字符：空格、点、星号、下划线等
+_NOISE_RE = re.compile(r'[\s\.\*_\-\+\|\\\/\[\]{}()（）【】《》""'']')
+# 纯ASCII文本用str.translate删除干扰字符（远快于正则替换）；删除表由_NOISE_RE推导，两者结果一致。
+# 含非ASCII字符时translate需逐字符查表，反而慢于正则，仍用_NOISE_RE
+_ASCII_NOISE_TABLE = dict.fromkeys(code for code in range(128) if _NOISE_RE.match(chr(code)))
+
+# 分割长文本时优先使用的断句符
+_SENTENCE_DELIMITERS = ('。', '！', '？', '\n')
+
+# 标准化结果缓存：只缓存不超过该长度的短文本（词库中的敏感词），重新加载词库时无需再次繁简转换；
+# 长的待检测文本由调用方自行缓存，避免占用过多内存
+_NORMALIZE_CACHE_SIZE = 10000
+_NORMALIZE_CACHE_MAX_LENGTH = 64
+
 
 class TextPreprocessor:
     """文本预处理器"""
@@ -18,6 +37,7 @@ class TextPreprocessor:
         try:
             # 初始化繁简转换器
             self.converter = opencc.OpenCC('t2s')  # 繁体转简体
+            self._normalize_cached = functools.lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)(self._normalize_uncached)
             logger.info("文本预处理器初始化成功")
         except Exception as e:
             logger.error(f"文本预处理器初始化失败: {e}")
@@ -34,6 +54,12 @@ class TextPreprocessor:
         Returns:
             标准化后的文本
         """
+        if len(text) <= _NORMALIZE_CACHE_MAX_LENGTH:
+            return self._normalize_cached(text, remove_noise)
+        return self._normalize_uncached(text, remove_noise)
+    
+    def _normalize_uncached(self, text: str, remove_noise: bool) -> str:
+        """执行繁简转换、大小写统一和空白/特殊字符处理"""
         if not text:
             return ""
         
@@ -45,12 +71,12 @@ class TextPreprocessor:
             text = text.lower()
             
             # 3. 移除多余空白
-            text = re.sub(r'\s+', ' ', text).strip()
+            text = _WHITESPACE_RE.sub(' ', text).strip()
             
             # 4. 处理特殊字符（可选）
             if remove_noise:
                 # 保留中文、英文、数字和基本标点
-                text = re.sub(r'[^\w\s\u4e00-\u9fff，。！？；：""''（）【】《》]', '', text)
+                text = _KEEP_RE.sub('', text)
             
             return text
             
@@ -98,11 +124,9 @@ class TextPreprocessor:
             return ""
         
         # 移除常见的干扰字符
-        # 空格、点、星号、下划线等
-        noise_chars = r'[\s\.\*_\-\+\|\\\/\[\]{}()（）【】《》""'']'
-        cleaned = re.sub(noise_chars, '', text)
-        
-        return cleaned
+        if text.isascii():
+            return text.translate(_ASCII_NOISE_TABLE)
+        return _NOISE_RE.sub('', text)
     
     def split_text(self, text: str, max_length: int = 1000) -> List[str]:
         """
@@ -124,12 +148,12 @@ class TextPreprocessor:
         while start < len(text):
             end = start + max_length
             
-            # 尝试在句号、问号、感叹号处分割
+            # 尝试在句号、问号、感叹号处分割：取后半窗口内最靠后的断句符，用C实现的rfind代替逐字符回溯
             if end < len(text):
-                for i in range(end, start + max_length // 2, -1):
-                    if text[i] in '。！？\n':
-                        end = i + 1
-                        break
+                lower = start + max_length // 2 + 1
+                split_at = max(text.rfind(delimiter, lower, end + 1) for delimiter in _SENTENCE_DELIMITERS)
+                if split_at != -1:
+                    end = split_at + 1
             
             chunks.append(text[start:end])
             start = end
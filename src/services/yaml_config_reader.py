@@ -4,11 +4,22 @@ YAML配置文件读取器
 """
 import yaml
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from ..core import get_logger
 
 logger = get_logger()
 
+# libyaml可用时使用C实现的加载器，解析结果与yaml.safe_load相同
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    """获取文件修改时间（纳秒），文件不存在时返回None"""
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
 
 class WordlistConfig:
     """敏感词库配置类"""
@@ -37,7 +48,8 @@ class WordlistConfig:
             
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                words = [line.strip() for line in f if line.strip()]
+                # 每行只strip一次
+                words = [word for word in map(str.strip, f) if word]
             
             self._words = words
             logger.info(f"成功加载敏感词库 '{self.name}': {len(words)} 个词汇")
@@ -60,6 +72,9 @@ class YamlConfigReader:
         self.config_file = Path(config_file)
         self.wordlists: List[WordlistConfig] = []
         self.global_settings: Dict = {}
+        self._word_counts: Dict[str, Tuple[Optional[int], int]] = {}
+        # 最近一次成功解析时配置文件的修改时间，未变化时重新加载无需再次解析YAML
+        self._config_mtime: Optional[int] = None
         self._load_config()
     
     def _load_config(self):
@@ -67,10 +82,18 @@ class YamlConfigReader:
         if not self.config_file.exists():
             logger.error(f"配置文件不存在: {self.config_file}")
             return
+        
+        mtime = _mtime_ns(self.config_file)
+        if mtime is not None and mtime == self._config_mtime:
+            # 配置未变化：保留已解析的词库配置，只丢弃已读取的词汇，下次使用时重新读取词库文件
+            for wordlist in self.wordlists:
+                wordlist._words = None
+            self._word_counts = {}
+            return
             
         try:
             with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+                config = yaml.load(f, Loader=_YAML_LOADER)
             
             # 加载全局设置
             self.global_settings = config.get('global_settings', {})
@@ -78,6 +101,7 @@ class YamlConfigReader:
             # 加载敏感词库配置
             wordlists_config = config.get('wordlists', [])
             self.wordlists = []
+            self._word_counts = {}
             
             for wl_config in wordlists_config:
                 wordlist = WordlistConfig(
@@ -89,11 +113,16 @@ class YamlConfigReader:
                 )
                 self.wordlists.append(wordlist)
             
+            self._config_mtime = mtime
             logger.info(f"成功加载配置文件: {len(self.wordlists)} 个敏感词库配置")
             
         except Exception as e:
             logger.error(f"加载配置文件失败 {self.config_file}: {e}")
     
+    def get_all_wordlists(self) -> List[WordlistConfig]:
+        """获取所有敏感词库配置"""
+        return self.wordlists
+    
     def get_enabled_wordlists(self) -> List[WordlistConfig]:
         """获取启用的敏感词库"""
         return [wl for wl in self.wordlists if wl.enabled]
@@ -134,6 +163,34 @@ class YamlConfigReader:
         # 去重并保持顺序
         return list(dict.fromkeys(all_words))
     
+    def get_wordlist_mtimes(self, base_path: Optional[Path] = None) -> Tuple[Optional[int], ...]:
+        """获取配置文件及各词库文件的修改时间，用于判断缓存是否失效"""
+        if base_path is None:
+            base_path = self.config_file.parent.parent
+            
+        return (_mtime_ns(self.config_file),) + tuple(
+            _mtime_ns(base_path / wordlist.file) for wordlist in self.wordlists
+        )
+    
+    def word_count(self, name: str, base_path: Optional[Path] = None) -> int:
+        """获取词库的词汇数（按词库文件修改时间缓存）"""
+        wordlist = self.get_wordlist_by_name(name)
+        if wordlist is None:
+            return 0
+        
+        if base_path is None:
+            base_path = self.config_file.parent.parent
+            
+        mtime = _mtime_ns(base_path / wordlist.file)
+        cached = self._word_counts.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        # 文件已变化时重新读取，首次统计可复用已加载的词汇
+        words = wordlist.load_words(base_path) if cached is None else wordlist.reload_words(base_path)
+        self._word_counts[name] = (mtime, len(words))
+        return len(words)
+    
     def get_category_weights(self) -> Dict[str, float]:
         """获取所有词库的权重映射（分类名称到标准化权重）"""
         weights = {}
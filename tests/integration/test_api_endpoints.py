@@ -3,7 +3,7 @@
 """
 import pytest
 import asyncio
-from httpx import AsyncClient
+from httpx import AsyncClient, ASGITransport
 import sys
 import os
 
@@ -11,6 +11,7 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
 from src.main import app
+from src.services.enhanced_detection_service import EnhancedDetectionService
 
 
 class TestAPIEndpoints:
@@ -91,5 +92,50 @@ class TestAPIEndpoints:
             assert "is_sensitive" in data
 
 
+class TestBatchDetectionEndpoint:
+    """批量检测接口集成测试"""
+    
+    def setup_method(self):
+        """测试前置设置：测试客户端不执行lifespan，在这里创建增强检测服务"""
+        app.state.detection_service = EnhancedDetectionService()
+        self.transport = ASGITransport(app=app)
+    
+    @pytest.mark.asyncio
+    async def test_batch_matches_single_detection(self):
+        """测试批量检测逐项结果与单条检测接口一致"""
+        payload = [
+            {"text": "法轮功和六四都是敏感词"},
+            {"text": "这里提到了习近平", "config": {"categories": ["政治类"]}},
+            {"text": "这是一段正常的文本内容"},
+            {"text": "法轮功和六四都是敏感词"},
+        ]
+        async with AsyncClient(transport=self.transport, base_url="http://test") as client:
+            response = await client.post("/api/detect/batch", json=payload)
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert len(data) == len(payload)
+            for item, outcome in zip(payload, data):
+                single = (await client.post("/api/detect", json=item)).json()
+                outcome.pop("detection_time_ms")
+                single.pop("detection_time_ms")
+                assert outcome == single
+            assert data[0]["is_sensitive"] is True
+            assert data[2]["is_sensitive"] is False
+    
+    @pytest.mark.asyncio
+    async def test_batch_length_bounds(self):
+        """测试批量请求数量限制为1到100"""
+        async with AsyncClient(transport=self.transport, base_url="http://test") as client:
+            empty = await client.post("/api/detect/batch", json=[])
+            too_many = await client.post("/api/detect/batch", json=[{"text": "测试文本"}] * 101)
+            at_limit = await client.post("/api/detect/batch", json=[{"text": "测试文本"}] * 100)
+            
+            assert empty.status_code == 422
+            assert too_many.status_code == 422
+            assert at_limit.status_code == 200
+            assert len(at_limit.json()) == 100
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
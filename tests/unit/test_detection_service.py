@@ -11,7 +11,9 @@ project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
 
 from src.models import DetectionRequest, DetectionConfig, DetectionMode
-from src.services import SensitiveWordDetectionService, TextPreprocessor
+from src.services import SensitiveWordDetectionService, TextPreprocessor, DetectionBatcher
+from src.services.enhanced_detection_service import EnhancedDetectionService
+from src.core import DetectionError
 
 
 class TestTextPreprocessor:
@@ -81,7 +83,47 @@ class TestDetectionService:
             assert response.overall_score == 0.0
             assert len(response.results) == 0
     
-    @pytest.mark.asyncio 
+    @pytest.mark.asyncio
+    async def test_detect_batch_matches_single(self):
+        """测试批量检测与逐条检测结果一致"""
+        requests = [
+            DetectionRequest(text=text, config=DetectionConfig(detection_mode=DetectionMode.RULE))
+            for text in ["这是一段正常的文本内容", "测试文本", "另一段文本"]
+        ]
+        
+        outcomes = await self.service.detect_batch(requests)
+        
+        assert len(outcomes) == len(requests)
+        for request, outcome in zip(requests, outcomes):
+            single = await self.service.detect(request)
+            assert outcome.is_sensitive == single.is_sensitive
+            assert len(outcome.results) == len(single.results)
+    
+    @pytest.mark.asyncio
+    async def test_detect_batch_matches_single_with_hits(self):
+        """测试含敏感词文本的批量检测与逐条检测结果（含位置、风险等级和分类过滤）完全一致"""
+        texts = ["法轮功和六四都是敏感词", "这里提到了习近平", "正常文本", "台独分子，法轮功"]
+        configs = [
+            DetectionConfig(detection_mode=DetectionMode.RULE),
+            DetectionConfig(detection_mode=DetectionMode.RULE, categories=["政治类"]),
+            DetectionConfig(detection_mode=DetectionMode.RULE, categories=["不存在的分类"]),
+            DetectionConfig(detection_mode=DetectionMode.RULE, return_positions=False),
+        ]
+        requests = [
+            DetectionRequest(text=text, config=config)
+            for text in texts for config in configs
+        ]
+        
+        outcomes = await self.service.detect_batch(requests)
+        
+        assert any(outcome.is_sensitive for outcome in outcomes)
+        for request, outcome in zip(requests, outcomes):
+            single = await self.service.detect(request)
+            assert outcome.risk_level == single.risk_level
+            assert outcome.results == single.results
+            assert outcome.model_dump(exclude={"detection_time_ms"}) == single.model_dump(exclude={"detection_time_ms"})
+    
+    @pytest.mark.asyncio
     async def test_health_check(self):
         """测试健康检查"""
         health_data = await self.service.health_check()
@@ -92,5 +134,165 @@ class TestDetectionService:
         assert "components" in health_data
 
 
+class TestEnhancedDetectionService:
+    """增强检测服务批量检测和响应缓存测试"""
+    
+    def setup_method(self):
+        """测试前置设置：包装多规则检测，记录实际执行检测的文本"""
+        self.service = EnhancedDetectionService()
+        self.detected_texts = []
+        execute = self.service._execute_multi_rule_detection
+        
+        async def tracked_execute(request):
+            self.detected_texts.append(request.text)
+            if request.text == "触发异常的文本":
+                raise RuntimeError("模拟规则异常")
+            return await execute(request)
+        
+        self.service._execute_multi_rule_detection = tracked_execute
+    
+    @staticmethod
+    def _comparable(response):
+        """去掉检测耗时后比较响应"""
+        return response.model_dump(exclude={"detection_time_ms"})
+    
+    @pytest.mark.asyncio
+    async def test_detect_batch_shares_duplicate_requests(self):
+        """测试文本和配置都相同的请求只检测一次并共享响应"""
+        requests = [
+            DetectionRequest(text="法轮功和六四都是敏感词"),
+            DetectionRequest(text="法轮功和六四都是敏感词"),
+            DetectionRequest(text="法轮功和六四都是敏感词", config=DetectionConfig(categories=["政治类"])),
+            DetectionRequest(text="这里提到了习近平"),
+        ]
+        
+        outcomes = await self.service.detect_batch(requests)
+        
+        assert len(outcomes) == len(requests)
+        assert outcomes[0] is outcomes[1]
+        assert outcomes[0].is_sensitive
+        assert len(self.detected_texts) == 3
+    
+    @pytest.mark.asyncio
+    async def test_category_order_is_part_of_cache_key(self):
+        """测试只有分类顺序不同的请求不共享响应（多分类词按先列出的分类报告）"""
+        text = "这里有qqb和法轮功以及nmis"
+        requests = [
+            DetectionRequest(text=text, config=DetectionConfig(categories=["其他词", "百度过滤词", "政治类"])),
+            DetectionRequest(text=text, config=DetectionConfig(categories=["百度过滤词", "其他词", "政治类"])),
+        ]
+        
+        batch_outcomes = await self.service.detect_batch(requests)
+        cached_outcomes = [await self.service.detect(request) for request in requests]
+        
+        assert batch_outcomes[0] is not batch_outcomes[1]
+        assert len(self.detected_texts) == 2
+        for outcomes in (batch_outcomes, cached_outcomes):
+            first_categories = {item.matched_word: item.category for item in outcomes[0].results}
+            second_categories = {item.matched_word: item.category for item in outcomes[1].results}
+            assert first_categories["qqb"] == "其他词"
+            assert second_categories["qqb"] == "百度过滤词"
+    
+    @pytest.mark.asyncio
+    async def test_detect_batch_isolates_errors(self):
+        """测试单个请求失败时只在对应位置返回DetectionError"""
+        requests = [
+            DetectionRequest(text="这里提到了习近平"),
+            DetectionRequest(text="触发异常的文本"),
+            DetectionRequest(text="这是一段正常的文本内容"),
+        ]
+        
+        outcomes = await self.service.detect_batch(requests)
+        
+        assert isinstance(outcomes[1], DetectionError)
+        assert outcomes[0].is_sensitive
+        assert not outcomes[2].is_sensitive
+    
+    @pytest.mark.asyncio
+    async def test_cache_hit_returns_identical_response(self):
+        """测试重复请求命中缓存，响应与首次检测一致"""
+        request = DetectionRequest(text="法轮功和六四都是敏感词")
+        
+        first = await self.service.detect(request)
+        second = await self.service.detect(request)
+        
+        assert self.detected_texts == [request.text]
+        assert self._comparable(second) == self._comparable(first)
+    
+    @pytest.mark.asyncio
+    async def test_reload_invalidates_cache(self):
+        """测试重新加载词库后缓存失效，相同请求重新检测"""
+        request = DetectionRequest(text="法轮功和六四都是敏感词")
+        
+        first = await self.service.detect(request)
+        await self.service.reload_wordlists()
+        second = await self.service.detect(request)
+        
+        assert self.detected_texts == [request.text, request.text]
+        assert self._comparable(second) == self._comparable(first)
+
+
+class TestDetectionBatcher:
+    """检测请求微批处理器测试"""
+    
+    def setup_method(self):
+        """测试前置设置：记录每个批次大小的模拟检测服务"""
+        self.batch_sizes = []
+        self.release = asyncio.Event()
+        self.release.set()
+        
+        async def detect_batch(requests):
+            self.batch_sizes.append(len(requests))
+            await self.release.wait()
+            return [request.text for request in requests]
+        
+        self.service = MagicMock()
+        self.service.detect_batch = detect_batch
+    
+    @pytest.mark.asyncio
+    async def test_requests_within_window_share_batch(self):
+        """测试时间窗口内到达的请求合并为一批，且结果与请求一一对应"""
+        batcher = DetectionBatcher(self.service, max_batch_size=32, batch_window_ms=50)
+        await batcher.start()
+        try:
+            texts = [f"文本{i}" for i in range(5)]
+            outcomes = await asyncio.gather(*[batcher.detect(DetectionRequest(text=text)) for text in texts])
+        finally:
+            await batcher.stop()
+        
+        assert outcomes == texts
+        assert self.batch_sizes == [5]
+    
+    @pytest.mark.asyncio
+    async def test_batch_size_is_capped(self):
+        """测试单批请求数不超过max_batch_size"""
+        batcher = DetectionBatcher(self.service, max_batch_size=4, batch_window_ms=50)
+        await batcher.start()
+        try:
+            texts = [f"文本{i}" for i in range(10)]
+            outcomes = await asyncio.gather(*[batcher.detect(DetectionRequest(text=text)) for text in texts])
+        finally:
+            await batcher.stop()
+        
+        assert outcomes == texts
+        assert self.batch_sizes == [4, 4, 2]
+    
+    @pytest.mark.asyncio
+    async def test_stop_fails_queued_and_in_flight_requests(self):
+        """测试停止时正在检测的批次和仍在排队的请求都以异常结束"""
+        self.release.clear()
+        batcher = DetectionBatcher(self.service, max_batch_size=2, batch_window_ms=1)
+        await batcher.start()
+        
+        tasks = [asyncio.create_task(batcher.detect(DetectionRequest(text=f"文本{i}"))) for i in range(4)]
+        while not self.batch_sizes:
+            await asyncio.sleep(0.001)
+        await batcher.stop()
+        
+        results = await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), timeout=1)
+        assert self.batch_sizes == [2]
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])